@@ -0,0 +1,367 @@
+import atexit
+import glob
+import json
+import os
+import threading
+from bisect import bisect_left
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+
+from .timing import span_observers, time_queries
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; exited workers' snapshots are then archived without a lock
+    fcntl = None
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+# ===========================================================
+# 📈 METRIC TYPES
+# ===========================================================
+class Metric:
+    """
+    One named metric with a fixed set of label names. Samples are kept per
+    label-value tuple; every method takes the label values as keyword args.
+    """
+    kind = ""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Summed across worker processes; processes that have exited drop out."""
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), [list(counts), total, count]] for key, (counts, total, count) in self._values.items()]
+
+
+REGISTRY = {}
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by view, method and status.", ["view", "method", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled.")
+HTTP_BYTES = Counter("http_bytes_total", "Request and response body bytes.", ["direction"])
+STAGE_SECONDS = Histogram(
+    "stage_duration_seconds", "Time spent per stage/dependency (auth, db, drive, extract, llm, tts, render).", ["stage"]
+)
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result (hit/miss).", ["cache", "result"])
+DRIVE_BYTES = Counter("drive_bytes_total", "Bytes uploaded to and downloaded from Google Drive.", ["direction"])
+EXTRACTION_SECONDS = Histogram(
+    "extraction_duration_seconds", "Text extraction time per file type.", ["ext"]
+)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# ===========================================================
+# 🗂️ MULTI-PROCESS SNAPSHOTS
+# ===========================================================
+# Each gunicorn worker keeps its metrics in memory and periodically writes
+# them to METRICS_DIR/metrics-<pid>.json; a scrape merges every file. The
+# counters and histograms of exited workers are folded into one archive file
+# and their snapshots deleted, so the directory doesn't grow with every
+# restart and a new process that reuses a PID doesn't overwrite its totals.
+_last_flush = 0.0
+_flushed_pid = None
+_flush_lock = threading.Lock()
+
+
+def snapshot_path(pid=None):
+    return os.path.join(settings.METRICS_DIR, f"metrics-{pid or os.getpid()}.json")
+
+
+def archive_path():
+    return os.path.join(settings.METRICS_DIR, "metrics-archive.json")
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(path, data):
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    # Write then rename, so a scrape never reads a half-written file
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def flush(force=False):
+    """Writes this process's metrics to its snapshot file (at most every METRICS_FLUSH_INTERVAL)."""
+    global _last_flush, _flushed_pid
+    if not settings.METRICS_DIR:
+        return
+    now = monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    with _flush_lock:
+        _last_flush = now
+        path = snapshot_path()
+        if _flushed_pid != os.getpid():
+            # A file here before our first write was left by an exited process with the same PID
+            if os.path.exists(path):
+                archive_snapshots([path])
+            _flushed_pid = os.getpid()
+        _write_snapshot(path, {name: metric.snapshot() for name, metric in REGISTRY.items()})
+
+
+def retire():
+    """At exit: moves this process's counters and histograms into the archive."""
+    if not settings.METRICS_DIR:
+        return
+    flush(force=True)
+    archive_snapshots([snapshot_path()])
+
+
+def archive_snapshots(paths):
+    """
+    Adds the counters and histograms in the snapshot files `paths` (processes
+    that have exited) to the archive file and deletes them; their gauges are
+    dropped. Serialized across processes with a lock on the archive, so
+    concurrent scrapes archive each file once.
+    """
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(archive_path() + ".lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        merged = {name: {} for name in REGISTRY}
+        _merge(merged, _read_snapshot(archive_path()) or {}, alive=False)
+        archived = []
+        for path in paths:
+            data = _read_snapshot(path)
+            if data is not None:  # None: already archived by another process
+                _merge(merged, data, alive=False)
+                archived.append(path)
+        if not archived:
+            return
+        _write_snapshot(archive_path(), {
+            name: [[list(key), value] for key, value in values.items()] for name, values in merged.items() if values
+        })
+        for path in archived:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge(merged, data, alive):
+    """Adds snapshot `data` into `merged`; gauges only count for live processes."""
+    for name, samples in data.items():
+        metric = REGISTRY.get(name)
+        if metric is None or (metric.kind == "gauge" and not alive):
+            continue
+        values = merged[name]
+        for key, value in samples:
+            key = tuple(key)
+            if metric.kind == "histogram":
+                entry = values.setdefault(key, [[0] * len(value[0]), 0.0, 0])
+                entry[0] = [a + b for a, b in zip(entry[0], value[0])]
+                entry[1] += value[1]
+                entry[2] += value[2]
+            else:
+                values[key] = values.get(key, 0) + value
+
+
+def collect():
+    """{name: {label tuple: value}} merged across every process's snapshot and the archive."""
+    merged = {name: {} for name in REGISTRY}
+    _merge(merged, {name: metric.snapshot() for name, metric in REGISTRY.items()}, alive=True)
+    if settings.METRICS_DIR:
+        exited = []
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, "metrics-*.json")):
+            if path == archive_path():
+                continue
+            try:
+                pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            if not _process_alive(pid):
+                exited.append(path)
+                continue
+            data = _read_snapshot(path)
+            if data is not None:
+                _merge(merged, data, alive=True)
+        if exited:
+            archive_snapshots(exited)
+        _merge(merged, _read_snapshot(archive_path()) or {}, alive=False)
+    return merged
+
+
+# ===========================================================
+# 📜 PROMETHEUS TEXT FORMAT
+# ===========================================================
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(merged=None):
+    merged = collect() if merged is None else merged
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for key, value in sorted(merged.get(name, {}).items()):
+            if metric.kind != "histogram":
+                lines.append(f"{name}{_labels(metric.labels, key)} {_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip((*metric.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{name}_bucket{_labels(metric.labels, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(metric.labels, key)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(metric.labels, key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+# ===========================================================
+# 🌐 MIDDLEWARE + SCRAPE ENDPOINT
+# ===========================================================
+def _observe_stage(name, duration):
+    STAGE_SECONDS.observe(duration, stage=name)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, in-flight count and body bytes per request, and per-stage
+    durations from timing spans. Removed from the stack unless METRICS is on.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        if _observe_stage not in span_observers:
+            span_observers.append(_observe_stage)
+        if settings.METRICS_DIR:
+            atexit.register(retire)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            with time_queries():
+                response = self.get_response(request)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+        match = request.resolver_match
+        REQUEST_SECONDS.observe(
+            perf_counter() - started,
+            view=match.view_name if match else "unmatched",
+            method=request.method,
+            status=response.status_code,
+        )
+        HTTP_BYTES.inc(int(request.META.get("CONTENT_LENGTH") or 0), direction="in")
+        if not response.streaming:
+            HTTP_BYTES.inc(len(response.content), direction="out")
+        flush()
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs `Authorization: Bearer <METRICS_TOKEN>` when that is set."""
+    if not settings.METRICS:
+        raise Http404
+    if settings.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        return HttpResponse(status=401)
+    flush(force=True)
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,80 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+from .timing import timed
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder so UTC keeps its "Z" suffix; int keys
+    # are stringified like json.dumps does.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson for compact UTF-8 output (the API
+    default), including the \\u2028/\\u2029 escaping. The output parses to
+    the same data as the stock renderer's but is not always byte-identical:
+    floats in exponent form are written 1e16 / 1e-7 rather than 1e+16 /
+    1e-07, and NaN and Infinity become null where STRICT_JSON would raise.
+    Indented or ASCII-only output, integers beyond 64 bits, and setups
+    without orjson fall back to the stock renderer.
+    """
+    _encoder = JSONEncoder()
+
+    @timed("render")
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:  # a TypeError; e.g. an int that doesn't fit in 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+# Maps every digit to b"0" and everything else to b" "; a run of 19 zeros
+# then marks a number that may not fit in 64 bits. Much faster than a regex.
+DIGIT_MASK = bytes(0x30 if 0x30 <= i <= 0x39 else 0x20 for i in range(256))
+LONG_NUMBER = b"0" * 19
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser backed by orjson for UTF-8 bodies."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read() if stream is not None else b""
+        # orjson turns integers beyond 64 bits into floats; leave those to the stdlib
+        if LONG_NUMBER not in body.translate(DIGIT_MASK):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass  # re-parse below for the stock semantics and error message
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.json.loads(body.decode("utf-8"), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
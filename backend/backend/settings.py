@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 import json
 
@@ -11,10 +12,15 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "insecure-secret-key")
-
 DEBUG = os.getenv("DEBUG", "False") == "True"
 
+# Signs sessions, password resets and media links; render.yaml sets SECRET_KEY
+SECRET_KEY = os.getenv("SECRET_KEY") or os.getenv("DJANGO_SECRET_KEY")
+if not SECRET_KEY:
+    if not DEBUG:
+        raise ImproperlyConfigured("SECRET_KEY must be set when DEBUG is off.")
+    SECRET_KEY = "insecure-secret-key"  # local development only
+
 ALLOWED_HOSTS = ["*"]  # Render will inject its own domain
 
 # -------------------------------------------------
@@ -56,6 +62,8 @@ INSTALLED_APPS = [
 # Middleware
 # -------------------------------------------------
 MIDDLEWARE = [
+    "backend.metrics.MetricsMiddleware",  # no-op unless METRICS
+    "backend.timing.ServerTimingMiddleware",  # no-op unless SERVER_TIMING
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -104,13 +112,28 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    # Proxies in front of the app (Render's edge is one); client IPs for rate
+    # limits are read that many entries from the right of X-Forwarded-For, so
+    # clients can't pick their own by sending the header. 0 = use REMOTE_ADDR
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 1)),
 }
+# orjson-backed JSON renderer/parser (same output; stock encoder if orjson isn't installed)
+if os.getenv("FAST_JSON", "True") == "True":
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "backend.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = [
+        "backend.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ]
 
 # -------------------------------------------------
 # Password validation
@@ -160,4 +183,188 @@ DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER)
 # -------------------------------------------------
 # Default Primary Key Field Type
 # -------------------------------------------------
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
\ No newline at end of file
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# -------------------------------------------------
+# Logging (stdout, which Render collects)
+# -------------------------------------------------
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"plain": {"format": "%(levelname)s %(name)s: %(message)s"}},
+    "handlers": {"console": {"class": "logging.StreamHandler", "stream": "ext://sys.stdout", "formatter": "plain"}},
+    "root": {"handlers": ["console"], "level": os.getenv("LOG_LEVEL", "INFO")},
+}
+
+# -------------------------------------------------
+# Chat answer cache
+# -------------------------------------------------
+CHAT_ANSWER_CACHE_SIZE = int(os.getenv("CHAT_ANSWER_CACHE_SIZE", 1024))
+CHAT_ANSWER_CACHE_TTL = int(os.getenv("CHAT_ANSWER_CACHE_TTL", 600))  # seconds
+
+# -------------------------------------------------
+# LLM telemetry
+# -------------------------------------------------
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_MAX_RETRY_WAIT = float(os.getenv("LLM_MAX_RETRY_WAIT", 4))  # total backoff seconds per call (runs in the request thread)
+# USD per 1M tokens: (input, output)
+LLM_PRICING = {
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+# -------------------------------------------------
+# Summarize request coalescing
+# -------------------------------------------------
+# Share summaries between users who upload byte-identical documents
+SUMMARY_SHARE_ACROSS_USERS = os.getenv("SUMMARY_SHARE_ACROSS_USERS", "False") == "True"
+SUMMARY_FLIGHT_LEASE = int(os.getenv("SUMMARY_FLIGHT_LEASE", 60))  # seconds without a renewal before the lock is taken over
+SUMMARY_FLIGHT_RESULT_TTL = int(os.getenv("SUMMARY_FLIGHT_RESULT_TTL", 0))  # seconds a finished result is shared with new requests; waiting ones always get it
+SUMMARY_FLIGHT_POLL_INTERVAL = float(os.getenv("SUMMARY_FLIGHT_POLL_INTERVAL", 0.5))
+SUMMARY_FLIGHT_WAIT = int(os.getenv("SUMMARY_FLIGHT_WAIT", 20))  # seconds a request waits for a duplicate; keep under the gunicorn timeout
+SUMMARY_FLIGHT_RETENTION_HOURS = int(os.getenv("SUMMARY_FLIGHT_RETENTION_HOURS", 24))  # purge_flights deletes older rows
+
+# -------------------------------------------------
+# Offline stand-ins (load testing / local development)
+# -------------------------------------------------
+# Replace Gemini, Google Drive and gTTS with in-process fakes (documents/fakes.py)
+FAKE_BACKENDS = os.getenv("FAKE_BACKENDS", "False") == "True"
+FAKE_BACKEND_LATENCY = float(os.getenv("FAKE_BACKEND_LATENCY", 0.2))  # seconds per call
+FAKE_BACKEND_ERROR_RATE = float(os.getenv("FAKE_BACKEND_ERROR_RATE", 0.0))  # 0.0 - 1.0
+FAKE_GEMINI_STREAM_CHUNKS = int(os.getenv("FAKE_GEMINI_STREAM_CHUNKS", 8))
+FAKE_GEMINI_CHUNK_DELAY = float(os.getenv("FAKE_GEMINI_CHUNK_DELAY", 0.05))  # seconds between chunks
+FAKE_DRIVE_DIR = os.getenv("FAKE_DRIVE_DIR", str(MEDIA_ROOT / "fake_drive"))
+
+# -------------------------------------------------
+# Text to speech
+# -------------------------------------------------
+TTS_SEGMENT_CHARS = int(os.getenv("TTS_SEGMENT_CHARS", 250))  # max characters per synthesized segment
+TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", 6))  # gTTS segments synthesized at once per process (and queued per narration)
+# Engine per language: "gtts" (network), "espeak" (espeak-ng) or "piper"; local engines need ffmpeg
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+TTS_LANGUAGE_BACKENDS = json.loads(os.getenv("TTS_LANGUAGE_BACKENDS", "{}"))  # e.g. {"en": "piper"}
+TTS_LOCAL_MAX_WORKERS = int(os.getenv("TTS_LOCAL_MAX_WORKERS", 0)) or None  # local engine processes at once per process; defaults to CPU count
+TTS_ESPEAK_BINARY = os.getenv("TTS_ESPEAK_BINARY", "espeak-ng")
+TTS_PIPER_BINARY = os.getenv("TTS_PIPER_BINARY", "piper")
+TTS_PIPER_MODELS = json.loads(os.getenv("TTS_PIPER_MODELS", "{}"))  # language -> .onnx voice path
+TTS_FFMPEG_BINARY = os.getenv("TTS_FFMPEG_BINARY", "ffmpeg")
+# Narration audio is synthesised/uploaded once per (session, language, text); duplicates wait for it
+AUDIO_FLIGHT_LEASE = int(os.getenv("AUDIO_FLIGHT_LEASE", 60))  # seconds without a renewal before the lock is taken over
+AUDIO_FLIGHT_WAIT = int(os.getenv("AUDIO_FLIGHT_WAIT", 20))  # seconds a request waits for a duplicate; keep under the gunicorn timeout
+AUDIO_FLIGHT_POLL_INTERVAL = float(os.getenv("AUDIO_FLIGHT_POLL_INTERVAL", 0.5))
+AUDIO_STREAM_MAX_CONCURRENT = int(os.getenv("AUDIO_STREAM_MAX_CONCURRENT", 2))  # live syntheses streamed per process; more is a 503
+
+# -------------------------------------------------
+# Conditional GETs / per-user response cache
+# -------------------------------------------------
+# Serialized list/detail payloads are cached per user and content version.
+# Set CACHE_URL (e.g. redis://...) to share them across workers.
+CONTENT_CACHE_TTL = int(os.getenv("CONTENT_CACHE_TTL", 300))  # seconds
+if os.getenv("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+    }
+
+# -------------------------------------------------
+# Document memory limits
+# -------------------------------------------------
+DOCUMENT_MAX_UPLOAD_BYTES = int(os.getenv("DOCUMENT_MAX_UPLOAD_BYTES", 25 * 1024 * 1024))  # larger files are rejected (400)
+DOCUMENT_SPOOL_BYTES = int(os.getenv("DOCUMENT_SPOOL_BYTES", 2_621_440))  # uploads/downloads beyond this go to a temp file
+FILE_UPLOAD_MAX_MEMORY_SIZE = DOCUMENT_SPOOL_BYTES
+SUMMARIZE_MAX_TEXT_CHARS = int(os.getenv("SUMMARIZE_MAX_TEXT_CHARS", 12_000))  # document text sent to Gemini per summary
+
+# -------------------------------------------------
+# Document statistics and summarize estimates (POST /documents/summarize/estimate/)
+# -------------------------------------------------
+LLM_CHARS_PER_TOKEN = float(os.getenv("LLM_CHARS_PER_TOKEN", 4))  # until call history gives a measured ratio
+SUMMARIZE_ESTIMATE_HISTORY = int(os.getenv("SUMMARIZE_ESTIMATE_HISTORY", 200))  # recent summarize calls to learn from
+SUMMARIZE_ESTIMATE_OUTPUT_TOKENS = int(os.getenv("SUMMARIZE_ESTIMATE_OUTPUT_TOKENS", 1500))  # used before there is history
+SUMMARIZE_ASYNC_AFTER_MS = int(os.getenv("SUMMARIZE_ASYNC_AFTER_MS", 20_000))  # p90 beyond this recommends "async": true
+
+# -------------------------------------------------
+# Compressed text columns
+# -------------------------------------------------
+# Summaries and messages are stored compressed; "zstd" needs the zstandard package
+# and falls back to zlib without it. Existing rows stay readable either way.
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "zlib")
+
+# -------------------------------------------------
+# Full-text search
+# -------------------------------------------------
+SEARCH_MAX_BODY_CHARS = int(os.getenv("SEARCH_MAX_BODY_CHARS", 200_000))  # indexed head of long documents
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 20))
+
+# -------------------------------------------------
+# Bulk upload
+# -------------------------------------------------
+BULK_UPLOAD_MAX_FILES = int(os.getenv("BULK_UPLOAD_MAX_FILES", 100))
+BULK_UPLOAD_MAX_WORKERS = int(os.getenv("BULK_UPLOAD_MAX_WORKERS", 8))  # concurrent storage/Drive writes per process
+DATA_UPLOAD_MAX_NUMBER_FILES = BULK_UPLOAD_MAX_FILES
+
+# -------------------------------------------------
+# Token authentication cache
+# -------------------------------------------------
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10_000))  # tokens kept per process
+AUTH_TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", 30))  # seconds; bounds revocation lag across workers
+AUTH_TOKEN_SHARED_CACHE_TTL = int(os.getenv("AUTH_TOKEN_SHARED_CACHE_TTL", 0))  # >0 also caches in CACHES["default"]
+SIGNED_URL_MAX_AGE = int(os.getenv("SIGNED_URL_MAX_AGE", 600))  # seconds an audio-stream/job-events link stays valid
+
+# -------------------------------------------------
+# Email outbox (delivered by `manage.py send_outbox`)
+# -------------------------------------------------
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 1.0))  # seconds between polls when idle
+OUTBOX_LEASE = int(os.getenv("OUTBOX_LEASE", 120))  # seconds a claimed batch is hidden from other workers
+OUTBOX_IDLE_CLOSE = int(os.getenv("OUTBOX_IDLE_CLOSE", 60))  # close the SMTP connection after this idle time
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_BASE_BACKOFF = float(os.getenv("OUTBOX_BASE_BACKOFF", 5))  # seconds, doubled per attempt
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", 900))
+
+# -------------------------------------------------
+# OTP verification limits and retention
+# -------------------------------------------------
+# Sliding window, per worker process
+OTP_VERIFY_WINDOW = int(os.getenv("OTP_VERIFY_WINDOW", 600))  # seconds
+OTP_VERIFY_EMAIL_LIMIT = int(os.getenv("OTP_VERIFY_EMAIL_LIMIT", 5))  # attempts per email per window
+OTP_VERIFY_IP_LIMIT = int(os.getenv("OTP_VERIFY_IP_LIMIT", 30))  # attempts per client IP per window
+OTP_RETENTION_HOURS = int(os.getenv("OTP_RETENTION_HOURS", 24))  # purge_otps keeps newer rows for auditing
+
+# -------------------------------------------------
+# Google sign-in certificate cache
+# -------------------------------------------------
+GOOGLE_CERTS_DEFAULT_TTL = int(os.getenv("GOOGLE_CERTS_DEFAULT_TTL", 3600))  # seconds, when Cache-Control has no max-age
+GOOGLE_CERTS_REFRESH_AHEAD = int(os.getenv("GOOGLE_CERTS_REFRESH_AHEAD", 300))  # refresh in the background this long before expiry
+GOOGLE_CERTS_MIN_REFRESH = int(os.getenv("GOOGLE_CERTS_MIN_REFRESH", 60))  # seconds between forced refreshes (unknown key id, failures)
+GOOGLE_CLOCK_SKEW = int(os.getenv("GOOGLE_CLOCK_SKEW", 0))  # seconds of iat/exp leeway
+
+# -------------------------------------------------
+# Request timing (Server-Timing header + JSON log line per request)
+# -------------------------------------------------
+SERVER_TIMING = os.getenv("SERVER_TIMING", "False") == "True"
+SERVER_TIMING_LOG = os.getenv("SERVER_TIMING_LOG", "True") == "True"
+SERVER_TIMING_ALLOW_ORIGIN = os.getenv("SERVER_TIMING_ALLOW_ORIGIN", "")  # lets browsers on that origin read the timings
+
+# -------------------------------------------------
+# Metrics (Prometheus text format at /metrics)
+# -------------------------------------------------
+METRICS = os.getenv("METRICS", "False") == "True"
+METRICS_DIR = os.getenv("METRICS_DIR", "")  # shared by all gunicorn workers; empty = this process only
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))  # seconds between per-worker snapshot writes
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # scrapers send "Authorization: Bearer <token>" when set
+
+# -------------------------------------------------
+# Summarize jobs (queued by POST /documents/summarize/ with "async": true,
+# run by `manage.py summarize_worker`)
+# -------------------------------------------------
+SUMMARIZE_JOBS_PER_USER = int(os.getenv("SUMMARIZE_JOBS_PER_USER", 3))  # queued + running; more is a 429
+SUMMARIZE_QUEUE_LIMIT = int(os.getenv("SUMMARIZE_QUEUE_LIMIT", 200))  # queued jobs across all users; more is a 429
+SUMMARIZE_JOB_RETRY_AFTER = int(os.getenv("SUMMARIZE_JOB_RETRY_AFTER", 30))  # seconds, sent as Retry-After
+SUMMARIZE_JOB_USER_CONCURRENCY = int(os.getenv("SUMMARIZE_JOB_USER_CONCURRENCY", 1))  # running jobs per user
+SUMMARIZE_JOB_LEASE = int(os.getenv("SUMMARIZE_JOB_LEASE", 300))  # seconds without progress before a job is requeued
+SUMMARIZE_JOB_MAX_ATTEMPTS = int(os.getenv("SUMMARIZE_JOB_MAX_ATTEMPTS", 3))
+SUMMARIZE_WORKER_CONCURRENCY = int(os.getenv("SUMMARIZE_WORKER_CONCURRENCY", 4))  # jobs run in parallel per worker
+SUMMARIZE_WORKER_POLL_INTERVAL = float(os.getenv("SUMMARIZE_WORKER_POLL_INTERVAL", 1.0))
+SUMMARIZE_JOB_SSE_POLL = float(os.getenv("SUMMARIZE_JOB_SSE_POLL", 1.0))  # seconds between status checks per stream
+SUMMARIZE_JOB_SSE_TIMEOUT = int(os.getenv("SUMMARIZE_JOB_SSE_TIMEOUT", 55))  # seconds per stream (one gunicorn thread each); keep under --timeout in render.yaml
@@ -0,0 +1,162 @@
+import functools
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+# The trace of the request being handled on this thread/task, or None
+_current_trace = ContextVar("current_trace", default=None)
+_timing_queries = ContextVar("timing_queries", default=False)
+# Callables given (name, seconds) for every finished span, e.g. the metrics middleware
+span_observers = []
+
+
+class Trace:
+    """Spans recorded while handling one request, as (name, seconds) pairs."""
+    __slots__ = ("spans", "started")
+
+    def __init__(self):
+        self.spans = []
+        self.started = perf_counter()
+
+    def totals(self):
+        """{name: [seconds, count]} in first-seen order."""
+        totals = {}
+        for name, duration in self.spans:
+            entry = totals.setdefault(name, [0.0, 0])
+            entry[0] += duration
+            entry[1] += 1
+        return totals
+
+    def server_timing(self, total):
+        parts = []
+        for name, (duration, count) in self.totals().items():
+            part = f"{name};dur={duration * 1000:.1f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+class Span:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = perf_counter() - self.started
+        if self.trace is not None:
+            self.trace.spans.append((self.name, duration))
+        for observer in span_observers:
+            observer(self.name, duration)
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+def span(name):
+    """
+    Times the enclosed block as part of the current request's trace. With no
+    trace (timing disabled, management commands, pool threads that weren't
+    given the request's context) and no observers this is a shared no-op.
+    """
+    trace = _current_trace.get()
+    if trace is None and not span_observers:
+        return NULL_SPAN
+    return Span(trace, name)
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _time_query(execute, sql, params, many, context):
+    with span("db"):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def time_queries():
+    """Puts every query in this block in a "db" span (once, however often nested)."""
+    if _timing_queries.get():
+        yield
+        return
+    token = _timing_queries.set(True)
+    try:
+        with connection.execute_wrapper(_time_query):
+            yield
+    finally:
+        _timing_queries.reset(token)
+
+
+class ServerTimingMiddleware:
+    """
+    Collects spans for each request and reports them in a Server-Timing
+    header and one JSON log line. Removed from the stack entirely unless
+    SERVER_TIMING is on. Streaming bodies are produced after the response
+    leaves the middleware, so only the work before the first byte is timed.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = Trace()
+        token = _current_trace.set(trace)
+        try:
+            with time_queries():
+                response = self.get_response(request)
+        finally:
+            _current_trace.reset(token)
+        total = perf_counter() - trace.started
+
+        response["Server-Timing"] = trace.server_timing(total)
+        if settings.SERVER_TIMING_ALLOW_ORIGIN:
+            response["Timing-Allow-Origin"] = settings.SERVER_TIMING_ALLOW_ORIGIN
+        if settings.SERVER_TIMING_LOG:
+            logger.info(json.dumps({
+                "event": "request",
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 1),
+                "spans": {
+                    name: {"ms": round(duration * 1000, 1), "count": count}
+                    for name, (duration, count) in trace.totals().items()
+                },
+            }))
+        return response
@@ -19,11 +19,14 @@ from django.urls import path , include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     path("auth/", include("users.urls")),
-    path("documents/", include("documents.urls"))
+    path("documents/", include("documents.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 if settings.DEBUG:
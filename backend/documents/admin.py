@@ -1,8 +1,25 @@
 from django.contrib import admin
 
 # Register your models here.
-from documents.models import Document,SummarizationMessage,SummarizationSession
+from documents.models import Document,SummarizationMessage,SummarizationSession,LLMCall,SessionAudio,SummarizeJob
 
 admin.site.register(Document)
 admin.site.register(SummarizationSession)
-admin.site.register(SummarizationMessage)
\ No newline at end of file
+admin.site.register(SummarizationMessage)
+admin.site.register(SessionAudio)
+
+
+@admin.register(LLMCall)
+class LLMCallAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "endpoint", "model", "user", "prompt_tokens", "output_tokens",
+                    "time_to_first_token_ms", "latency_ms", "retries", "outcome", "cost_usd")
+    list_filter = ("endpoint", "model", "outcome", "created_at")
+    search_fields = ("user__email", "error")
+    readonly_fields = [f.name for f in LLMCall._meta.fields]
+
+
+@admin.register(SummarizeJob)
+class SummarizeJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "status", "stage", "progress", "attempts", "created_at", "finished_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("user__email", "error")
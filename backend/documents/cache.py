@@ -0,0 +1,131 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from backend.metrics import record_cache
+
+
+# ===========================================================
+# ♻️ IN-PROCESS CACHE PRIMITIVES
+# ===========================================================
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+    Oldest entries are evicted once `maxsize` is reached. Named caches
+    report hits and misses to the metrics endpoint.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=1024, ttl=300, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is not self._MISSING and entry[1] < time.monotonic():
+                del self._data[key]
+                entry = self._MISSING
+            if entry is not self._MISSING:
+                self._data.move_to_end(key)
+        if self.name:
+            record_cache(self.name, entry is not self._MISSING)
+        return default if entry is self._MISSING else entry[0]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Drop every entry whose key matches `predicate(key)`."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one execution.
+    The first caller runs `fn`; callers arriving while it is running
+    wait for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"], True
+
+        try:
+            call["result"] = fn()
+            return call["result"], False
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+
+
+# ===========================================================
+# 💬 CHAT ANSWER CACHE
+# ===========================================================
+answer_cache = TTLCache(
+    maxsize=getattr(settings, "CHAT_ANSWER_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "CHAT_ANSWER_CACHE_TTL", 600),
+    name="chat-answer",
+)
+answer_flights = SingleFlight()
+
+
+def normalize_query(query):
+    """Lower-case and collapse whitespace so trivial re-typings share a key."""
+    return " ".join(query.lower().split())
+
+
+def answer_cache_key(session, query):
+    """
+    Key an answer by session, normalized question and a digest of the
+    summary text, so a changed summary never serves a stale answer.
+    """
+    summary_digest = hashlib.sha256(session.summary_text.encode("utf-8")).hexdigest()[:16]
+    return (session.id, summary_digest, normalize_query(query))
+
+
+def invalidate_session_answers(session_id):
+    answer_cache.delete_where(lambda key: key[0] == session_id)
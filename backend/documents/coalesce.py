@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import SummaryFlight
+
+
+logger = logging.getLogger(__name__)
+
+
+class FlightTimeout(Exception):
+    pass
+
+
+def summary_flight_key(user, docs):
+    """
+    Identical summarize requests share a key: the same user asking for the
+    same set of documents, or (when SUMMARY_SHARE_ACROSS_USERS is on) any
+    user asking for documents with the same content hashes.
+    """
+    docs = list(docs)
+    if getattr(settings, "SUMMARY_SHARE_ACROSS_USERS", False) and all(d.content_hash for d in docs):
+        parts = ["hash"] + sorted(d.content_hash for d in docs)
+    else:
+        parts = [f"user:{user.id}"] + sorted(str(d.id) for d in docs)
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def coalesce_summary(key, user, compute, wait=None):
+    """
+    Runs `compute()` (which must return a SummarizationSession) at most once
+    per key across all workers. Returns (session, shared) where `shared` is
+    True when the session came from another request's computation. Waits
+    at most `wait` seconds (SUMMARY_FLIGHT_WAIT) for someone else's run.
+    """
+    flight, shared = single_flight(
+        SummaryFlight,
+        lookup={"key": key},
+        compute=lambda: {"session": compute()},
+        create_defaults={"user": user},
+        reset={"session": None, "user": user},
+        result_ttl=settings.SUMMARY_FLIGHT_RESULT_TTL,
+        lease=settings.SUMMARY_FLIGHT_LEASE,
+        wait=settings.SUMMARY_FLIGHT_WAIT if wait is None else wait,
+        poll_interval=settings.SUMMARY_FLIGHT_POLL_INTERVAL,
+    )
+    if flight.session is None:
+        # The shared session was deleted after it finished
+        return compute(), False
+    return flight.session, shared
+
+
+class _Lease:
+    """
+    A leader's claim on a flight row: `updated_at` is renewed every third of
+    the lease while it computes, and the row only counts as ours while
+    `updated_at` is still the value we last wrote. A leader that stalls past
+    the lease loses the row to the next caller and can no longer update it.
+    """
+
+    def __init__(self, model, pk, stamp, lease):
+        self.model = model
+        self.pk = pk
+        self.stamp = stamp
+        self.interval = lease / 3
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew_loop, name="flight-lease", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _owned(self):
+        return self.model.objects.filter(pk=self.pk, status=self.model.STATUS_PENDING, updated_at=self.stamp)
+
+    def _renew_loop(self):
+        try:
+            while not self._stop.wait(self.interval):
+                now = timezone.now()
+                try:
+                    if not self._owned().update(updated_at=now):
+                        return  # taken over; nothing left to renew
+                    self.stamp = now
+                except Exception as e:
+                    logger.warning("Could not renew flight lease for %s %s: %s", self.model.__name__, self.pk, e)
+        finally:
+            # This thread's own database connection
+            connection.close()
+
+    def finish(self, **fields):
+        """Stores the outcome if the row is still ours; False when another leader took over."""
+        return bool(self._owned().update(updated_at=timezone.now(), **fields))
+
+
+def single_flight(model, lookup, compute, create_defaults=None, reset=None, result_ttl=None,
+                  lease=300, wait=None, poll_interval=0.5):
+    """
+    Database-backed single-flight over rows of `model`, which must have
+    `status` (STATUS_PENDING/DONE/FAILED) and `updated_at` fields and a
+    unique constraint covering `lookup`.
+
+    The caller that inserts the row (or wins a compare-and-swap on a
+    failed, stale or expired one) runs `compute()`, whose returned dict of
+    field values is stored on the row. The leader renews the row while
+    computing, so `lease` (seconds) only has to cover a stalled or dead
+    leader, not a slow one. Everyone else polls for up to `wait` seconds
+    (default: `lease`) and then raises FlightTimeout. Returns (row, shared).
+    `result_ttl` (seconds) limits how long a finished row is reused by new
+    callers; None reuses it forever. A row finished after this call started
+    is always shared, so with a ttl of 0 only callers that were already
+    waiting get the result.
+    """
+    deadline = time.monotonic() + (lease if wait is None else wait)
+    arrived = timezone.now()
+
+    while True:
+        row, leader = _acquire(model, lookup, create_defaults or {}, reset or {}, lease, result_ttl, arrived)
+        if leader:
+            held = _Lease(model, row.pk, row.updated_at, lease)
+            try:
+                with held:
+                    fields = compute()
+            except Exception:
+                held.finish(status=model.STATUS_FAILED)
+                raise
+            if not held.finish(status=model.STATUS_DONE, **fields):
+                logger.warning("%s %s was taken over while computing; result not shared", model.__name__, row.pk)
+            row.status = model.STATUS_DONE
+            for name, value in fields.items():
+                setattr(row, name, value)
+            return row, False
+
+        if row is not None and row.status == model.STATUS_DONE:
+            return row, True
+        if time.monotonic() > deadline:
+            raise FlightTimeout("Timed out waiting for an identical request to finish.")
+        time.sleep(poll_interval)
+
+
+def _acquire(model, lookup, create_defaults, reset, lease, result_ttl, arrived):
+    """
+    Returns (row, is_leader). `row` is None when there is nothing usable
+    yet and the caller should poll again.
+    """
+    # Look before inserting: finished rows are the common case for caches
+    row = model.objects.filter(**lookup).first()
+    if row is None:
+        try:
+            with transaction.atomic():
+                return model.objects.create(**lookup, **create_defaults), True
+        except IntegrityError:
+            row = model.objects.filter(**lookup).first()
+            if row is None:
+                return None, False
+
+    now = timezone.now()
+    if row.status == model.STATUS_PENDING and row.updated_at > now - timedelta(seconds=lease):
+        return row, False
+    if row.status == model.STATUS_DONE and (
+        result_ttl is None or row.updated_at > min(now - timedelta(seconds=result_ttl), arrived)
+    ):
+        return row, False
+
+    taken = model.objects.filter(pk=row.pk, updated_at=row.updated_at).update(
+        status=model.STATUS_PENDING, updated_at=now, **reset
+    )
+    if not taken:
+        return None, False
+    row.updated_at = now
+    return row, True
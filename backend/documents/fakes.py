@@ -0,0 +1,191 @@
+"""
+Offline stand-ins for Gemini, Google Drive and gTTS.
+
+Enabled with FAKE_BACKENDS=True so the upload → summarize → chat → audio
+flow can be exercised (and load-tested) without network access or quota.
+Latency, error rate and streaming behaviour are configured in settings.
+"""
+import os
+import random
+import re
+import time
+import uuid
+
+import httplib2
+from django.conf import settings
+from google.genai import errors as genai_errors
+from googleapiclient.errors import HttpError
+
+
+def fake_backends_enabled():
+    return getattr(settings, "FAKE_BACKENDS", False)
+
+
+def _latency():
+    """Sleeps for the configured base latency plus up to 50% jitter."""
+    base = getattr(settings, "FAKE_BACKEND_LATENCY", 0.2)
+    if base > 0:
+        time.sleep(base * (1 + random.random() * 0.5))
+
+
+def _should_fail():
+    return random.random() < getattr(settings, "FAKE_BACKEND_ERROR_RATE", 0.0)
+
+
+# ===========================================================
+# 🤖 GEMINI
+# ===========================================================
+class _FakeUsage:
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.thoughts_token_count = 0
+
+
+class _FakeChunk:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class _FakeModels:
+    def generate_content_stream(self, model, contents, config=None):
+        _latency()
+        if _should_fail():
+            raise genai_errors.ServerError(503, {"error": {"message": "Fake Gemini overloaded", "status": "UNAVAILABLE"}})
+
+        prompt = _contents_text(contents)
+        answer = _fake_summary(prompt)
+        chunk_count = max(1, getattr(settings, "FAKE_GEMINI_STREAM_CHUNKS", 8))
+        chunk_delay = getattr(settings, "FAKE_GEMINI_CHUNK_DELAY", 0.05)
+        step = max(1, len(answer) // chunk_count)
+        pieces = [answer[i:i + step] for i in range(0, len(answer), step)]
+        for index, piece in enumerate(pieces):
+            if index:
+                time.sleep(chunk_delay)
+            usage = _FakeUsage(len(prompt) // 4, len(answer) // 4) if index == len(pieces) - 1 else None
+            yield _FakeChunk(piece, usage)
+
+    def generate_content(self, model, contents, config=None):
+        chunks = list(self.generate_content_stream(model, contents, config))
+        return _FakeChunk("".join(c.text for c in chunks), chunks[-1].usage_metadata)
+
+
+class FakeGeminiClient:
+    def __init__(self, *args, **kwargs):
+        self.models = _FakeModels()
+
+
+def _contents_text(contents):
+    texts = []
+    for content in contents:
+        parts = content.get("parts", []) if isinstance(content, dict) else (content.parts or [])
+        for part in parts:
+            texts.append(part.get("text", "") if isinstance(part, dict) else (part.text or ""))
+    return "\n".join(texts)
+
+
+def _fake_summary(prompt):
+    words = re.findall(r"\w+", prompt)[-60:]
+    sample = " ".join(words) or "nothing"
+    return (
+        "### 1. Overview\n"
+        f"This is an offline summary of {len(prompt)} characters of input.\n\n"
+        "### 2. Important Details\n"
+        f"- **Sample** → {sample}\n"
+    )
+
+
+# ===========================================================
+# 📁 GOOGLE DRIVE
+# ===========================================================
+def _drive_dir():
+    path = getattr(settings, "FAKE_DRIVE_DIR", None) or os.path.join(settings.MEDIA_ROOT, "fake_drive")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class _FakeDriveHttp:
+    """Serves byte ranges of a stored file the way MediaIoBaseDownload expects."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def request(self, uri, method="GET", headers=None, **kwargs):
+        _latency()
+        if _should_fail():
+            return httplib2.Response({"status": 503}), b"Fake Drive unavailable"
+        size = os.path.getsize(self.path)
+        start, end = 0, size - 1
+        match = re.match(r"bytes=(\d+)-(\d+)", (headers or {}).get("range", ""))
+        if match:
+            start, end = int(match.group(1)), min(int(match.group(2)), size - 1)
+        # Only the requested range is read, like the real API
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            chunk = f.read(end - start + 1)
+        return httplib2.Response({
+            "status": 206,
+            "content-range": f"bytes {start}-{start + len(chunk) - 1}/{size}",
+        }), chunk
+
+
+class _FakeMediaRequest:
+    def __init__(self, file_id):
+        self.uri = f"fake-drive://{file_id}"
+        self.headers = {}
+        self.http = _FakeDriveHttp(os.path.join(_drive_dir(), file_id))
+
+
+class _FakeCreateRequest:
+    def __init__(self, body, media_body):
+        self.body = body
+        self.media_body = media_body
+
+    def execute(self):
+        _latency()
+        if _should_fail():
+            raise HttpError(httplib2.Response({"status": 503}), b"Fake Drive unavailable")
+        file_id = uuid.uuid4().hex
+        with open(os.path.join(_drive_dir(), file_id), "wb") as f:
+            f.write(self.media_body.getbytes(0, self.media_body.size()))
+        return {
+            "id": file_id,
+            "name": self.body.get("name"),
+            "webViewLink": f"https://drive.fake/file/d/{file_id}/view",
+            "webContentLink": f"https://drive.fake/uc?id={file_id}&export=download",
+        }
+
+
+class _FakeFiles:
+    def create(self, body=None, media_body=None, fields=None):
+        return _FakeCreateRequest(body or {}, media_body)
+
+    def get_media(self, fileId):
+        return _FakeMediaRequest(fileId)
+
+
+class FakeDriveService:
+    def files(self):
+        return _FakeFiles()
+
+
+# ===========================================================
+# 🔊 TEXT TO SPEECH
+# ===========================================================
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz, ~26 ms)
+_SILENT_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+class FakeTTS:
+    """Drop-in for gTTS that writes silent MP3 frames (~1 frame per 2 chars)."""
+
+    def __init__(self, text, lang="en", **kwargs):
+        self.text = text
+        self.lang = lang
+
+    def write_to_fp(self, fp):
+        _latency()
+        if _should_fail():
+            raise RuntimeError("Fake TTS failed")
+        fp.write(_SILENT_FRAME * max(1, len(self.text) // 2))
@@ -0,0 +1,127 @@
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+
+# Shared dictionary primed with the phrases our summaries and chats repeat.
+# Rows record which dictionary they were written with, so never edit an
+# existing entry: add a new version instead.
+ZLIB_DICTIONARIES = {
+    1: (
+        "### 1. Overview\n### 2. Important Details\n### 3. Context & Purpose\n### 4. Implications\n"
+        "### 5. Extra Observations\n### 6. Verbatim Quotes\n- **Clause/Instruction** → \n- **Date/Name/Number** → \n"
+        "- Why the document exists\n- Who it is for\n- How it is used\n- **Rule broken** → consequence\n"
+        "- **Missed requirement** → penalty\n- Errors, missing parts, inconsistencies\n"
+        " the document the agreement the contract the following the user the company must be shall be "
+        "in accordance with as well as in order to for example such as including however therefore "
+        "the date the name the amount the payment the deadline the policy the requirements "
+        "What is the What are the Can you explain Summarize the this document this section "
+    ).encode("utf-8"),
+}
+CURRENT_ZLIB_DICTIONARY = 1
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+MIN_COMPRESS_BYTES = 64
+
+
+class CompressedBytes(bytes):
+    """Raw column value that has not been decompressed yet."""
+
+
+def compress_text(text):
+    """
+    Encodes text as <codec byte><dictionary byte><payload>. Short values are
+    stored raw; zstd is used when configured and installed, else zlib.
+    """
+    data = text.encode("utf-8")
+    if len(data) < MIN_COMPRESS_BYTES:
+        return bytes([CODEC_RAW, 0]) + data
+    dictionary = ZLIB_DICTIONARIES[CURRENT_ZLIB_DICTIONARY]
+    if getattr(settings, "TEXT_COMPRESSION", "zlib") == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=6, dict_data=zstandard.ZstdCompressionDict(dictionary))
+        return bytes([CODEC_ZSTD, CURRENT_ZLIB_DICTIONARY]) + compressor.compress(data)
+    compressor = zlib.compressobj(level=6, zdict=dictionary)
+    return bytes([CODEC_ZLIB, CURRENT_ZLIB_DICTIONARY]) + compressor.compress(data) + compressor.flush()
+
+
+def decompress_text(blob):
+    blob = bytes(blob)
+    if len(blob) < 2:
+        return ""
+    codec, dictionary_id, payload = blob[0], blob[1], blob[2:]
+    if codec == CODEC_RAW:
+        return payload.decode("utf-8")
+    dictionary = ZLIB_DICTIONARIES[dictionary_id]
+    if codec == CODEC_ZLIB:
+        decompressor = zlib.decompressobj(zdict=dictionary)
+        return (decompressor.decompress(payload) + decompressor.flush()).decode("utf-8")
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed text")
+        decompressor = zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(dictionary))
+        return decompressor.decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown text codec {codec}")
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """
+    Keeps the compressed bytes loaded from the database and only decompresses
+    them the first time the attribute is read.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedBytes):
+            value = decompress_text(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """
+    A TextField stored compressed in a binary column. Behaves like a normal
+    text attribute on model instances; cannot be filtered on in SQL, and
+    values()/values_list() return the stored bytes (see decompress_text).
+    """
+    descriptor_class = CompressedTextDescriptor
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return CompressedBytes(value)
+
+    def pre_save(self, model_instance, add):
+        # Untouched values are written back without a decompress/compress round trip
+        return model_instance.__dict__.get(self.attname)
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, CompressedBytes):
+            return value
+        return compress_text(str(value))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is not None:
+            return connection.Database.Binary(value)
+        return value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -0,0 +1,144 @@
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+
+from .models import SummarizeJob
+
+
+# ===========================================================
+# 📥 ENQUEUE (with backpressure)
+# ===========================================================
+def enqueue_job(user, docs):
+    """
+    Queues a summarize job for `docs`, or returns the user's job already
+    queued/running for the same documents. Raises Throttled (429 with
+    Retry-After) when the user or the whole queue is at its limit.
+    """
+    document_ids = sorted(doc.id for doc in docs)
+    active = SummarizeJob.objects.filter(user=user, status__in=SummarizeJob.ACTIVE_STATUSES)
+    existing = active.filter(document_ids=document_ids).first()
+    if existing:
+        return existing
+    if active.count() >= settings.SUMMARIZE_JOBS_PER_USER:
+        raise Throttled(
+            wait=settings.SUMMARIZE_JOB_RETRY_AFTER,
+            detail=f"You already have {settings.SUMMARIZE_JOBS_PER_USER} summarize jobs in progress.",
+        )
+    if SummarizeJob.objects.filter(status=SummarizeJob.STATUS_QUEUED).count() >= settings.SUMMARIZE_QUEUE_LIMIT:
+        raise Throttled(wait=settings.SUMMARIZE_JOB_RETRY_AFTER, detail="The summarize queue is full.")
+    return SummarizeJob.objects.create(user=user, document_ids=document_ids)
+
+
+# ===========================================================
+# 🎟️ CLAIM (fair across users)
+# ===========================================================
+def claim_job(lease):
+    """
+    Takes the next job for a worker. Each user's oldest queued job is a
+    candidate; users with the fewest running jobs go first, then whoever has
+    waited longest, and users already at SUMMARIZE_JOB_USER_CONCURRENCY are
+    skipped. One user's backlog therefore can't starve everyone else.
+    Returns the job (now running, with a lease) or None.
+    """
+    running = dict(
+        SummarizeJob.objects.filter(status=SummarizeJob.STATUS_RUNNING)
+        .values_list("user_id").annotate(count=Count("id")).order_by()
+    )
+    heads = (
+        SummarizeJob.objects.filter(status=SummarizeJob.STATUS_QUEUED)
+        .values_list("user_id").annotate(first=Min("id")).order_by()
+    )
+    candidates = sorted(
+        (running.get(user_id, 0), first_id) for user_id, first_id in heads
+        if running.get(user_id, 0) < settings.SUMMARIZE_JOB_USER_CONCURRENCY
+    )
+    for _, job_id in candidates:
+        with transaction.atomic():
+            job = (
+                SummarizeJob.objects.select_for_update(skip_locked=True)
+                .filter(id=job_id, status=SummarizeJob.STATUS_QUEUED).first()
+            )
+            if job is None:
+                continue  # another worker got there first
+            now = timezone.now()
+            job.status = SummarizeJob.STATUS_RUNNING
+            job.stage = "starting"
+            job.attempts += 1
+            job.started_at = now
+            job.lease_expires_at = now + timedelta(seconds=lease)
+            job.save(update_fields=["status", "stage", "attempts", "started_at", "lease_expires_at"])
+            return job
+    return None
+
+
+def requeue_expired():
+    """Puts jobs whose worker died (lease ran out) back in the queue, or fails them after max attempts."""
+    now = timezone.now()
+    expired = SummarizeJob.objects.filter(status=SummarizeJob.STATUS_RUNNING, lease_expires_at__lt=now)
+    expired.filter(attempts__gte=settings.SUMMARIZE_JOB_MAX_ATTEMPTS).update(
+        status=SummarizeJob.STATUS_FAILED, error="The summarize worker stopped while running this job.",
+        error_status=500, finished_at=now, lease_expires_at=None,
+    )
+    return expired.update(status=SummarizeJob.STATUS_QUEUED, stage="", progress=0, lease_expires_at=None)
+
+
+# ===========================================================
+# 📡 STATUS
+# ===========================================================
+def job_payload(job):
+    """Status document shared by the polling endpoint and the event stream."""
+    data = {
+        "job_id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == SummarizeJob.STATUS_QUEUED:
+        data["queued_ahead"] = SummarizeJob.objects.filter(status=SummarizeJob.STATUS_QUEUED, id__lt=job.id).count()
+    elif job.status == SummarizeJob.STATUS_DONE and job.session_id:
+        session = job.session
+        data["result"] = {
+            "session_id": session.id,
+            "title": session.title,
+            "summary": session.summary_text,
+            "created_at": session.created_at.isoformat(),
+            "coalesced": job.coalesced,
+        }
+    elif job.status == SummarizeJob.STATUS_FAILED:
+        data["error"] = job.error
+    return data
+
+
+def job_events(job_id, user_id):
+    """
+    Server-sent events for one job: an event whenever its status document
+    changes, a comment line as keep-alive, and the stream ends when the job
+    finishes or after SUMMARIZE_JOB_SSE_TIMEOUT (EventSource then reconnects).
+    """
+    yield "retry: 2000\n\n"
+    deadline = time.monotonic() + settings.SUMMARIZE_JOB_SSE_TIMEOUT
+    last, last_sent = None, time.monotonic()
+    while True:
+        job = SummarizeJob.objects.select_related("session").filter(id=job_id, user_id=user_id).first()
+        if job is None:
+            yield 'event: failed\ndata: {"error": "Job not found"}\n\n'
+            return
+        payload = job_payload(job)
+        if payload != last:
+            yield f"event: {job.status}\ndata: {json.dumps(payload)}\n\n"
+            last, last_sent = payload, time.monotonic()
+        elif time.monotonic() - last_sent > 15:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        if job.status not in SummarizeJob.ACTIVE_STATUSES or time.monotonic() > deadline:
+            return
+        time.sleep(settings.SUMMARIZE_JOB_SSE_POLL)
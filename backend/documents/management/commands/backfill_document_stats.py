@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from documents.models import Document
+from documents.stats import apply_document_stats
+
+
+STATS_FIELDS = ["page_count", "char_count", "language", "estimated_tokens"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute page/char counts, language and estimated tokens for documents uploaded "
+        "before these were stored. PDFs already moved to Drive get an estimated page count."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--all", action="store_true", help="Recompute documents that already have statistics.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        queryset = Document.objects.order_by("pk")
+        if not options["all"]:
+            queryset = queryset.filter(char_count=0)
+        updated, batch = 0, []
+        for document in queryset.iterator(chunk_size=batch_size):
+            if not document.extracted_text:
+                continue  # nothing was extracted at upload; summarize still extracts these itself
+            apply_document_stats(document)
+            batch.append(document)
+            if len(batch) >= batch_size:
+                updated += Document.objects.bulk_update(batch, STATS_FIELDS)
+                batch = []
+        if batch:
+            updated += Document.objects.bulk_update(batch, STATS_FIELDS)
+        self.stdout.write(f"Updated statistics for {updated} documents.")
@@ -0,0 +1,184 @@
+import time
+import zlib
+
+from django.apps.registry import Apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+
+from documents.fields import CURRENT_ZLIB_DICTIONARY, ZLIB_DICTIONARIES, CompressedTextField, decompress_text, zstandard
+from documents.models import Document, SummarizationMessage, SummarizationSession
+
+
+SAMPLE_SUMMARY = (
+    "### 1. Overview\nThe agreement sets out the payment terms between the company and the user.\n"
+    "### 2. Important Details\n- **Clause/Instruction** → Payment must be made within thirty days.\n"
+    "- **Date/Name/Number** → 1 March 2024, Acme Ltd, 2% per month.\n"
+    "### 3. Context & Purpose\n- Why the document exists: to define the requirements for delivery.\n"
+    "### 4. Implications\n- **Rule broken** → consequence: late payment incurs a penalty.\n"
+    "### 5. Extra Observations\n- Errors, missing parts, inconsistencies: none found.\n"
+    "### 6. Verbatim Quotes\n> \"The deadline shall be in accordance with the policy.\"\n"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare stored size and compress/decompress latency of summaries and messages "
+        "for raw, zlib, zlib with the shared dictionary and zstd, then write and read real "
+        "rows through CompressedTextField and a plain TextField twin table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000, help="Rows of each kind to sample.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--db-rows", type=int, default=200, help="Rows of each kind for the database pass; 0 skips it.")
+
+    def handle(self, *args, **options):
+        limit = options["limit"]
+        samples = {
+            "summaries": [
+                decompress_text(blob)
+                for blob in SummarizationSession.objects.values_list("summary_text", flat=True)[:limit]
+            ],
+            "messages": [
+                decompress_text(blob)
+                for blob in SummarizationMessage.objects.values_list("content", flat=True)[:limit]
+            ],
+        }
+        if not samples["summaries"]:
+            self.stdout.write("No summaries stored yet, using a synthetic sample.")
+            samples["summaries"] = [SAMPLE_SUMMARY] * 50
+
+        dictionary = ZLIB_DICTIONARIES[CURRENT_ZLIB_DICTIONARY]
+        codecs = {"zlib": zlib_codec(None), "zlib+dict": zlib_codec(dictionary)}
+        if zstandard is not None:
+            codecs["zstd+dict"] = zstd_codec(dictionary)
+        else:
+            self.stdout.write("zstandard not installed, skipping zstd.")
+
+        self.stdout.write(f"{'kind':<10}{'codec':<11}{'rows':>6}{'raw_kb':>9}{'stored_kb':>11}"
+                          f"{'ratio':>7}{'comp_us':>9}{'decomp_us':>11}")
+        for kind, texts in samples.items():
+            raw = [text.encode("utf-8") for text in texts if text]
+            if not raw:
+                continue
+            raw_size = sum(len(data) for data in raw)
+            for name, (compress, decompress) in codecs.items():
+                compress_times, decompress_times = [], []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    blobs = [compress(data) for data in raw]
+                    compress_times.append(time.perf_counter() - started)
+                    started = time.perf_counter()
+                    for blob in blobs:
+                        decompress(blob)
+                    decompress_times.append(time.perf_counter() - started)
+                stored = sum(len(blob) + 2 for blob in blobs)  # + codec/dictionary header
+                self.stdout.write(
+                    f"{kind:<10}{name:<11}{len(raw):>6}{raw_size / 1024:>9.1f}{stored / 1024:>11.1f}"
+                    f"{raw_size / stored:>7.2f}{min(compress_times) / len(raw) * 1e6:>9.1f}"
+                    f"{min(decompress_times) / len(raw) * 1e6:>11.1f}"
+                )
+
+        if options["db_rows"]:
+            self.database_pass(samples, options["db_rows"])
+
+    def database_pass(self, samples, rows):
+        """
+        Single-row inserts and primary-key reads of real sessions and messages
+        against twin tables that differ only in storing the text as a plain
+        TextField. bulk_create skips signals, so only the column differs.
+        Everything written is removed again.
+        """
+        registry = Apps()
+        twins = {"summaries": plain_twin(SummarizationSession, registry), "messages": plain_twin(SummarizationMessage, registry)}
+        with connection.schema_editor() as editor:
+            for twin in twins.values():
+                editor.create_model(twin)
+        user = get_user_model().objects.create_user("bench-compression@example.invalid", None)
+        try:
+            document = Document.objects.create(user=user, file="documents/bench.txt")
+            session = SummarizationSession.objects.create(user=user, document=document, title="Bench", summary_text="")
+            builders = {
+                "summaries": (SummarizationSession, "summary_text", {"user": user, "document": document, "title": "Bench"}),
+                "messages": (SummarizationMessage, "content", {"session": session, "role": "assistant"}),
+            }
+            self.stdout.write(f"\n{'kind':<10}{'column':<12}{'rows':>6}{'stored_kb':>11}{'write_us':>10}{'read_us':>9}")
+            for kind, (model, field, fields) in builders.items():
+                texts = [text for text in samples[kind] if text]
+                texts = (texts * (rows // max(1, len(texts)) + 1))[:rows]
+                if not texts:
+                    continue
+                plain_fields = {
+                    model._meta.get_field(name).attname: getattr(value, "pk", value) for name, value in fields.items()
+                }
+                for label, table_model, extra in (("compressed", model, fields), ("plain", twins[kind], plain_fields)):
+                    written, write_time = [], 0.0
+                    for text in texts:
+                        started = time.perf_counter()
+                        written += table_model.objects.bulk_create([table_model(**extra, **{field: text})])
+                        write_time += time.perf_counter() - started
+                    started = time.perf_counter()
+                    for row in written:
+                        getattr(table_model.objects.get(pk=row.pk), field)
+                    read_time = time.perf_counter() - started
+                    stored = stored_bytes(table_model, field, [row.pk for row in written])
+                    self.stdout.write(
+                        f"{kind:<10}{label:<12}{len(texts):>6}{stored / 1024:>11.1f}"
+                        f"{write_time / len(texts) * 1e6:>10.1f}{read_time / len(texts) * 1e6:>9.1f}"
+                    )
+        finally:
+            user.delete()
+            with connection.schema_editor() as editor:
+                for twin in twins.values():
+                    editor.delete_model(twin)
+
+
+def plain_twin(model, registry):
+    """An unregistered copy of `model`'s table with CompressedTextFields as TextFields and relations as plain ids."""
+    attrs = {
+        "__module__": __name__,
+        "Meta": type("Meta", (), {"app_label": "bench", "apps": registry, "db_table": f"bench_plain_{model._meta.db_table}"}),
+    }
+    for field in model._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        if isinstance(field, CompressedTextField):
+            attrs[field.name] = models.TextField()
+        elif field.is_relation:
+            attrs[field.attname] = models.BigIntegerField()
+        else:
+            attrs[field.name] = field.clone()
+    return type(f"Plain{model.__name__}", (models.Model,), attrs)
+
+
+def stored_bytes(model, field, pks):
+    """Bytes the column holds for `pks`, as the database counts them."""
+    column = model._meta.get_field(field).column
+    size = "octet_length(%s)" if connection.vendor == "postgresql" else "length(CAST(%s AS BLOB))"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(SUM({size % column}), 0) FROM {model._meta.db_table} "
+            f"WHERE id IN ({', '.join(['%s'] * len(pks))})",
+            pks,
+        )
+        return cursor.fetchone()[0]
+
+
+def zlib_codec(dictionary):
+    def compress(data):
+        compressor = zlib.compressobj(level=6, zdict=dictionary) if dictionary else zlib.compressobj(level=6)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(blob):
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return decompressor.decompress(blob) + decompressor.flush()
+
+    return compress, decompress
+
+
+def zstd_codec(dictionary):
+    zstd_dict = zstandard.ZstdCompressionDict(dictionary)
+    compressor = zstandard.ZstdCompressor(level=6, dict_data=zstd_dict)
+    decompressor = zstandard.ZstdDecompressor(dict_data=zstd_dict)
+    return compressor.compress, decompressor.decompress
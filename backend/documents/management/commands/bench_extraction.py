@@ -0,0 +1,308 @@
+import csv
+import json
+import os
+import random
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.views import extract_text, iter_extract_text
+
+
+FORMATS = ["txt", "csv", "json", "html", "xml", "docx", "pdf"]
+DEFAULT_SIZES = "1KB,100KB,1MB,10MB,100MB"
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+# Bump when a generator changes, so cached corpus files are rebuilt
+CORPUS_VERSION = 1
+
+
+def parse_size(value):
+    value = value.strip().upper()
+    for unit, factor in UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * factor)
+    return int(value)
+
+
+def format_size(size):
+    for unit in ("MB", "KB"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+# ===========================================================
+# 🏭 CORPUS
+# ===========================================================
+class Words:
+    """Deterministic pseudo-English: the same seed always gives the same text."""
+    SYLLABLES = ["ta", "re", "mon", "qui", "ber", "lo", "sen", "dra", "vi", "cal", "pho", "nut", "gre", "sil"]
+
+    def __init__(self, seed=42):
+        rng = random.Random(seed)
+        self.vocabulary = [
+            "".join(rng.choice(self.SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(4000)
+        ] + ["the", "and", "of", "to", "payment", "agreement", "deadline", "policy"]
+        self.rng = rng
+
+    def sentence(self, words=12):
+        return " ".join(self.rng.choices(self.vocabulary, k=words)).capitalize() + "."
+
+    def line(self, chars):
+        text = ""
+        while len(text) < chars:
+            text += self.sentence() + " "
+        return text[:chars].strip()
+
+
+def generate_txt(target, words):
+    out = StringIO()
+    while out.tell() < target:
+        out.write(" ".join(words.sentence() for _ in range(6)) + "\n\n")
+    return out.getvalue()[:target].encode("utf-8")
+
+
+def generate_csv(target, words):
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["id", "name", "amount", "due", "notes"])
+    row = 0
+    while out.tell() < target:
+        row += 1
+        writer.writerow([row, words.line(16), f"{words.rng.uniform(1, 10000):.2f}", "2024-03-01", words.sentence(8)])
+    return out.getvalue().encode("utf-8")
+
+
+def generate_json(target, words):
+    records, size = [], 0
+    while size < target:
+        record = {"id": len(records), "title": words.line(30), "tags": words.line(20).split(), "body": words.sentence(25)}
+        records.append(record)
+        size += len(json.dumps(record)) + 2
+    return json.dumps(records).encode("utf-8")
+
+
+def generate_markup(target, words, xml):
+    parts = ['<?xml version="1.0"?><records>' if xml else "<html><head><title>Report</title></head><body>"]
+    size = len(parts[0])
+    while size < target:
+        if xml:
+            part = f'<record id="{len(parts)}"><title>{words.line(30)}</title><body>{words.sentence(20)}</body></record>'
+        else:
+            part = f"<h2>{words.line(30)}</h2><p>{words.sentence(20)} <b>{words.line(12)}</b></p>"
+        parts.append(part)
+        size += len(part)
+    parts.append("</records>" if xml else "</body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def generate_docx(target, words):
+    import docx
+
+    def build(paragraphs):
+        document = docx.Document()
+        for _ in range(paragraphs):
+            document.add_paragraph(words.sentence(20))
+        buffer = BytesIO()
+        document.save(buffer)
+        return buffer.getvalue()
+
+    # An empty document is ~36KB (styles, theme); estimate paragraphs from a sample
+    empty, sample = len(build(0)), build(500)
+    per_paragraph = max(1.0, (len(sample) - empty) / 500)
+    return build(max(1, int((target - empty) / per_paragraph)))
+
+
+def generate_pdf(target, words):
+    """A plain-text PDF (Helvetica, uncompressed content streams) written by hand."""
+    pages, size = [], 0
+    while size < target or not pages:
+        lines = [words.line(90) for _ in range(50)]
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        pages.append(stream.encode("latin-1"))
+        size += len(stream) + 200
+
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for index, stream in enumerate(pages):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        kids.append(f"{page_id} 0 R")
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {content_id} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> >> >>"
+        ).encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = out.tell()
+        out.write(b"%d 0 obj\n" % object_id + objects[object_id] + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for object_id in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[object_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+GENERATORS = {
+    "txt": generate_txt,
+    "csv": generate_csv,
+    "json": generate_json,
+    "html": lambda target, words: generate_markup(target, words, xml=False),
+    "xml": lambda target, words: generate_markup(target, words, xml=True),
+    "docx": generate_docx,
+    "pdf": generate_pdf,
+}
+
+
+def corpus_file(corpus_dir, fmt, size):
+    """Path of the generated file for (fmt, size), generating it on first use."""
+    path = os.path.join(corpus_dir, f"v{CORPUS_VERSION}-{format_size(size)}.{fmt}")
+    if not os.path.exists(path):
+        os.makedirs(corpus_dir, exist_ok=True)
+        data = GENERATORS[fmt](size, Words(seed=size))
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(data)
+        os.replace(f"{path}.tmp", path)
+    return path
+
+
+# ===========================================================
+# ⏱️ MEASUREMENTS
+# ===========================================================
+def measure(path, min_time, max_repeat):
+    with open(path, "rb") as f:
+        data = f.read()
+    name = os.path.basename(path)
+    # extract_text prints a debug line per call
+    with redirect_stdout(StringIO()):
+        return _measure(data, name, min_time, max_repeat)
+
+
+def _measure(data, name, min_time, max_repeat):
+
+    # Time to first character: until iter_extract_text yields its first non-blank piece
+    started = time.perf_counter()
+    first_char = None
+    for piece in iter_extract_text(BytesIO(data), name):
+        if piece.strip():
+            first_char = time.perf_counter() - started
+            break
+
+    # Throughput: best of as many runs as fit in min_time (at least one)
+    timings, text = [], ""
+    while not timings or (sum(timings) < min_time and len(timings) < max_repeat):
+        started = time.perf_counter()
+        text = extract_text(BytesIO(data), name)
+        timings.append(time.perf_counter() - started)
+    if text.startswith(" "):
+        raise CommandError(f"Extraction failed for {name}:{text}")
+
+    # Peak memory in a separate run: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        extract_text(BytesIO(data), name)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "bytes": len(data),
+        "chars": len(text),
+        "seconds": round(best, 6),
+        "mb_per_s": round(len(data) / UNITS["MB"] / best, 3),
+        "first_char_ms": round(first_char * 1000, 3) if first_char is not None else None,
+        "peak_mb": round(peak / UNITS["MB"], 3),
+        "peak_ratio": round(peak / len(data), 2),
+    }
+
+
+def regressions(result, baseline, threshold):
+    """Human-readable reasons `result` is more than `threshold` worse than `baseline`."""
+    problems = []
+    if result["mb_per_s"] < baseline["mb_per_s"] * (1 - threshold):
+        problems.append(f"throughput {baseline['mb_per_s']} -> {result['mb_per_s']} MB/s")
+    if result["peak_mb"] > baseline["peak_mb"] * (1 + threshold) + 0.1:
+        problems.append(f"peak memory {baseline['peak_mb']} -> {result['peak_mb']} MB")
+    if (
+        result["first_char_ms"] is not None and baseline.get("first_char_ms") is not None
+        and result["first_char_ms"] > baseline["first_char_ms"] * (1 + threshold) + 1
+    ):
+        problems.append(f"first character {baseline['first_char_ms']} -> {result['first_char_ms']} ms")
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark extract_text over a generated PDF/DOCX/CSV/JSON/HTML/XML/TXT corpus: "
+        "throughput, peak memory and time to first character per format and size. "
+        "Compares against a stored baseline and fails on regressions beyond --threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--formats", default=",".join(FORMATS))
+        parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated, e.g. 1KB,1MB,100MB.")
+        parser.add_argument("--corpus-dir", default=os.path.join(settings.BASE_DIR, ".bench_corpus"),
+                            help="Generated files are cached here between runs.")
+        parser.add_argument("--baseline", default=os.path.join(settings.BASE_DIR, "benchmarks", "extraction_baseline.json"))
+        parser.add_argument("--save-baseline", action="store_true", help="Write this run's results as the baseline.")
+        parser.add_argument("--threshold", type=float, default=0.25, help="Allowed fractional regression (0.25 = 25%%).")
+        parser.add_argument("--min-time", type=float, default=0.5, help="Seconds of repeated runs per case.")
+        parser.add_argument("--max-repeat", type=int, default=20)
+        parser.add_argument("--max-case-seconds", type=float, default=300,
+                            help="Skip sizes whose run time, extrapolated from the previous size, would exceed this.")
+        parser.add_argument("--json", dest="json_out", help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        formats = [fmt.strip().lower() for fmt in options["formats"].split(",") if fmt.strip()]
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise CommandError(f"Unknown formats: {', '.join(sorted(unknown))}")
+        sizes = [parse_size(size) for size in options["sizes"].split(",") if size.strip()]
+
+        baseline = {}
+        if os.path.exists(options["baseline"]) and not options["save_baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)["results"]
+
+        self.stdout.write(f"{'case':<14}{'file_kb':>10}{'MB/s':>9}{'first_ms':>10}{'peak_mb':>9}{'peak/in':>9}  vs baseline")
+        results, failures = {}, []
+        for fmt in formats:
+            previous = None
+            for size in sorted(sizes):
+                key = f"{fmt}-{format_size(size)}"
+                if previous and previous["seconds"] * size / previous["bytes"] > options["max_case_seconds"]:
+                    # e.g. pdfminer runs at tens of KB/s: 100MB of PDF would take hours
+                    self.stdout.write(f"{key:<14}  skipped (estimated over {options['max_case_seconds']:.0f}s)")
+                    continue
+                path = corpus_file(options["corpus_dir"], fmt, size)
+                result = previous = results[key] = measure(path, options["min_time"], options["max_repeat"])
+                problems = regressions(result, baseline[key], options["threshold"]) if key in baseline else []
+                failures.extend(f"{key}: {problem}" for problem in problems)
+                first = f"{result['first_char_ms']:.1f}" if result["first_char_ms"] is not None else "-"
+                verdict = "REGRESSED" if problems else ("ok" if key in baseline else "new")
+                self.stdout.write(
+                    f"{key:<14}{result['bytes'] / 1024:>10.1f}{result['mb_per_s']:>9.2f}{first:>10}"
+                    f"{result['peak_mb']:>9.2f}{result['peak_ratio']:>9.2f}  {verdict}"
+                )
+
+        report = {"corpus_version": CORPUS_VERSION, "results": results}
+        if options["json_out"]:
+            with open(options["json_out"], "w") as f:
+                json.dump(report, f, indent=2)
+        if options["save_baseline"]:
+            os.makedirs(os.path.dirname(options["baseline"]) or ".", exist_ok=True)
+            with open(options["baseline"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+        if failures:
+            raise CommandError("Extraction regressions beyond threshold:\n  " + "\n  ".join(failures))
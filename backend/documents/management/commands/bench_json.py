@@ -0,0 +1,101 @@
+import random
+import time
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from backend.renderers import ORJSONParser, ORJSONRenderer, orjson
+from documents.management.commands.bench_compression import SAMPLE_SUMMARY
+
+
+def session_row(i, now):
+    return {
+        "id": i,
+        "title": f'Summary of "Quarterly report {i} – draft.pdf"',
+        "created_at": (now - timedelta(minutes=i)).isoformat().replace("+00:00", "Z"),
+        "document": 1000 + i,
+        "document_name": f"Quarterly report {i} – draft.pdf",
+        "message_count": random.randint(0, 40),
+    }
+
+
+def message_row(i, session_id, now):
+    role = "user" if i % 2 == 0 else "assistant"
+    content = "What does clause 4.2 say about late payment?" if role == "user" else SAMPLE_SUMMARY[:600]
+    return {
+        "id": i,
+        "session": session_id,
+        "role": role,
+        "content": content,
+        "created_at": (now + timedelta(seconds=i)).isoformat().replace("+00:00", "Z"),
+    }
+
+
+def make_payloads():
+    """Shapes of the list, detail and search responses at realistic sizes."""
+    now = timezone.now()
+    list_page = {"next": "https://api.example.com/documents/summaries/?cursor=cD0yMDI1", "previous": None,
+                 "results": [session_row(i, now) for i in range(100)]}
+    detail = dict(session_row(1, now), user=7, summary_text=SAMPLE_SUMMARY * 12)
+    detail["messages"] = {"next": None, "previous": None, "results": [message_row(i, 1, now) for i in range(50)]}
+    search = {"count": 240, "next": "https://api.example.com/documents/search/?page=2&q=payment", "previous": None,
+              "results": [{"id": i, "kind": "summary", "object_id": i, "document_id": i, "session_id": i,
+                           "title": f"Summary {i}", "updated_at": now - timedelta(hours=i), "rank": 0.61 / (i + 1),
+                           "snippet": "late <mark>payment</mark> incurs a penalty of two percent…"}
+                          for i in range(20)]}
+    return {"list (100 sessions)": list_page, "detail (+50 messages)": detail, "search (20 hits)": search}
+
+
+def make_request_bodies():
+    """What clients actually POST: the parser only ever sees request bodies."""
+    return {
+        "summarize (20 ids)": {"files": list(range(1000, 1020))},
+        "chat question": {"query": "What does clause 4.2 say about late payment and the penalties? " * 4},
+        "response echo": make_payloads()["list (100 sessions)"],
+    }
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark DRF's JSONRenderer/JSONParser against the orjson-backed ones on API-shaped payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=1.0, help="Time budget per measurement.")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed: pip install orjson")
+        random.seed(0)
+        self.stdout.write(f"{'payload':<24}{'op':<8}{'kb':>7}{'stock/s':>10}{'orjson/s':>10}{'speedup':>9}{'same':>6}")
+        for name, payload in make_payloads().items():
+            stock = JSONRenderer().render(payload)
+            fast = ORJSONRenderer().render(payload)
+            same = "yes" if stock == fast else "NO"
+
+            stock_rate = self.rate(lambda: JSONRenderer().render(payload), options["seconds"])
+            fast_rate = self.rate(lambda: ORJSONRenderer().render(payload), options["seconds"])
+            self.report(name, "render", len(stock), stock_rate, fast_rate, same)
+
+        for name, payload in make_request_bodies().items():
+            body = JSONRenderer().render(payload)
+            same = "yes" if JSONParser().parse(BytesIO(body)) == ORJSONParser().parse(BytesIO(body)) else "NO"
+            stock_rate = self.rate(lambda: JSONParser().parse(BytesIO(body)), options["seconds"])
+            fast_rate = self.rate(lambda: ORJSONParser().parse(BytesIO(body)), options["seconds"])
+            self.report(name, "parse", len(body), stock_rate, fast_rate, same)
+
+    def rate(self, fn, seconds):
+        count, started = 0, time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            fn()
+            count += 1
+        return count / (time.perf_counter() - started)
+
+    def report(self, name, op, size, stock_rate, fast_rate, same):
+        self.stdout.write(
+            f"{name:<24}{op:<8}{size / 1024:>7.1f}{stock_rate:>10.0f}{fast_rate:>10.0f}"
+            f"{fast_rate / stock_rate:>8.1f}x{same:>6}"
+        )
@@ -0,0 +1,81 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.tts import get_backend, iter_synthesize, split_narration, synthesize
+
+
+WORDS = (
+    "the contract requires payment within thirty days of delivery and any late "
+    "payment incurs a penalty of two percent per month on the outstanding amount"
+).split()
+
+
+def make_narration(chars):
+    sentences, length = [], 0
+    while length < chars:
+        sentence = " ".join(random.choice(WORDS) for _ in range(random.randint(8, 20))).capitalize() + "."
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark TTS wall time against narration length: sequential vs sentence-parallel, "
+        "time to first audio segment and throughput, for one or more backends."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lengths", default="500,2000,5000,10000",
+                            help="Comma-separated narration lengths in characters.")
+        parser.add_argument("--backends", default=getattr(settings, "TTS_BACKEND", "gtts"),
+                            help="Comma-separated backends to compare, e.g. gtts,espeak,piper.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Parallel segments (default: the backend's own limit).")
+        parser.add_argument("--lang", default="en")
+        parser.add_argument("--repeat", type=int, default=1)
+        parser.add_argument("--fake", action="store_true",
+                            help="Use the offline TTS stand-in (FAKE_BACKEND_LATENCY per segment).")
+
+    def handle(self, *args, **options):
+        names = ["fake"] if options["fake"] else options["backends"].split(",")
+        lengths = [int(n) for n in options["lengths"].split(",")]
+        narrations = {chars: make_narration(chars) for chars in lengths}
+
+        self.stdout.write(
+            f"{'backend':<8}{'chars':>8}{'segments':>10}{'sequential_s':>14}{'parallel_s':>12}"
+            f"{'speedup':>9}{'first_s':>9}{'chars/s':>9}{'mp3_kb':>9}"
+        )
+        for name in names:
+            try:
+                self.bench_backend(name, lengths, narrations, options)
+            except RuntimeError as e:
+                raise CommandError(f"{name}: {e}")
+
+    def bench_backend(self, name, lengths, narrations, options):
+        backend = get_backend(options["lang"], name=name)
+        for chars in lengths:
+            narration = narrations[chars]
+            sequential, parallel, first = [], [], []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                synthesize(narration, options["lang"], max_workers=1, backend=backend)
+                sequential.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                parts = []
+                for audio in iter_synthesize(narration, options["lang"], options["workers"], backend):
+                    if not parts:
+                        first.append(time.perf_counter() - started)
+                    parts.append(audio)
+                parallel.append(time.perf_counter() - started)
+
+            seq, par = min(sequential), min(parallel)
+            self.stdout.write(
+                f"{name:<8}{chars:>8}{len(split_narration(narration)):>10}{seq:>14.2f}{par:>12.2f}"
+                f"{seq / par:>8.1f}x{min(first):>9.2f}{chars / par:>9.0f}"
+                f"{sum(len(p) for p in parts) / 1024:>9.0f}"
+            )
@@ -0,0 +1,115 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from documents.models import Document, SummarizationMessage, SummarizationSession
+from users.models import OneTimePassword, User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset (rolled back afterwards) and print EXPLAIN plans "
+        "for the hot queries behind upload, summarize, list, chat, audio, signup and verify."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000,
+                            help="Rows per large table (sessions, messages, OTPs).")
+        parser.add_argument("--analyze", action="store_true", help="Use EXPLAIN ANALYZE (PostgreSQL).")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                target = self.seed(options["rows"])
+                self.explain_all(target, options["analyze"])
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS("\nSeed data rolled back."))
+
+    def seed(self, rows):
+        batch = 5000
+        now = timezone.now()
+        user_count = max(1, rows // 100)
+        self.stdout.write(f"Seeding {user_count} users, {rows // 10} documents, {rows} sessions/messages/OTPs...")
+
+        users = User.objects.bulk_create(
+            [User(email=f"explain{i}@example.com", full_name=f"User {i}", password="!") for i in range(user_count)],
+            batch_size=batch,
+        )
+        Token.objects.bulk_create([Token(key=f"{i:040d}", user=u) for i, u in enumerate(users)], batch_size=batch)
+        documents = Document.objects.bulk_create(
+            [Document(user=users[i % user_count], file=f"documents/file{i}.pdf") for i in range(rows // 10)],
+            batch_size=batch,
+        )
+        sessions = SummarizationSession.objects.bulk_create(
+            [
+                SummarizationSession(
+                    user=documents[i % len(documents)].user,
+                    document=documents[i % len(documents)],
+                    title=f"Summary {i}",
+                    summary_text="Lorem ipsum " * 20,
+                )
+                for i in range(rows)
+            ],
+            batch_size=batch,
+        )
+        SummarizationMessage.objects.bulk_create(
+            [SummarizationMessage(session=sessions[i % len(sessions)], role="user", content=f"q{i}") for i in range(rows)],
+            batch_size=batch,
+        )
+        OneTimePassword.objects.bulk_create(
+            [
+                OneTimePassword(
+                    user=users[i % user_count],
+                    code=f"{random.randint(100000, 999999)}",
+                    expires_at=now + timedelta(minutes=10),
+                    is_used=i % 3 != 0,
+                )
+                for i in range(rows)
+            ],
+            batch_size=batch,
+        )
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (User, Token, Document, SummarizationSession, SummarizationMessage, OneTimePassword):
+                    cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+        user = users[len(users) // 2]
+        return {
+            "user": user,
+            "session": SummarizationSession.objects.filter(user=user).first(),
+            "documents": list(Document.objects.filter(user=user).values_list("id", flat=True)[:3]),
+            "token": Token.objects.get(user=user).key,
+        }
+
+    def explain_all(self, target, analyze):
+        user, session = target["user"], target["session"]
+        queries = {
+            "auth: token -> user": Token.objects.select_related("user").filter(key=target["token"]),
+            "summarize: documents by id for user": Document.objects.filter(id__in=target["documents"], user=user),
+            "list: session page with message counts": (
+                SummarizationSession.objects.filter(user=user)
+                .select_related("document").defer("summary_text")
+                .annotate(message_count=Count("messages")).order_by("-created_at")[:21]
+            ),
+            "detail/chat: session for user": SummarizationSession.objects.filter(id=session.id, user=user),
+            "detail: message page": SummarizationMessage.objects.filter(session=session).order_by("created_at")[:51],
+            "signup: email uniqueness": User.objects.filter(email=user.email),
+            "signup/resend: unused OTPs to invalidate": OneTimePassword.objects.filter(
+                user=user, purpose=OneTimePassword.PURPOSE_SIGNUP, is_used=False
+            ),
+            "verify: latest OTP for code": OneTimePassword.objects.filter(user=user, code="123456").order_by("-created_at")[:1],
+        }
+        for label, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label}"))
+            self.stdout.write(queryset.explain(analyze=analyze) if analyze else queryset.explain())
@@ -0,0 +1,51 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from documents.models import LLMCall
+from documents.telemetry import percentile
+
+
+class Command(BaseCommand):
+    help = "Report LLM latency percentiles and token spend per endpoint and per user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Look-back window in days (default 7).")
+        parser.add_argument("--by", choices=["endpoint", "user", "both"], default="both")
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options["days"])
+        calls = (
+            LLMCall.objects.filter(created_at__gte=since)
+            .select_related("user")
+            .only("endpoint", "user__email", "latency_ms", "time_to_first_token_ms",
+                  "prompt_tokens", "output_tokens", "cost_usd", "outcome", "retries")
+        )
+
+        groupings = ["endpoint", "user"] if options["by"] == "both" else [options["by"]]
+        for grouping in groupings:
+            groups = defaultdict(list)
+            for call in calls:
+                key = call.endpoint if grouping == "endpoint" else (call.user.email if call.user else "-")
+                groups[key].append(call)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nLLM calls by {grouping} (last {options['days']}d)"))
+            self._table(groups)
+
+    def _table(self, groups):
+        header = f"{'key':<32}{'calls':>7}{'err%':>7}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'ttft50':>9}" \
+                 f"{'in_tok':>11}{'out_tok':>11}{'retries':>9}{'cost$':>10}"
+        self.stdout.write(header)
+        for key, rows in sorted(groups.items(), key=lambda kv: -len(kv[1])):
+            latencies = [r.latency_ms for r in rows]
+            ttfts = [r.time_to_first_token_ms for r in rows if r.time_to_first_token_ms is not None]
+            errors = sum(1 for r in rows if r.outcome == LLMCall.OUTCOME_ERROR)
+            fmt = lambda v: "-" if v is None else f"{v:.0f}"
+            self.stdout.write(
+                f"{str(key)[:31]:<32}{len(rows):>7}{100 * errors / len(rows):>6.1f}%"
+                f"{fmt(percentile(latencies, 50)):>9}{fmt(percentile(latencies, 95)):>9}"
+                f"{fmt(percentile(latencies, 99)):>9}{fmt(percentile(ttfts, 50)):>9}"
+                f"{sum(r.prompt_tokens or 0 for r in rows):>11}{sum(r.output_tokens or 0 for r in rows):>11}"
+                f"{sum(r.retries for r in rows):>9}{sum(r.cost_usd for r in rows):>10.4f}"
+            )
@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from documents.telemetry import percentile
+from users.models import User
+
+
+WORDS = (
+    "contract payment invoice clause deadline party agreement term notice renewal "
+    "liability warranty delivery schedule penalty amount signature review policy"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive upload → summarize → chat → audio against a running server at a fixed "
+        "concurrency and report throughput, latency percentiles and error rates. "
+        "Run the server with FAKE_BACKENDS=True to avoid spending real quota."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000/")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--flows", type=int, default=20, help="Total upload→audio flows to run.")
+        parser.add_argument("--file-kb", type=int, default=20, help="Size of each generated .txt upload.")
+        parser.add_argument("--chats", type=int, default=2, help="Chat questions per flow.")
+        parser.add_argument("--no-audio", action="store_true")
+        parser.add_argument("--email", default="loadtest@example.com",
+                            help="Account used for the run; created if missing.")
+
+    def handle(self, *args, **options):
+        self.base_url = options["base_url"].rstrip("/") + "/"
+        self.options = options
+        self.samples = defaultdict(list)  # endpoint -> [(latency_s, ok)]
+        self.lock = threading.Lock()
+
+        user, created = User.objects.get_or_create(
+            email=options["email"], defaults={"full_name": "Load Test", "is_active": True}
+        )
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=["password"])
+        token, _ = Token.objects.get_or_create(user=user)
+        self.headers = {"Authorization": f"Token {token.key}"}
+
+        try:
+            requests.get(self.base_url, timeout=5)
+        except requests.RequestException as e:
+            raise CommandError(f"Server not reachable at {self.base_url}: {e}")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(self.run_flow, range(options["flows"])))
+        elapsed = time.perf_counter() - started
+        self.report(elapsed)
+
+    # --- one user journey ---
+    def run_flow(self, index):
+        http = requests.Session()
+        http.headers.update(self.headers)
+
+        size = self.options["file_kb"] * 1024
+        body = []
+        while sum(len(w) + 1 for w in body) < size:
+            body.append(random.choice(WORDS))
+        files = {"file": (f"loadtest_{index}.txt", " ".join(body).encode(), "text/plain")}
+        ok, data = self.call(http, "upload", "post", "documents/upload/", files=files)
+        if not ok:
+            return
+
+        ok, data = self.call(http, "summarize", "post", "documents/summarize/", json={"files": [data["id"]]})
+        if not ok:
+            return
+        session_id = data["session_id"]
+
+        for i in range(self.options["chats"]):
+            self.call(http, "chat", "post", f"documents/summaries/{session_id}/chat/",
+                      json={"query": f"What does the document say about {random.choice(WORDS)}? ({index}.{i})"})
+
+        self.call(http, "list", "get", "documents/summaries/")
+        if not self.options["no_audio"]:
+            self.call(http, "audio", "post", f"documents/summaries/{session_id}/audio/", json={"language": "en"})
+
+    def call(self, http, endpoint, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = getattr(http, method)(self.base_url + path, timeout=300, **kwargs)
+            ok = response.status_code < 400
+            data = response.json() if ok else None
+        except (requests.RequestException, ValueError):
+            ok, data = False, None
+        with self.lock:
+            self.samples[endpoint].append((time.perf_counter() - started, ok))
+        return ok, data
+
+    # --- reporting ---
+    def report(self, elapsed):
+        total = sum(len(v) for v in self.samples.values())
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.2f} req/s) "
+            f"at concurrency {self.options['concurrency']}"
+        ))
+        self.stdout.write(f"{'endpoint':<12}{'count':>7}{'req/s':>8}{'err%':>7}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'maxms':>9}")
+        for endpoint in ["upload", "summarize", "chat", "list", "audio"]:
+            rows = self.samples.get(endpoint)
+            if not rows:
+                continue
+            latencies = [latency * 1000 for latency, _ in rows]
+            errors = sum(1 for _, ok in rows if not ok)
+            self.stdout.write(
+                f"{endpoint:<12}{len(rows):>7}{len(rows) / elapsed:>8.2f}{100 * errors / len(rows):>6.1f}%"
+                f"{percentile(latencies, 50):>9.0f}{percentile(latencies, 95):>9.0f}"
+                f"{percentile(latencies, 99):>9.0f}{max(latencies):>9.0f}"
+            )
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from documents.models import SummaryFlight
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete SummaryFlight rows untouched for SUMMARY_FLIGHT_RETENTION_HOURS. Finished rows are only "
+        "shared for SUMMARY_FLIGHT_RESULT_TTL seconds and pending ones that old have lost their leader."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.SUMMARY_FLIGHT_RETENTION_HOURS,
+                            help="Keep rows updated within this many hours.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        stale = SummaryFlight.objects.filter(updated_at__lt=cutoff)
+        if options["dry_run"]:
+            self.stdout.write(f"Would delete {stale.count()} summary flights.")
+            return
+
+        deleted = 0
+        while True:
+            ids = list(stale.values_list("id", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            deleted += SummaryFlight.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} summary flights."))
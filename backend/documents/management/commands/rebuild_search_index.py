@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from documents.models import Document, SummarizationMessage, SummarizationSession
+from documents.search import clear_index, document_entry, message_entry, save_entries, session_entry
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search entries for all documents, summaries and messages from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        # Start empty: also drops SQLite index rows that replaced entries left behind
+        clear_index()
+        sources = {
+            "documents": (
+                Document.objects.exclude(user=None).order_by("pk"),
+                lambda doc: document_entry(doc) if doc.extracted_text else None,
+            ),
+            "summaries": (SummarizationSession.objects.order_by("pk"), session_entry),
+            "messages": (
+                SummarizationMessage.objects.select_related("session").only(
+                    "id", "content", "session__id", "session__user_id", "session__title"
+                ).order_by("pk"),
+                lambda message: message_entry(message, message.session),
+            ),
+        }
+        for label, (queryset, build) in sources.items():
+            indexed, batch = 0, []
+            for obj in queryset.iterator(chunk_size=batch_size):
+                entry = build(obj)
+                if entry is None:
+                    continue
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    save_entries(batch, batch_size, replace=False)
+                    indexed += len(batch)
+                    batch = []
+            if batch:
+                save_entries(batch, batch_size, replace=False)
+                indexed += len(batch)
+            self.stdout.write(f"Indexed {indexed} {label}.")
@@ -0,0 +1,101 @@
+import logging
+import signal
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from documents.jobs import claim_job, requeue_expired
+from documents.models import Document, SummarizeJob
+from documents.views import SummarizeError, summarize_failure, summarize_for_user
+
+logger = logging.getLogger(__name__)
+
+
+def run_job(job, lease):
+    """Runs one claimed job through the same pipeline as the synchronous endpoint."""
+    running = SummarizeJob.objects.filter(id=job.id, status=SummarizeJob.STATUS_RUNNING)
+
+    def progress(stage, percent):
+        # Every progress report also renews the lease
+        running.update(stage=stage, progress=percent, lease_expires_at=timezone.now() + timedelta(seconds=lease))
+
+    try:
+        docs = list(Document.objects.filter(id__in=job.document_ids, user_id=job.user_id).order_by("id"))
+        if not docs:
+            raise SummarizeError("No documents found for this user.", status=404)
+        # Not tied to a request, so it can wait out a duplicate for longer (within its own lease)
+        session, shared = summarize_for_user(job.user, docs, progress, wait=lease / 2)
+    except Exception as e:
+        message, error_status = summarize_failure(e)
+        logger.error("Summarize job %s failed: %s", job.id, message)
+        running.update(
+            status=SummarizeJob.STATUS_FAILED, stage="failed", error=message, error_status=error_status,
+            finished_at=timezone.now(), lease_expires_at=None,
+        )
+        return False
+    running.update(
+        status=SummarizeJob.STATUS_DONE, stage="done", progress=100, session=session, coalesced=shared,
+        finished_at=timezone.now(), lease_expires_at=None,
+    )
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued SummarizeJob rows (POST /documents/summarize/ with \"async\": true), "
+        "several at a time, scheduling fairly across users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run everything queued, then exit.")
+        parser.add_argument("--concurrency", type=int, default=settings.SUMMARIZE_WORKER_CONCURRENCY)
+        parser.add_argument("--interval", type=float, default=settings.SUMMARIZE_WORKER_POLL_INTERVAL,
+                            help="Seconds to sleep when nothing is queued.")
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            # Finish the jobs in hand on deploy/restart; anything cut off is requeued by its lease
+            signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+
+        if options["concurrency"] <= 1 or options["once"]:
+            self.loop(options)
+            return
+        threads = [
+            threading.Thread(target=self.thread_loop, args=(options,), name=f"summarize-{i}", daemon=True)
+            for i in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(1)
+        except KeyboardInterrupt:
+            self.stop.set()
+
+    def thread_loop(self, options):
+        # Each thread has its own database connection
+        try:
+            self.loop(options, between_jobs=close_old_connections)
+        finally:
+            connection.close()
+
+    def loop(self, options, between_jobs=None):
+        lease = settings.SUMMARIZE_JOB_LEASE
+        while not self.stop.is_set():
+            if between_jobs:
+                between_jobs()
+            requeue_expired()
+            job = claim_job(lease)
+            if job is not None:
+                ok = run_job(job, lease)
+                self.stdout.write(f"Summarize job {job.id}: {'done' if ok else 'failed'}")
+                continue
+            if options["once"]:
+                break
+            self.stop.wait(options["interval"])
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_document_web_content_link'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=64)),
+                ('model', models.CharField(max_length=64)),
+                ('prompt_chars', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('output_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('time_to_first_token_ms', models.FloatField(blank=True, null=True)),
+                ('latency_ms', models.FloatField()),
+                ('retries', models.PositiveSmallIntegerField(default=0)),
+                ('outcome', models.CharField(choices=[('ok', 'OK'), ('empty', 'Empty'), ('error', 'Error')], max_length=10)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('cost_usd', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_document_content_hash_summaryflight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionAudio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=16)),
+                ('narration_hash', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('drive_file_id', models.CharField(blank=True, max_length=255)),
+                ('audio_url', models.URLField(blank=True, max_length=1024)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audio_files', to='documents.summarizationsession')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('session', 'language', 'narration_hash'), name='unique_session_audio')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0009_sessionaudio'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['user', '-uploaded_at'], name='document_user_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='summarizationmessage',
+            index=models.Index(fields=['session', 'created_at'], name='message_session_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='summarizationsession',
+            index=models.Index(fields=['user', '-created_at'], name='session_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+from django.db import migrations, models
+
+import documents.fields
+
+
+BATCH_SIZE = 500
+
+
+def copy_text(apps, source, target):
+    for model_name, field in (("SummarizationSession", "summary_text"), ("SummarizationMessage", "content")):
+        model = apps.get_model("documents", model_name)
+        queryset = model.objects.only("pk", f"{field}{source}").order_by("pk")
+        batch = []
+        for row in queryset.iterator(chunk_size=BATCH_SIZE):
+            setattr(row, f"{field}{target}", getattr(row, f"{field}{source}"))
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, [f"{field}{target}"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, [f"{field}{target}"])
+
+
+def compress_existing(apps, schema_editor):
+    copy_text(apps, source="", target="_z")
+
+
+def decompress_existing(apps, schema_editor):
+    copy_text(apps, source="_z", target="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0011_contentversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summarizationsession',
+            name='summary_text_z',
+            field=documents.fields.CompressedTextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='summarizationmessage',
+            name='content_z',
+            field=documents.fields.CompressedTextField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='summarizationsession',
+            name='summary_text',
+            field=models.TextField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='summarizationmessage',
+            name='content',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(compress_existing, decompress_existing),
+        migrations.RemoveField(
+            model_name='summarizationsession',
+            name='summary_text',
+        ),
+        migrations.RemoveField(
+            model_name='summarizationmessage',
+            name='content',
+        ),
+        migrations.RenameField(
+            model_name='summarizationsession',
+            old_name='summary_text_z',
+            new_name='summary_text',
+        ),
+        migrations.RenameField(
+            model_name='summarizationmessage',
+            old_name='content_z',
+            new_name='content',
+        ),
+        migrations.AlterField(
+            model_name='summarizationsession',
+            name='summary_text',
+            field=documents.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='summarizationmessage',
+            name='content',
+            field=documents.fields.CompressedTextField(),
+        ),
+    ]
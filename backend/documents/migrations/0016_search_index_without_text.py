@@ -0,0 +1,67 @@
+from django.db import migrations
+
+
+TABLE = "documents_searchentry"
+
+# The text stays (compressed) in its source rows; only the index is kept
+POSTGRES_FORWARD = [
+    f"ALTER TABLE {TABLE} DROP COLUMN search_vector",
+    f"ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector",
+    f"""
+    UPDATE {TABLE} SET search_vector =
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    """,
+    f"CREATE INDEX searchentry_vector_gin ON {TABLE} USING GIN (search_vector)",
+]
+
+
+def sqlite_forward(connection):
+    # contentless_delete (SQLite 3.43+) lets rows be removed by id; older
+    # versions leave replaced rows behind, which no longer join an entry
+    deletable = connection.Database.sqlite_version_info >= (3, 43, 0)
+    statements = [
+        f"DROP TRIGGER IF EXISTS {TABLE}_fts_insert",
+        f"DROP TRIGGER IF EXISTS {TABLE}_fts_delete",
+        f"DROP TRIGGER IF EXISTS {TABLE}_fts_update",
+        f"DROP TABLE IF EXISTS {TABLE}_fts",
+        f"""
+        CREATE VIRTUAL TABLE {TABLE}_fts USING fts5(
+            title, body, content='', tokenize='porter unicode61'{", contentless_delete=1" if deletable else ""}
+        )
+        """,
+        f"INSERT INTO {TABLE}_fts (rowid, title, body) SELECT id, title, body FROM {TABLE}",
+    ]
+    if deletable:
+        statements.append(f"""
+        CREATE TRIGGER {TABLE}_fts_delete AFTER DELETE ON {TABLE} BEGIN
+            DELETE FROM {TABLE}_fts WHERE rowid = old.id;
+        END
+        """)
+    return statements
+
+
+def forward(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {
+        "postgresql": lambda: POSTGRES_FORWARD,
+        "sqlite": lambda: sqlite_forward(connection),
+    }.get(connection.vendor, list)()
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0015_document_stats'),
+    ]
+
+    # Irreversible: the copied text is dropped; rebuild_search_index repopulates a restored index
+    operations = [
+        migrations.RunPython(forward),
+        migrations.RemoveField(
+            model_name='searchentry',
+            name='body',
+        ),
+    ]
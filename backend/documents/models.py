@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.db import models
 
+from .fields import CompressedTextField
+
 
 class Document(models.Model):
     user = models.ForeignKey(
@@ -17,8 +19,22 @@ class Document(models.Model):
     file_url = models.URLField(max_length=1024, null=True, blank=True)
     # This is the direct download link for the server
     web_content_link = models.URLField(max_length=1024, null=True, blank=True)
+    # SHA-256 of the uploaded bytes, used to recognise identical files
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Text extracted at upload time; feeds search and spares re-downloading
+    extracted_text = CompressedTextField(blank=True, default="")
+    # Computed at upload (documents.stats) so summarize can be estimated without opening the file
+    page_count = models.PositiveIntegerField(default=0)  # estimated from char_count for non-PDFs
+    char_count = models.PositiveIntegerField(default=0)
+    language = models.CharField(max_length=8, blank=True)
+    estimated_tokens = models.PositiveIntegerField(default=0)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-uploaded_at"], name="document_user_uploaded_idx"),
+        ]
+
     def __str__(self):
         return f"{self.file.name} uploaded by {self.user}"
 
@@ -28,7 +44,12 @@ class SummarizationSession(models.Model):
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="summaries")
     title = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
-    summary_text = models.TextField()
+    summary_text = CompressedTextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="session_user_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.user.username})"
@@ -37,8 +58,185 @@ class SummarizationSession(models.Model):
 class SummarizationMessage(models.Model):
     session = models.ForeignKey(SummarizationSession, on_delete=models.CASCADE, related_name="messages")
     role = models.CharField(max_length=10, choices=[("user", "User"), ("assistant", "Assistant")])
-    content = models.TextField()
+    content = CompressedTextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["session", "created_at"], name="message_session_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"[{self.role}] {self.content[:30]}"
+
+class LLMCall(models.Model):
+    OUTCOME_OK = "ok"
+    OUTCOME_EMPTY = "empty"
+    OUTCOME_ERROR = "error"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    endpoint = models.CharField(max_length=64)
+    model = models.CharField(max_length=64)
+    prompt_chars = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    output_tokens = models.PositiveIntegerField(null=True, blank=True)
+    # Milliseconds from request start to the first streamed chunk / to completion
+    time_to_first_token_ms = models.FloatField(null=True, blank=True)
+    latency_ms = models.FloatField()
+    retries = models.PositiveSmallIntegerField(default=0)
+    outcome = models.CharField(
+        max_length=10,
+        choices=[(OUTCOME_OK, "OK"), (OUTCOME_EMPTY, "Empty"), (OUTCOME_ERROR, "Error")],
+    )
+    error = models.CharField(max_length=255, blank=True)
+    cost_usd = models.FloatField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.endpoint} {self.model} {self.latency_ms:.0f}ms ({self.outcome})"
+
+
+class SummaryFlight(models.Model):
+    """
+    One row per in-flight (or just finished) summarize computation.
+    The unique `key` acts as a cross-worker lock: whoever inserts it runs
+    the pipeline, everyone else waits for `session` to be filled in.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    key = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    session = models.ForeignKey(SummarizationSession, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=[(STATUS_PENDING, "Pending"), (STATUS_DONE, "Done"), (STATUS_FAILED, "Failed")],
+        default=STATUS_PENDING,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"SummaryFlight({self.key[:12]}, {self.status})"
+
+
+class SessionAudio(models.Model):
+    """
+    Generated narration audio for a session, keyed by language and a hash of
+    the narration text so it is only synthesised and uploaded once.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    session = models.ForeignKey(SummarizationSession, on_delete=models.CASCADE, related_name="audio_files")
+    language = models.CharField(max_length=16)
+    narration_hash = models.CharField(max_length=64)
+    status = models.CharField(
+        max_length=10,
+        choices=[(STATUS_PENDING, "Pending"), (STATUS_DONE, "Done"), (STATUS_FAILED, "Failed")],
+        default=STATUS_PENDING,
+    )
+    drive_file_id = models.CharField(max_length=255, blank=True)
+    audio_url = models.URLField(max_length=1024, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["session", "language", "narration_hash"], name="unique_session_audio"),
+        ]
+
+    def __str__(self):
+        return f"Audio({self.session_id}, {self.language}, {self.status})"
+
+
+class ContentVersion(models.Model):
+    """
+    Per-user counter bumped on every session or message write. List and
+    detail responses derive their ETag/Last-Modified from it, so unchanged
+    polls can be answered without loading or serializing anything.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ContentVersion({self.user_id}, v{self.version})"
+
+
+class SearchEntry(models.Model):
+    """
+    Full-text entry per document, summary or chat message. The text itself
+    is not copied here: migration 0016 adds the engine-specific index, a
+    `search_vector` tsvector column with a GIN index on PostgreSQL or a
+    contentless FTS5 table keyed by id on SQLite, and documents.search
+    writes it from the source text and reads snippets from the source rows.
+    """
+    KIND_DOCUMENT = "document"
+    KIND_SUMMARY = "summary"
+    KIND_MESSAGE = "message"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    kind = models.CharField(
+        max_length=10,
+        choices=[(KIND_DOCUMENT, "Document"), (KIND_SUMMARY, "Summary"), (KIND_MESSAGE, "Message")],
+    )
+    object_id = models.PositiveBigIntegerField()
+    # Deleting a document or session removes its entries with it
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, null=True, blank=True)
+    session = models.ForeignKey(SummarizationSession, on_delete=models.CASCADE, null=True, blank=True)
+    title = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="unique_search_entry"),
+        ]
+
+    def __str__(self):
+        return f"SearchEntry({self.kind}, {self.object_id})"
+
+
+class SummarizeJob(models.Model):
+    """
+    A summarize request queued for the `summarize_worker` process, so long
+    jobs aren't cut off by the HTTP request timeout. Clients poll the job
+    (or follow its event stream) for progress and the resulting session.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="summarize_jobs")
+    document_ids = models.JSONField()
+    status = models.CharField(
+        max_length=10,
+        choices=[(STATUS_QUEUED, "Queued"), (STATUS_RUNNING, "Running"), (STATUS_DONE, "Done"), (STATUS_FAILED, "Failed")],
+        default=STATUS_QUEUED,
+    )
+    stage = models.CharField(max_length=32, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    session = models.ForeignKey(SummarizationSession, on_delete=models.SET_NULL, null=True, blank=True)
+    coalesced = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    error_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # A running job whose lease has run out belonged to a crashed worker
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # worker: queued jobs in arrival order, running jobs by lease
+            models.Index(fields=["status", "created_at"], name="summarize_job_status_idx"),
+            # backpressure: a user's active jobs
+            models.Index(fields=["user", "status"], name="summarize_job_user_status_idx"),
+        ]
 
     def __str__(self):
-        return f"[{self.role}] {self.content[:30]}"
\ No newline at end of file
+        return f"SummarizeJob({self.id}, {self.status}, {self.progress}%)"
@@ -0,0 +1,272 @@
+import os
+import re
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.html import escape
+
+from .fields import decompress_text
+from .models import Document, SearchEntry, SummarizationMessage, SummarizationSession
+
+
+# Highlight markers survive HTML-escaping of the snippet and are then
+# swapped for <mark> tags, so matched document text can't inject markup.
+MARK_START = "\ue000"
+MARK_END = "\ue001"
+MAX_QUERY_TERMS = 16
+# Must match the configuration used to build search_vector in migration 0016
+SEARCH_CONFIG = "english"
+
+
+# ---------------- INDEXING ---------------- #
+# Entries hold what a result row needs (owner, links, title), not the text:
+# that stays compressed in its source row and only its index is stored, as a
+# tsvector column on PostgreSQL or a contentless FTS5 table on SQLite (both
+# from migration 0016). `body` is set on unsaved entries for save_entries.
+def _entry(body, **fields):
+    entry = SearchEntry(**fields)
+    # tsvector values are capped at 1MB; very long documents are indexed by their head
+    entry.body = (body or "")[:settings.SEARCH_MAX_BODY_CHARS]
+    return entry
+
+
+def document_entry(document):
+    return _entry(
+        document.extracted_text,
+        user_id=document.user_id,
+        kind=SearchEntry.KIND_DOCUMENT,
+        object_id=document.id,
+        document_id=document.id,
+        title=os.path.basename(document.file.name)[:255],
+    )
+
+
+def session_entry(session):
+    return _entry(
+        session.summary_text,
+        user_id=session.user_id,
+        kind=SearchEntry.KIND_SUMMARY,
+        object_id=session.id,
+        document_id=session.document_id,
+        session_id=session.id,
+        title=session.title[:255],
+    )
+
+
+def message_entry(message, session):
+    return _entry(
+        message.content,
+        user_id=session.user_id,
+        kind=SearchEntry.KIND_MESSAGE,
+        object_id=message.id,
+        session_id=session.id,
+        title=session.title[:255],
+    )
+
+
+def save_entries(entries, batch_size=500, replace=True):
+    """
+    Inserts or refreshes entries and their index. One upsert per batch on
+    PostgreSQL; elsewhere existing entries are deleted and re-inserted, so
+    pass replace=False for objects indexed for the first time (new messages).
+    """
+    for i in range(0, len(entries), batch_size):
+        batch = entries[i:i + batch_size]
+        if connection.vendor == "postgresql":
+            _upsert_postgres(batch)
+            continue
+        if replace:
+            keys = Q()
+            for entry in batch:
+                keys |= Q(kind=entry.kind, object_id=entry.object_id)
+            SearchEntry.objects.filter(keys).delete()
+        created = SearchEntry.objects.bulk_create(batch)
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {SearchEntry._meta.db_table}_fts (rowid, title, body) VALUES (%s, %s, %s)",
+                    [(entry.id, entry.title, entry.body) for entry in created],
+                )
+
+
+def _upsert_postgres(batch):
+    table = SearchEntry._meta.db_table
+    config = SEARCH_CONFIG
+    vector = f"setweight(to_tsvector('{config}', %s), 'A') || setweight(to_tsvector('{config}', %s), 'B')"
+    row = f"(%s, %s, %s, %s, %s, %s, %s, {vector})"
+    now = timezone.now()
+    params = []
+    for entry in batch:
+        params += [entry.user_id, entry.kind, entry.object_id, entry.document_id, entry.session_id, entry.title, now,
+                   entry.title, entry.body]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, kind, object_id, document_id, session_id, title, updated_at, search_vector)
+            VALUES {", ".join([row] * len(batch))}
+            ON CONFLICT (kind, object_id) DO UPDATE SET
+                user_id = EXCLUDED.user_id, document_id = EXCLUDED.document_id, session_id = EXCLUDED.session_id,
+                title = EXCLUDED.title, updated_at = EXCLUDED.updated_at, search_vector = EXCLUDED.search_vector
+            """,
+            params,
+        )
+
+
+def delete_entry(kind, object_id):
+    SearchEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def clear_index():
+    """Removes every entry and, on SQLite, also index rows left behind by replaced entries."""
+    SearchEntry.objects.all().delete()
+    if connection.vendor == "sqlite":
+        table = SearchEntry._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('delete-all')")
+
+
+# ---------------- QUERYING ---------------- #
+def query_terms(query):
+    return re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+
+
+def search(user, query, kinds=None, limit=20, offset=0):
+    """
+    Returns (total, rows) for the user's entries matching `query`, best
+    match first. Each row has id, kind, object_id, document_id, session_id,
+    title, updated_at, rank and an HTML-safe `snippet` with <mark> tags.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return 0, []
+    kinds = list(kinds or [])
+    if connection.vendor == "postgresql":
+        total, rows = _search_postgres(user.id, query, kinds, limit, offset)
+    elif connection.vendor == "sqlite":
+        total, rows = _search_sqlite(user.id, query, kinds, limit, offset)
+    else:
+        total, rows = _search_fallback(user.id, query, kinds, limit, offset)
+    texts = source_texts(rows)
+    for row in rows:
+        snippet = highlight(texts.get((row["kind"], row["object_id"]), ""), terms)
+        row["snippet"] = escape(snippet).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+    return total, rows
+
+
+COLUMNS = ["id", "kind", "object_id", "document_id", "session_id", "title", "updated_at", "rank"]
+
+
+def source_texts(rows):
+    """{(kind, object_id): text} for the page's rows, read (and decompressed) from their source rows."""
+    sources = {
+        SearchEntry.KIND_DOCUMENT: (Document, "extracted_text"),
+        SearchEntry.KIND_SUMMARY: (SummarizationSession, "summary_text"),
+        SearchEntry.KIND_MESSAGE: (SummarizationMessage, "content"),
+    }
+    texts = {}
+    for kind, (model, field) in sources.items():
+        ids = [row["object_id"] for row in rows if row["kind"] == kind]
+        if ids:
+            for pk, text in model.objects.filter(pk__in=ids).values_list("pk", field):
+                texts[kind, pk] = decompress_text(text)
+    return texts
+
+
+def _stem(term):
+    # Close enough to the engines' stemmers to find what they matched
+    for suffix in ("ing", "es", "ed", "s"):
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[:-len(suffix)]
+    return term
+
+
+def highlight(text, terms, before=80, length=200):
+    """A window of `text` around the first match, every match wrapped in MARK_START/MARK_END."""
+    pattern = re.compile(r"\b(?:%s)\w*" % "|".join(re.escape(_stem(term)) for term in terms), re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(0, match.start() - before) if match else 0
+    window = text[start:start + length]
+    window = pattern.sub(lambda m: MARK_START + m.group(0) + MARK_END, window)
+    return ("…" if start else "") + window + ("…" if start + length < len(text) else "")
+
+
+def _kind_filter(kinds, alias):
+    if not kinds:
+        return "", []
+    return f" AND {alias}.kind IN ({', '.join(['%s'] * len(kinds))})", kinds
+
+
+def _fetch(sql, params, count_sql, count_params):
+    with connection.cursor() as cursor:
+        cursor.execute(count_sql, count_params)
+        total = cursor.fetchone()[0]
+        if not total:
+            return 0, []
+        cursor.execute(sql, params)
+        return total, [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+
+def _search_postgres(user_id, query, kinds, limit, offset):
+    table = SearchEntry._meta.db_table
+    config = SEARCH_CONFIG
+    kind_sql, kind_params = _kind_filter(kinds, "e")
+    where = f"e.user_id = %s AND e.search_vector @@ websearch_to_tsquery('{config}', %s){kind_sql}"
+    where_params = [user_id, query, *kind_params]
+    sql = f"""
+        SELECT e.id, e.kind, e.object_id, e.document_id, e.session_id, e.title, e.updated_at,
+               ts_rank_cd(e.search_vector, websearch_to_tsquery('{config}', %s)) AS rank
+        FROM {table} e
+        WHERE {where}
+        ORDER BY rank DESC, e.updated_at DESC
+        LIMIT %s OFFSET %s
+    """
+    return _fetch(
+        sql, [query, *where_params, limit, offset],
+        f"SELECT COUNT(*) FROM {table} e WHERE {where}", where_params,
+    )
+
+
+def _search_sqlite(user_id, query, kinds, limit, offset):
+    table = SearchEntry._meta.db_table
+    # Quote every term so user input can't hit FTS5 syntax; prefix-match the last one
+    terms = [f'"{term}"' for term in query_terms(query)]
+    terms[-1] += "*"
+    match = " ".join(terms)
+    kind_sql, kind_params = _kind_filter(kinds, "e")
+    where = f"{table}_fts MATCH %s AND e.user_id = %s{kind_sql}"
+    where_params = [match, user_id, *kind_params]
+    # Index rows of replaced entries (older SQLite can't delete them) no longer join
+    joins = f"FROM {table}_fts JOIN {table} e ON e.id = {table}_fts.rowid"
+    # bm25() is lower-is-better; negate it so rank reads the same as on PostgreSQL
+    sql = f"""
+        SELECT e.id, e.kind, e.object_id, e.document_id, e.session_id, e.title, e.updated_at,
+               -bm25({table}_fts, 5.0, 1.0) AS rank
+        {joins}
+        WHERE {where}
+        ORDER BY rank DESC, e.updated_at DESC
+        LIMIT %s OFFSET %s
+    """
+    total, rows = _fetch(sql, [*where_params, limit, offset], f"SELECT COUNT(*) {joins} WHERE {where}", where_params)
+    if settings.USE_TZ:
+        # Raw SQLite rows carry naive UTC timestamps
+        for row in rows:
+            row["updated_at"] = row["updated_at"].replace(tzinfo=dt_timezone.utc)
+    return total, rows
+
+
+def _search_fallback(user_id, query, kinds, limit, offset):
+    # No text index on other databases: titles only
+    queryset = SearchEntry.objects.filter(user_id=user_id)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    for term in query_terms(query):
+        queryset = queryset.filter(title__icontains=term)
+    total = queryset.count()
+    rows = [
+        {**row, "rank": 0.0}
+        for row in queryset.order_by("-updated_at").values(*COLUMNS[:-1])[offset:offset + limit]
+    ]
+    return total, rows
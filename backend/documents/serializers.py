@@ -1,4 +1,5 @@
 import os
+from django.conf import settings
 from rest_framework import serializers
 from .models import Document, SummarizationSession, SummarizationMessage
 
@@ -10,8 +11,11 @@ class DocumentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Document
-        fields = ["id", "user", "file", "file_url", "uploaded_at"]
-        read_only_fields = ["user", "uploaded_at"]
+        fields = [
+            "id", "user", "file", "file_url", "uploaded_at",
+            "page_count", "char_count", "language", "estimated_tokens",
+        ]
+        read_only_fields = ["user", "uploaded_at", "page_count", "char_count", "language", "estimated_tokens"]
 
     def create(self, validated_data):
         # Ensure user is always set
@@ -27,6 +31,9 @@ class DocumentSerializer(serializers.ModelSerializer):
         ext = os.path.splitext(value.name)[-1].lower()
         if ext not in allowed_extensions:
             raise serializers.ValidationError(f"❌ Unsupported file type: {ext}")
+        if value.size > settings.DOCUMENT_MAX_UPLOAD_BYTES:
+            limit_mb = settings.DOCUMENT_MAX_UPLOAD_BYTES / (1024 * 1024)
+            raise serializers.ValidationError(f"❌ File too large: {value.size / (1024 * 1024):.1f} MB (limit {limit_mb:.0f} MB)")
         return value
 
     def get_file_url(self, obj):
@@ -50,9 +57,19 @@ class SummarizationMessageSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class SummarizationSessionSerializer(serializers.ModelSerializer):
-    messages = SummarizationMessageSerializer(many=True, read_only=True)
+class SummarizationSessionListSerializer(serializers.ModelSerializer):
+    """Slim row for the session list; expects `message_count` to be annotated."""
+    document_name = serializers.SerializerMethodField()
+    message_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = SummarizationSession
-        fields = "__all__"
+        fields = ["id", "title", "created_at", "document", "document_name", "message_count"]
+
+    def get_document_name(self, obj):
+        return os.path.basename(obj.document.file.name) if obj.document_id else None
+
+
+class SummarizationSessionDetailSerializer(SummarizationSessionListSerializer):
+    class Meta(SummarizationSessionListSerializer.Meta):
+        fields = SummarizationSessionListSerializer.Meta.fields + ["user", "summary_text"]
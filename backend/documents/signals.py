@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_session_answers
+from .models import Document, SearchEntry, SummarizationMessage, SummarizationSession
+from .search import delete_entry, document_entry, message_entry, save_entries, session_entry
+from .versioning import bump_content_version
+
+
+def touches(update_fields, *fields):
+    return update_fields is None or any(field in update_fields for field in fields)
+
+
+def deleting_user(kwargs):
+    # Cascades from deleting the user itself: nothing left to version, and a
+    # bump would recreate the user's ContentVersion row mid-delete
+    return isinstance(kwargs.get("origin"), get_user_model())
+
+
+@receiver(post_save, sender=Document)
+def document_saved(sender, instance, update_fields=None, **kwargs):
+    # Drive metadata updates don't change what is searchable
+    if instance.user_id and touches(update_fields, "extracted_text", "file") and instance.extracted_text:
+        save_entries([document_entry(instance)], replace=not kwargs.get("created"))
+
+
+@receiver(post_save, sender=SummarizationSession)
+@receiver(post_delete, sender=SummarizationSession)
+def session_changed(sender, instance, **kwargs):
+    # Cached chat answers are only valid for the summary they were asked against.
+    invalidate_session_answers(instance.id)
+    if deleting_user(kwargs):
+        return
+    bump_content_version(instance.user_id)
+    # Deleted sessions take their search entries with them (FK cascade)
+    if kwargs["signal"] is post_save and touches(kwargs.get("update_fields"), "title", "summary_text"):
+        save_entries([session_entry(instance)], replace=not kwargs.get("created"))
+
+
+@receiver(post_save, sender=SummarizationMessage)
+@receiver(post_delete, sender=SummarizationMessage)
+def message_changed(sender, instance, **kwargs):
+    if deleting_user(kwargs):
+        return
+    if SummarizationMessage.session.is_cached(instance):
+        session = instance.session
+    else:
+        session = SummarizationSession.objects.filter(pk=instance.session_id).only("user_id", "title").first()
+    if not session:
+        return
+    bump_content_version(session.user_id)
+    if kwargs["signal"] is post_save:
+        save_entries([message_entry(instance, session)], replace=not kwargs.get("created"))
+    else:
+        delete_entry(SearchEntry.KIND_MESSAGE, instance.id)
@@ -0,0 +1,185 @@
+import logging
+import math
+import os
+import re
+
+import pdfplumber
+from django.conf import settings
+
+from .cache import TTLCache
+from .models import LLMCall
+from .telemetry import DEFAULT_MODEL, estimate_cost, percentile
+
+logger = logging.getLogger(__name__)
+
+
+# Non-PDF formats have no pages of their own; count one per this many characters
+CHARS_PER_PAGE = 3000
+# Characters of fixed instructions the summarize prompt adds around the document text
+SUMMARIZE_PROMPT_CHARS = 1050
+
+
+# ===========================================================
+# 🔤 LANGUAGE
+# ===========================================================
+SCRIPTS = [
+    ("hi", re.compile(r"[ऀ-ॿ]")),
+    ("ar", re.compile(r"[؀-ۿ]")),
+    ("ru", re.compile(r"[Ѐ-ӿ]")),
+    ("zh", re.compile(r"[一-鿿]")),
+    ("ja", re.compile(r"[぀-ヿ]")),
+]
+STOPWORDS = {
+    "en": {"the", "and", "of", "to", "is", "in", "that", "for", "with", "this"},
+    "es": {"el", "la", "de", "que", "y", "los", "las", "en", "por", "para"},
+    "fr": {"le", "la", "les", "et", "des", "est", "une", "dans", "pour", "que"},
+    "de": {"der", "die", "und", "das", "ist", "nicht", "mit", "ein", "eine", "den"},
+    "pt": {"o", "a", "os", "de", "que", "e", "do", "da", "em", "para"},
+    "it": {"il", "di", "che", "e", "la", "per", "non", "una", "sono", "gli"},
+}
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def detect_language(text, sample=20_000):
+    """
+    ISO 639-1 guess from the first `sample` characters: the dominant script
+    for non-Latin text, otherwise the language whose common words occur
+    most. "" when there isn't enough text to tell.
+    """
+    text = text[:sample]
+    letters = sum(1 for char in text if char.isalpha())
+    if letters < 20:
+        return ""
+    for code, pattern in SCRIPTS:
+        if len(pattern.findall(text)) > letters * 0.3:
+            return code
+    words = _WORD.findall(text.lower())
+    scores = {code: sum(1 for word in words if word in stopwords) for code, stopwords in STOPWORDS.items()}
+    code, hits = max(scores.items(), key=lambda item: item[1])
+    return code if hits >= 3 else ""
+
+
+# ===========================================================
+# 📏 DOCUMENT STATISTICS (computed once, at upload)
+# ===========================================================
+def estimate_tokens(chars):
+    return math.ceil(chars / settings.LLM_CHARS_PER_TOKEN)
+
+
+def count_pages(document, char_count):
+    """Real page count for PDFs (page tree only, no text parsing), an estimate otherwise."""
+    if os.path.splitext(document.file.name)[-1].lower() == ".pdf":
+        try:
+            with document.file.open("rb") as f, pdfplumber.open(f) as pdf:
+                return len(pdf.pages)
+        except Exception as e:
+            logger.warning("Could not count pages of %s: %s", document.file.name, e)
+    return max(1, math.ceil(char_count / CHARS_PER_PAGE)) if char_count else 0
+
+
+def apply_document_stats(document):
+    """Fills the statistics fields from the stored file and its extracted_text."""
+    text = document.extracted_text
+    document.char_count = len(text)
+    document.estimated_tokens = estimate_tokens(len(text))
+    document.language = detect_language(text)
+    document.page_count = count_pages(document, len(text))
+
+
+# ===========================================================
+# 🧮 PRE-FLIGHT ESTIMATE
+# ===========================================================
+# Recent summarize calls, summarised; one aggregate query per minute per process
+_history_cache = TTLCache(maxsize=1, ttl=60, name="summarize-history")
+
+
+def summarize_history():
+    """
+    Latency, output size and chars-per-token of the last
+    SUMMARIZE_ESTIMATE_HISTORY successful summarize calls, with a linear
+    fit of latency on prompt size. None when there are no calls yet.
+    """
+    history = _history_cache.get("summarize")
+    if history is not None:
+        return history or None
+
+    calls = list(
+        LLMCall.objects.filter(endpoint="summarize", outcome=LLMCall.OUTCOME_OK)
+        .order_by("-created_at")
+        .values_list("prompt_chars", "prompt_tokens", "output_tokens", "latency_ms")[:settings.SUMMARIZE_ESTIMATE_HISTORY]
+    )
+    if not calls:
+        _history_cache.set("summarize", {})
+        return None
+
+    chars = [call[0] for call in calls]
+    latencies = [call[3] for call in calls]
+    counted = [(call[0], call[1]) for call in calls if call[0] and call[1]]
+    mean_chars, mean_latency = sum(chars) / len(chars), sum(latencies) / len(latencies)
+    spread = sum((c - mean_chars) ** 2 for c in chars)
+    # ms per prompt character; flat when every prompt was about the same size
+    slope = max(0.0, sum((c - mean_chars) * (l - mean_latency) for c, l in zip(chars, latencies)) / spread) if spread else 0.0
+    residuals = [l - (mean_latency + slope * (c - mean_chars)) for c, l in zip(chars, latencies)]
+    history = {
+        "calls": len(calls),
+        "mean_chars": mean_chars,
+        "mean_latency_ms": mean_latency,
+        "ms_per_char": slope,
+        "p90_residual_ms": max(0.0, percentile(residuals, 90)),
+        "output_tokens": percentile([call[2] for call in calls if call[2]], 50),
+        "chars_per_token": (
+            sum(c for c, _ in counted) / sum(t for _, t in counted) if counted else settings.LLM_CHARS_PER_TOKEN
+        ),
+    }
+    _history_cache.set("summarize", history)
+    return history
+
+
+def summarize_estimate(docs):
+    """
+    What POST /documents/summarize/ would do with `docs`, from stored
+    statistics and call history only: nothing is downloaded or parsed.
+    """
+    budget = settings.SUMMARIZE_MAX_TEXT_CHARS
+    total_chars = sum(doc.char_count for doc in docs)
+    # Same budget as summarize_documents: each document adds its text plus a blank line
+    prompt_chars = SUMMARIZE_PROMPT_CHARS + min(budget, total_chars + 2 * len(docs))
+    without_text = [doc.id for doc in docs if not doc.char_count]
+
+    history = summarize_history()
+    chars_per_token = history["chars_per_token"] if history else settings.LLM_CHARS_PER_TOKEN
+    input_tokens = math.ceil(prompt_chars / chars_per_token)
+    output_tokens = (history and history["output_tokens"]) or settings.SUMMARIZE_ESTIMATE_OUTPUT_TOKENS
+
+    latency = None
+    if history:
+        p50 = history["mean_latency_ms"] + history["ms_per_char"] * (prompt_chars - history["mean_chars"])
+        p50 = max(0.0, p50)
+        latency = {"p50": round(p50), "p90": round(p50 + history["p90_residual_ms"])}
+
+    return {
+        "documents": [
+            {
+                "id": doc.id,
+                "name": os.path.basename(doc.file.name),
+                "page_count": doc.page_count,
+                "char_count": doc.char_count,
+                "language": doc.language,
+                "estimated_tokens": doc.estimated_tokens,
+            }
+            for doc in docs
+        ],
+        # One Gemini call over the documents' text; past the budget the rest is left out
+        "strategy": "truncated" if total_chars + 2 * len(docs) > budget else "single-pass",
+        "coverage": round(min(1.0, budget / total_chars), 3) if total_chars else None,
+        # No text stored at upload: summarize downloads and extracts these first
+        "needs_extraction": without_text,
+        "estimated_input_tokens": input_tokens,
+        "estimated_output_tokens": output_tokens,
+        "estimated_cost_usd": round(estimate_cost(DEFAULT_MODEL, input_tokens, output_tokens), 6),
+        "estimated_latency_ms": latency,
+        "recommended_mode": (
+            "async" if without_text or (latency and latency["p90"] > settings.SUMMARIZE_ASYNC_AFTER_MS) else "sync"
+        ),
+        "history_calls": history["calls"] if history else 0,
+    }
@@ -0,0 +1,116 @@
+import logging
+import math
+import os
+import time
+
+from django.conf import settings
+from google import genai
+from google.genai import errors as genai_errors
+
+from backend.timing import timed
+
+from .fakes import FakeGeminiClient, fake_backends_enabled
+from .models import LLMCall
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def estimate_cost(model, prompt_tokens, output_tokens):
+    """USD cost from the per-million-token prices in settings.LLM_PRICING."""
+    input_price, output_price = getattr(settings, "LLM_PRICING", {}).get(model, (0, 0))
+    return ((prompt_tokens or 0) * input_price + (output_tokens or 0) * output_price) / 1_000_000
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list; None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def get_gemini_client():
+    if fake_backends_enabled():
+        return FakeGeminiClient()
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+@timed("llm")
+def generate_text(contents, endpoint, user=None, model=DEFAULT_MODEL, prompt_chars=0, client=None):
+    """
+    Streams a Gemini completion and records one LLMCall row with latency,
+    time to first token, token usage, retries and outcome.
+    Returns the response text ("" if the model returned nothing).
+    Retries transient API errors (429/5xx) with exponential backoff, waiting
+    at most LLM_MAX_RETRY_WAIT seconds in total since this runs in the
+    request thread.
+    """
+    client = client or get_gemini_client()
+    max_retries = getattr(settings, "LLM_MAX_RETRIES", 2)
+    max_wait = getattr(settings, "LLM_MAX_RETRY_WAIT", 4)
+    waited = 0
+
+    started = time.perf_counter()
+    first_token_at = None
+    usage = None
+    retries = 0
+    chunks = []
+    try:
+        while True:
+            try:
+                chunks, usage, first_token_at = [], None, None
+                for chunk in client.models.generate_content_stream(model=model, contents=contents):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    if chunk.text:
+                        chunks.append(chunk.text)
+                    if chunk.usage_metadata is not None:
+                        usage = chunk.usage_metadata
+                break
+            except genai_errors.APIError as e:
+                delay = min(2 ** retries, max_wait - waited)
+                if e.code not in RETRYABLE_STATUS or retries >= max_retries or delay <= 0:
+                    raise
+                time.sleep(delay)
+                waited += delay
+                retries += 1
+    except Exception as e:
+        _record(user, endpoint, model, prompt_chars, None, started, first_token_at,
+                retries, LLMCall.OUTCOME_ERROR, error=str(e))
+        raise
+
+    text = "".join(chunks)
+    outcome = LLMCall.OUTCOME_OK if text else LLMCall.OUTCOME_EMPTY
+    _record(user, endpoint, model, prompt_chars, usage, started, first_token_at, retries, outcome)
+    return text
+
+
+def _record(user, endpoint, model, prompt_chars, usage, started, first_token_at, retries, outcome, error=""):
+    finished = time.perf_counter()
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = None
+    if usage is not None:
+        # Thinking tokens are billed as output on the 2.5 models
+        output_tokens = (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)
+    try:
+        LLMCall.objects.create(
+            user=user if getattr(user, "is_authenticated", False) else None,
+            endpoint=endpoint,
+            model=model,
+            prompt_chars=prompt_chars,
+            prompt_tokens=prompt_tokens,
+            output_tokens=output_tokens,
+            time_to_first_token_ms=(first_token_at - started) * 1000 if first_token_at else None,
+            latency_ms=(finished - started) * 1000,
+            retries=retries,
+            outcome=outcome,
+            error=error[:255],
+            cost_usd=estimate_cost(model, prompt_tokens, output_tokens),
+        )
+    except Exception as e:
+        # Telemetry must never break the request it is measuring
+        logger.warning("Could not record LLM call: %s", e)
@@ -1,3 +1,967 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from google.genai import errors as genai_errors
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from backend import metrics
+from backend.timing import NULL_SPAN, span
+from users.authentication import token_cache
+from users.models import User
+from .cache import SingleFlight, TTLCache, answer_cache
+from .coalesce import FlightTimeout, coalesce_summary
+from .fields import CODEC_RAW, CODEC_ZLIB, CompressedBytes
+from .jobs import claim_job, requeue_expired
+from .models import (
+    ContentVersion, Document, LLMCall, SearchEntry, SessionAudio, SummarizationMessage, SummarizationSession, SummarizeJob, SummaryFlight,
+)
+from .telemetry import generate_text
+from .tts import EspeakBackend, GTTSBackend, PiperBackend, TTSBackend, get_backend, iter_synthesize, split_narration, supports_language
+from .versioning import bump_content_version
+from .stats import _history_cache, detect_language
+from .views import _live_streams, download_drive_file, get_drive_service, summarize_documents
+
+
+MEDIA_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    FAKE_BACKENDS=True,
+    FAKE_BACKEND_LATENCY=0,
+    FAKE_BACKEND_ERROR_RATE=0,
+    FAKE_GEMINI_CHUNK_DELAY=0,
+    MEDIA_ROOT=MEDIA_DIR,
+    FAKE_DRIVE_DIR=MEDIA_DIR + "/fake_drive",
+)
+class EndpointQueryCountTests(TestCase):
+    """
+    Pins the number of SQL queries per endpoint so N+1s and extra round
+    trips show up as test failures. Update the numbers deliberately.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_DIR, ignore_errors=True)
+
+    def setUp(self):
+        answer_cache.clear()
+        token_cache.clear()
+        cache.clear()
+        _history_cache.clear()
+        self.user = User.objects.create_user("reader@example.com", "secret123", full_name="Reader", is_active=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        # Steady state: the user's content-version row already exists
+        bump_content_version(self.user.id)
+
+    def test_version_bump_survives_a_create_race(self):
+        ContentVersion.objects.filter(user=self.user).delete()
+        get_or_create = ContentVersion.objects.get_or_create
+
+        def created_elsewhere_first(**kwargs):
+            # Another request inserts the row between our update and get_or_create
+            ContentVersion.objects.create(user=self.user, version=1)
+            return get_or_create(**kwargs)
+
+        with mock.patch.object(ContentVersion.objects, "get_or_create", side_effect=created_elsewhere_first):
+            bump_content_version(self.user.id)
+        self.assertEqual(ContentVersion.objects.get(user=self.user).version, 2)
+
+    def test_deleting_a_user_does_not_recreate_their_version(self):
+        self.make_session(messages=2)
+        self.user.delete()
+        self.assertFalse(ContentVersion.objects.exists())
+        connection.check_constraints()
+
+    def make_session(self, messages=0):
+        document = Document.objects.create(user=self.user, file="documents/report.txt")
+        session = SummarizationSession.objects.create(
+            user=self.user, document=document, title="Summary", summary_text="**Report**. It is short."
+        )
+        for i in range(messages):
+            SummarizationMessage.objects.create(session=session, role="user", content=f"question {i}")
+        return session
+
+    def test_upload(self):
+        upload = SimpleUploadedFile("notes.txt", b"Quarterly numbers went up.", content_type="text/plain")
+        # auth, insert document, content hash + extracted text, search entry (SQLite replaces it:
+        # delete, insert, index row; one upsert on PostgreSQL), drive metadata
+        with self.assertNumQueries(7):
+            response = self.client.post("/documents/upload/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 201)
+
+    def test_bulk_upload(self):
+        files = [
+            SimpleUploadedFile(f"part{i}.txt", f"Chapter {i} of the handbook.".encode(), content_type="text/plain")
+            for i in range(3)
+        ] + [SimpleUploadedFile("virus.exe", b"MZ", content_type="application/octet-stream")]
+        # auth, one bulk insert, search entries + their index rows
+        with self.assertNumQueries(4):
+            response = self.client.post("/documents/upload/bulk/", {"files": files}, format="multipart")
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], ["stored", "stored", "stored", "invalid"])
+        self.assertEqual(Document.objects.filter(user=self.user).exclude(drive_file_id=None).count(), 3)
+        self.assertEqual(self.client.get("/documents/search/", {"q": "handbook"}).json()["count"], 3)
+
+    def test_summarize(self):
+        upload = SimpleUploadedFile("notes.txt", b"Quarterly numbers went up.", content_type="text/plain")
+        document_id = self.client.post("/documents/upload/", {"file": upload}, format="multipart").json()["id"]
+        # documents (auth cached by the upload), flight lookup + insert (+savepoint), session insert,
+        # version bump, search entry + index row, telemetry, flight done
+        with self.assertNumQueries(11):
+            response = self.client.post("/documents/summarize/", {"files": [document_id]}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_summarize_async(self):
+        upload = SimpleUploadedFile("notes.txt", b"Quarterly numbers went up.", content_type="text/plain")
+        document_id = self.client.post("/documents/upload/", {"file": upload}, format="multipart").json()["id"]
+        # documents, same-documents job lookup, user's active jobs, queue depth, insert, queue position
+        with self.assertNumQueries(6):
+            response = self.client.post("/documents/summarize/", {"files": [document_id], "async": True}, format="json")
+        self.assertEqual(response.status_code, 202)
+        # job status poll: job + session
+        with self.assertNumQueries(2):
+            self.client.get(response["Location"])
+
+    def test_summarize_estimate(self):
+        upload = SimpleUploadedFile(
+            "notes.txt", b"The budget for the year is fixed and the team will report to the board. " * 300,
+            content_type="text/plain",
+        )
+        document = self.client.post("/documents/upload/", {"file": upload}, format="multipart").json()
+        self.assertEqual((document["char_count"], document["language"]), (21599, "en"))
+        self.assertEqual((document["page_count"], document["estimated_tokens"]), (8, 5400))
+
+        # documents (auth cached by the upload), summarize call history; no file access
+        with mock.patch("documents.views.extract_text") as extract, self.assertNumQueries(2):
+            response = self.client.post("/documents/summarize/estimate/", {"files": [document["id"]]}, format="json")
+        extract.assert_not_called()
+        estimate = response.json()
+        self.assertEqual(estimate["strategy"], "truncated")
+        self.assertIsNone(estimate["estimated_latency_ms"])
+
+        self.client.post("/documents/summarize/", {"files": [document["id"]]}, format="json")
+        _history_cache.clear()
+        estimate = self.client.post("/documents/summarize/estimate/", {"files": [document["id"]]}, format="json").json()
+        self.assertEqual(estimate["history_calls"], 1)
+        self.assertGreaterEqual(estimate["estimated_latency_ms"]["p90"], estimate["estimated_latency_ms"]["p50"])
+
+    def test_list_does_not_grow_with_sessions(self):
+        for _ in range(5):
+            self.make_session(messages=3)
+        # auth, content version, one page of sessions with annotated message counts
+        with self.assertNumQueries(3):
+            response = self.client.get("/documents/summaries/")
+        self.assertEqual(len(response.json()["results"]), 5)
+
+    def test_list_conditional_and_cached(self):
+        self.make_session(messages=1)
+        first = self.client.get("/documents/summaries/")
+        # unchanged poll: content version (auth cached) -> 304
+        with self.assertNumQueries(1):
+            response = self.client.get("/documents/summaries/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        # no validator: served from the per-user response cache
+        with self.assertNumQueries(1):
+            response = self.client.get("/documents/summaries/")
+        self.assertEqual(response.json(), first.json())
+        # a new message changes the version and the ETag
+        SummarizationMessage.objects.create(session=SummarizationSession.objects.get(), role="user", content="hi")
+        response = self.client.get("/documents/summaries/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_detail(self):
+        session = self.make_session(messages=3)
+        # auth, content version, session + document + count, one page of messages
+        with self.assertNumQueries(4):
+            response = self.client.get(f"/documents/summaries/{session.id}/")
+        self.assertEqual(len(response.json()["messages"]["results"]), 3)
+
+    def test_search(self):
+        upload = SimpleUploadedFile("notes.txt", b"Quarterly <b>revenue</b> went up.", content_type="text/plain")
+        self.client.post("/documents/upload/", {"file": upload}, format="multipart")
+        session = self.make_session()
+        SummarizationMessage.objects.create(session=session, role="user", content="What about revenue forecasts?")
+        other = User.objects.create_user("other@example.com", "secret123")
+        SummarizationSession.objects.create(
+            user=other, document=session.document, title="Other", summary_text="revenue revenue revenue"
+        )
+        # count, one ranked page, snippet text from the two source tables (auth cached by the upload)
+        with self.assertNumQueries(4):
+            response = self.client.get("/documents/search/", {"q": "revenue"})
+        data = response.json()
+        self.assertEqual(data["count"], 2)
+        self.assertEqual({r["kind"] for r in data["results"]}, {"document", "message"})
+        document_hit = next(r for r in data["results"] if r["kind"] == "document")
+        self.assertIn("&lt;b&gt;<mark>revenue</mark>&lt;/b&gt;", document_hit["snippet"])
+
+        response = self.client.get("/documents/search/", {"q": "forecast", "kind": "message"})
+        self.assertEqual(response.json()["results"][0]["session_id"], session.id)
+        response = self.client.get("/documents/search/", {"q": "report", "kind": "summary"})
+        self.assertEqual(response.json()["count"], 1)
+
+        # a re-indexed summary matches its new text only, and the index holds no copy of it
+        session.summary_text = "The outlook is brighter."
+        session.save()
+        self.assertEqual(self.client.get("/documents/search/", {"q": "report", "kind": "summary"}).json()["count"], 0)
+        hit = self.client.get("/documents/search/", {"q": "outlook"}).json()["results"][0]
+        self.assertEqual(hit["snippet"], "The <mark>outlook</mark> is brighter.")
+        self.assertNotIn("body", [field.name for field in SearchEntry._meta.get_fields()])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.client.get("/documents/search/", {"q": "revenue"}).json()["count"], 2)
+
+        session.delete()
+        self.assertEqual(self.client.get("/documents/search/", {"q": "forecast"}).json()["count"], 0)
+
+    def test_chat(self):
+        session = self.make_session()
+        # auth, session, telemetry, both messages in one insert, one version bump, search entries + index rows
+        with self.assertNumQueries(7):
+            response = self.client.post(f"/documents/summaries/{session.id}/chat/", {"query": "Why?"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        # repeated question is served from the answer cache: session only
+        with self.assertNumQueries(1):
+            response = self.client.post(f"/documents/summaries/{session.id}/chat/", {"query": " why? "}, format="json")
+        self.assertTrue(response.json()["cached"])
+
+    def test_empty_chat_answer_is_not_cached(self):
+        session = self.make_session()
+        with mock.patch("documents.views.generate_text", return_value=""):
+            response = self.client.post(f"/documents/summaries/{session.id}/chat/", {"query": "Why?"}, format="json")
+        self.assertEqual(response.json()["reply"], "⚠️ No response.")
+        self.assertEqual(len(answer_cache), 0)
+        response = self.client.post(f"/documents/summaries/{session.id}/chat/", {"query": "Why?"}, format="json")
+        self.assertFalse(response.json()["cached"])
+        self.assertNotEqual(response.json()["reply"], "⚠️ No response.")
+
+    def test_audio(self):
+        session = self.make_session()
+        # auth, session, audio lookup + insert (+savepoint), audio row done
+        with self.assertNumQueries(7):
+            response = self.client.post(f"/documents/summaries/{session.id}/audio/", {"language": "en"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        # cached: session, audio lookup
+        with self.assertNumQueries(2):
+            response = self.client.post(f"/documents/summaries/{session.id}/audio/", {"language": "en"}, format="json")
+        self.assertTrue(response.json()["cached"])
+
+        for language in ("xx", "en" * 20, ["en"]):
+            response = self.client.post(f"/documents/summaries/{session.id}/audio/", {"language": language}, format="json")
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(SessionAudio.objects.count(), 1)
+
+
+@override_settings(
+    FAKE_BACKENDS=True,
+    FAKE_BACKEND_LATENCY=0,
+    FAKE_BACKEND_ERROR_RATE=0,
+    MEDIA_ROOT=MEDIA_DIR,
+    FAKE_DRIVE_DIR=MEDIA_DIR + "/fake_drive",
+    SERVER_TIMING=True,
+)
+class ServerTimingTests(TestCase):
+    def test_upload_reports_spans(self):
+        user = User.objects.create_user("timed@example.com", "secret123", is_active=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+        upload = SimpleUploadedFile("notes.txt", b"Quarterly numbers went up.", content_type="text/plain")
+        with self.assertLogs("backend.timing", "INFO") as log:
+            response = client.post("/documents/upload/", {"file": upload}, format="multipart")
+        header = response["Server-Timing"]
+        for name in ("auth", "db", "extract", "drive-upload", "render", "total"):
+            self.assertIn(f"{name};dur=", header)
+        record = json.loads(log.records[-1].getMessage())
+        self.assertEqual((record["path"], record["status"]), ("/documents/upload/", 201))
+        self.assertEqual(record["spans"]["auth"]["count"], 1)
+        # outside a request (and with no metrics observer) spans are a shared no-op
+        with mock.patch("backend.timing.span_observers", []):
+            self.assertIs(span("db"), NULL_SPAN)
+
+
+@override_settings(
+    FAKE_BACKENDS=True,
+    FAKE_BACKEND_LATENCY=0,
+    FAKE_BACKEND_ERROR_RATE=0,
+    MEDIA_ROOT=MEDIA_DIR,
+    FAKE_DRIVE_DIR=MEDIA_DIR + "/fake_drive",
+    METRICS=True,
+    METRICS_DIR=MEDIA_DIR + "/metrics",
+    METRICS_TOKEN="scrape",
+)
+class MetricsTests(TestCase):
+    def test_scrape_merges_worker_snapshots(self):
+        user = User.objects.create_user("metered@example.com", "secret123", is_active=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+        upload = SimpleUploadedFile("notes.txt", b"Quarterly numbers went up.", content_type="text/plain")
+        self.assertEqual(client.post("/documents/upload/", {"file": upload}, format="multipart").status_code, 201)
+
+        # a worker that has since exited: its counters stay, its gauges don't
+        os.makedirs(MEDIA_DIR + "/metrics", exist_ok=True)
+        with open(MEDIA_DIR + "/metrics/metrics-999999999.json", "w") as f:
+            json.dump({
+                "cache_requests_total": [[["gone-worker", "hit"], 4]],
+                "http_requests_in_flight": [[[], 7]],
+            }, f)
+
+        self.assertEqual(APIClient().get("/metrics").status_code, 401)
+        text = APIClient().get("/metrics", HTTP_AUTHORIZATION="Bearer scrape").content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="upload",method="POST",status="201"}', text)
+        self.assertIn('stage_duration_seconds_bucket{stage="extract",le="+Inf"}', text)
+        self.assertIn('extraction_duration_seconds_count{ext=".txt"}', text)
+        self.assertIn('cache_requests_total{cache="gone-worker",result="hit"} 4', text)
+        self.assertIn('drive_bytes_total{direction="upload"}', text)
+        self.assertNotIn("http_requests_in_flight 7", text)
+
+        # the exited worker's snapshot was folded into the archive; scraping again doesn't double it
+        self.assertFalse(os.path.exists(MEDIA_DIR + "/metrics/metrics-999999999.json"))
+        text = APIClient().get("/metrics", HTTP_AUTHORIZATION="Bearer scrape").content.decode()
+        self.assertIn('cache_requests_total{cache="gone-worker",result="hit"} 4', text)
+
+    def test_reused_pid_keeps_the_previous_process_totals(self):
+        os.makedirs(MEDIA_DIR + "/metrics", exist_ok=True)
+        with open(metrics.snapshot_path(), "w") as f:
+            json.dump({"cache_requests_total": [[["earlier-process", "miss"], 3]]}, f)
+        with mock.patch("backend.metrics._flushed_pid", None):
+            metrics.flush(force=True)
+        self.assertEqual(metrics.collect()["cache_requests_total"][("earlier-process", "miss")], 3)
+
+
+@override_settings(
+    FAKE_BACKENDS=True,
+    FAKE_BACKEND_LATENCY=0,
+    FAKE_BACKEND_ERROR_RATE=0,
+    FAKE_GEMINI_CHUNK_DELAY=0,
+    MEDIA_ROOT=MEDIA_DIR,
+    FAKE_DRIVE_DIR=MEDIA_DIR + "/fake_drive",
+    SUMMARIZE_JOBS_PER_USER=2,
+    SUMMARIZE_JOB_USER_CONCURRENCY=1,
+    SUMMARIZE_JOB_SSE_POLL=0,
+)
+class SummarizeJobTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user("queued@example.com", "secret123", is_active=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+
+    def upload(self, client, name="notes.txt"):
+        upload = SimpleUploadedFile(name, b"Quarterly numbers went up.", content_type="text/plain")
+        return client.post("/documents/upload/", {"file": upload}, format="multipart").json()["id"]
+
+    def test_job_runs_in_worker_and_reports_result(self):
+        document_id = self.upload(self.client)
+        response = self.client.post("/documents/summarize/", {"files": [document_id], "async": True}, format="json")
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        self.assertEqual(response.json()["status"], SummarizeJob.STATUS_QUEUED)
+        # asking again for the same documents returns the same job
+        again = self.client.post("/documents/summarize/", {"files": [document_id]}, format="json",
+                                 HTTP_PREFER="respond-async")
+        self.assertEqual(again.json()["job_id"], job_id)
+
+        call_command("summarize_worker", "--once", stdout=StringIO())
+
+        status = self.client.get(response["Location"]).json()
+        self.assertEqual((status["status"], status["progress"]), (SummarizeJob.STATUS_DONE, 100))
+        self.assertEqual(SummarizationSession.objects.get(user=self.user).id, status["result"]["session_id"])
+        # the event stream only takes its signed link, never the API token
+        events_url = response.json()["events_url"]
+        self.assertEqual(self.client.get(f"/documents/summarize/jobs/{job_id}/events/").status_code, 403)
+        anonymous = APIClient()
+        events = b"".join(anonymous.get(events_url).streaming_content).decode()
+        self.assertIn("event: done", events)
+        self.assertEqual(anonymous.get(events_url.replace(f"/{job_id}/", f"/{job_id + 1}/")).status_code, 403)
+        with override_settings(SIGNED_URL_MAX_AGE=-1):
+            self.assertEqual(anonymous.get(events_url).status_code, 403)
+
+    def test_backpressure_and_fair_claiming(self):
+        first, second, third = (self.upload(self.client, f"part{i}.txt") for i in range(3))
+        for document_id in (first, second):
+            self.client.post("/documents/summarize/", {"files": [document_id], "async": True}, format="json")
+        response = self.client.post("/documents/summarize/", {"files": [third], "async": True}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+        other = User.objects.create_user("later@example.com", "secret123", is_active=True)
+        other_client = APIClient()
+        other_client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=other).key}")
+        other_client.post("/documents/summarize/", {"files": [self.upload(other_client)], "async": True}, format="json")
+
+        # the user who queued later isn't stuck behind the first user's backlog
+        self.assertEqual(claim_job(lease=60).user_id, self.user.id)
+        self.assertEqual(claim_job(lease=60).user_id, other.id)
+        self.assertIsNone(claim_job(lease=60))
+
+        # a worker that died mid-job: the lease runs out and the job is queued again
+        SummarizeJob.objects.filter(status=SummarizeJob.STATUS_RUNNING).update(lease_expires_at=timezone.now())
+        self.assertEqual(requeue_expired(), 2)
+
+
+@override_settings(
+    FAKE_BACKENDS=True,
+    FAKE_BACKEND_LATENCY=0,
+    FAKE_BACKEND_ERROR_RATE=0,
+    FAKE_GEMINI_CHUNK_DELAY=0,
+    MEDIA_ROOT=MEDIA_DIR,
+    FAKE_DRIVE_DIR=MEDIA_DIR + "/fake_drive",
+    DOCUMENT_SPOOL_BYTES=256 * 1024,
+)
+class MemoryBoundTests(TestCase):
+    FILE_SIZE = 8 * 1024 * 1024
+
+    def setUp(self):
+        self.user = User.objects.create_user("large@example.com", "secret123", is_active=True)
+        self.content = b"The contract renews every March unless cancelled in writing. " * (self.FILE_SIZE // 62)
+
+    def peak_memory(self, func):
+        tracemalloc.start()
+        try:
+            with redirect_stdout(StringIO()):
+                result = func()
+            return result, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_upload_size_limit(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+        upload = SimpleUploadedFile("big.txt", b"x" * 2048, content_type="text/plain")
+        with override_settings(DOCUMENT_MAX_UPLOAD_BYTES=1024):
+            response = client.post("/documents/upload/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("too large", response.json()["file"][0])
+
+    def test_summarize_local_file_reads_only_what_the_prompt_uses(self):
+        os.makedirs(os.path.join(MEDIA_DIR, "documents"), exist_ok=True)
+        with open(os.path.join(MEDIA_DIR, "documents", "large.txt"), "wb") as f:
+            f.write(self.content)
+        document = Document.objects.create(user=self.user, file="documents/large.txt")
+
+        session, peak = self.peak_memory(lambda: summarize_documents(self.user, [document]))
+        self.assertTrue(session.summary_text)
+        self.assertLess(peak, self.FILE_SIZE // 8)
+
+    def test_drive_download_spills_to_disk(self):
+        file_id = uuid.uuid4().hex
+        os.makedirs(MEDIA_DIR + "/fake_drive", exist_ok=True)
+        with open(os.path.join(MEDIA_DIR, "fake_drive", file_id), "wb") as f:
+            f.write(self.content)
+
+        buffer, peak = self.peak_memory(lambda: download_drive_file(get_drive_service(), file_id))
+        with buffer:
+            self.assertTrue(buffer._rolled)
+            self.assertEqual(buffer.read(64), self.content[:64])
+        self.assertLess(peak, self.FILE_SIZE // 2)
+
+
+class DocumentStatsTests(TestCase):
+    def test_detect_language(self):
+        self.assertEqual(detect_language("El contrato de la empresa que firmamos para los clientes en marzo."), "es")
+        self.assertEqual(detect_language("यह अनुबंध मार्च में समाप्त होता है और भुगतान तीस दिनों में देय है।"), "hi")
+        self.assertEqual(detect_language("12 34"), "")
+
+
+class ExtractionBenchmarkTests(TestCase):
+    def test_baseline_round_trip_and_regression(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        baseline = os.path.join(workdir, "baseline.json")
+        args = ["bench_extraction", "--formats", "txt,csv", "--sizes", "1KB,4KB", "--corpus-dir",
+                os.path.join(workdir, "corpus"), "--baseline", baseline, "--min-time", "0"]
+
+        call_command(*args, "--save-baseline", stdout=StringIO())
+        with open(baseline) as f:
+            report = json.load(f)
+        self.assertEqual(set(report["results"]), {"txt-1KB", "txt-4KB", "csv-1KB", "csv-4KB"})
+        self.assertGreater(report["results"]["csv-4KB"]["chars"], 0)
+
+        # a baseline 100x faster than this machine reads as a throughput regression
+        for result in report["results"].values():
+            result["mb_per_s"] *= 100
+        with open(baseline, "w") as f:
+            json.dump(report, f)
+        with self.assertRaisesMessage(CommandError, "throughput"):
+            call_command(*args, stdout=StringIO())
+
+
+def _stream(*chunks, error=None):
+    """A stand-in client whose generate_content_stream yields `chunks` or raises `error`."""
+    client = mock.Mock()
+    if error is not None:
+        client.models.generate_content_stream.side_effect = error
+    else:
+        client.models.generate_content_stream.side_effect = lambda model, contents: iter(chunks)
+    return client
+
+
+@override_settings(LLM_MAX_RETRIES=5)
+class GenerateTextTelemetryTests(TestCase):
+    contents = [{"role": "user", "parts": [{"text": "Summarize the payment terms."}]}]
+
+    def test_records_successful_call(self):
+        usage = mock.Mock(prompt_token_count=12, candidates_token_count=30, thoughts_token_count=10)
+        client = _stream(mock.Mock(text="### 1. Overview\n", usage_metadata=None),
+                         mock.Mock(text="Payment is due in 30 days.", usage_metadata=usage))
+        text = generate_text(self.contents, endpoint="chat", prompt_chars=28, client=client)
+        call = LLMCall.objects.get()
+        self.assertEqual(text, "### 1. Overview\nPayment is due in 30 days.")
+        self.assertEqual((call.endpoint, call.outcome, call.retries, call.prompt_chars), ("chat", "ok", 0, 28))
+        self.assertEqual((call.prompt_tokens, call.output_tokens), (12, 40))
+        self.assertGreater(call.cost_usd, 0)
+
+    def test_records_empty_response(self):
+        client = _stream(mock.Mock(text="", usage_metadata=None))
+        self.assertEqual(generate_text(self.contents, endpoint="chat", client=client), "")
+        self.assertEqual(LLMCall.objects.get().outcome, LLMCall.OUTCOME_EMPTY)
+
+    def test_retries_with_capped_backoff_then_records_error(self):
+        client = _stream(error=genai_errors.ServerError(503, {"error": {"message": "The model is overloaded.",
+                                                                         "status": "UNAVAILABLE"}}))
+        with override_settings(LLM_MAX_RETRY_WAIT=4), mock.patch("documents.telemetry.time.sleep") as sleep:
+            with self.assertRaises(genai_errors.ServerError):
+                generate_text(self.contents, endpoint="summarize", client=client)
+        # 1s + 2s, then only the 1s left of the 4s budget, then out of budget
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1, 2, 1])
+        call = LLMCall.objects.get()
+        self.assertEqual((call.outcome, call.retries), (LLMCall.OUTCOME_ERROR, 3))
+        self.assertIn("overloaded", call.error)
+
+    def test_client_errors_are_not_retried(self):
+        client = _stream(error=genai_errors.ClientError(
+            400, {"error": {"message": "bad request", "status": "INVALID_ARGUMENT"}}
+        ))
+        with mock.patch("documents.telemetry.time.sleep") as sleep, self.assertRaises(genai_errors.ClientError):
+            generate_text(self.contents, endpoint="chat", client=client)
+        sleep.assert_not_called()
+        self.assertEqual(LLMCall.objects.get().retries, 0)
+
+
+@override_settings(SUMMARY_FLIGHT_POLL_INTERVAL=0.02)
+class SingleFlightConcurrencyTests(TransactionTestCase):
+    """Leader and waiters on separate threads, each with its own database connection."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("flight@example.com", "secret123")
+        document = Document.objects.create(user=self.user, file="documents/report.txt")
+        self.session = SummarizationSession.objects.create(
+            user=self.user, document=document, title="Summary", summary_text="Done."
+        )
+
+    def run_flight(self, results, compute, wait):
+        def target():
+            try:
+                results.append(coalesce_summary("k", self.user, compute, wait=wait))
+            except Exception as e:
+                results.append(e)
+            finally:
+                connection.close()
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread
+
+    @override_settings(SUMMARY_FLIGHT_LEASE=0.3, SUMMARY_FLIGHT_RESULT_TTL=0)
+    def test_waiter_shares_the_leaders_result_past_the_lease(self):
+        started, release, calls, results = threading.Event(), threading.Event(), [], []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return self.session
+
+        # a 0.3s lease: without renewal the waiter would take over and compute again
+        leader = self.run_flight(results, compute, wait=5)
+        started.wait(5)
+        time.sleep(0.5)
+        waiter = self.run_flight(results, compute, wait=5)
+        time.sleep(0.3)
+        release.set()
+        leader.join(5)
+        waiter.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True])
+        self.assertTrue(all(session.id == self.session.id for session, _ in results))
+
+        # asking again once it has finished computes again
+        self.run_flight(results, compute, wait=5).join(5)
+        self.assertEqual((len(calls), results[-1][1]), (2, False))
+
+    def test_waiter_gives_up_and_leader_that_lost_the_row_leaves_it_alone(self):
+        started, release, results = threading.Event(), threading.Event(), []
+
+        def compute():
+            started.set()
+            release.wait(5)
+            return self.session
+
+        leader = self.run_flight(results, compute, wait=5)
+        started.wait(5)
+        waiter = self.run_flight(results, compute, wait=0.1)
+        waiter.join(5)
+        self.assertIsInstance(results.pop(), FlightTimeout)
+
+        # someone else claims the row (as after a stalled leader's lease ran out)
+        SummaryFlight.objects.filter(key="k").update(updated_at=timezone.now() + timedelta(seconds=1))
+        release.set()
+        leader.join(5)
+        flight = SummaryFlight.objects.get(key="k")
+        self.assertEqual((flight.status, flight.session_id), (SummaryFlight.STATUS_PENDING, None))
+
+
+@override_settings(
+    FAKE_BACKENDS=True,
+    FAKE_BACKEND_LATENCY=0,
+    FAKE_BACKEND_ERROR_RATE=0,
+    MEDIA_ROOT=MEDIA_DIR,
+    FAKE_DRIVE_DIR=MEDIA_DIR + "/fake_drive",
+    AUDIO_FLIGHT_POLL_INTERVAL=0.02,
+)
+class AudioFlightTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("listener@example.com", "secret123", is_active=True)
+        self.token = Token.objects.create(user=self.user).key
+        document = Document.objects.create(user=self.user, file="documents/report.txt")
+        self.session = SummarizationSession.objects.create(
+            user=self.user, document=document, title="Summary", summary_text="The report is short. It ends here."
+        )
+
+    def client_for_thread(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+        return client
+
+    def test_concurrent_requests_synthesize_once(self):
+        from .views import synthesize as real_synthesize
+        calls, responses = [], []
+
+        def slow_synthesize(narration, lang):
+            calls.append(lang)
+            time.sleep(0.3)
+            return real_synthesize(narration, lang)
+
+        def post():
+            try:
+                responses.append(self.client_for_thread().post(
+                    f"/documents/summaries/{self.session.id}/audio/", {"language": "en"}, format="json"
+                ).json())
+            finally:
+                connection.close()
+
+        with mock.patch("documents.views.synthesize", side_effect=slow_synthesize):
+            threads = [threading.Thread(target=post) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+                time.sleep(0.05)
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(r["cached"] for r in responses), [False, True])
+        self.assertEqual(responses[0]["audio_url"], responses[1]["audio_url"])
+        self.assertEqual(SessionAudio.objects.get().status, SessionAudio.STATUS_DONE)
+
+    def stream_url(self):
+        return self.client_for_thread().get(
+            f"/documents/summaries/{self.session.id}/audio/stream-url/", {"language": "en"}
+        ).json()["stream_url"]
+
+    def test_stream_is_persisted_and_replayed_from_drive(self):
+        url = self.stream_url()
+        self.assertEqual(APIClient().get(f"/documents/summaries/{self.session.id}/audio/stream/?token={self.token}")
+                         .status_code, 403)
+        first = b"".join(APIClient().get(url).streaming_content)
+        self.assertTrue(first)
+
+        # the finished narration is uploaded on a background thread
+        for _ in range(100):
+            try:
+                if SessionAudio.objects.filter(status=SessionAudio.STATUS_DONE).exclude(drive_file_id="").exists():
+                    break
+            except OperationalError:
+                pass  # sqlite's shared-cache test database locks the table while the upload writes
+            time.sleep(0.05)
+        with mock.patch("documents.views.iter_synthesize") as live:
+            replay = b"".join(APIClient().get(url).streaming_content)
+        live.assert_not_called()
+        self.assertEqual(replay, first)
+
+    def test_stream_closed_before_the_first_chunk_frees_its_slot(self):
+        url = self.stream_url()
+        # more closed streams than AUDIO_STREAM_MAX_CONCURRENT slots
+        for _ in range(settings.AUDIO_STREAM_MAX_CONCURRENT + 1):
+            response = APIClient().get(url)
+            self.assertEqual(response.status_code, 200)
+            response.close()  # client gone before anything was sent
+        self.assertTrue(_live_streams.acquire(blocking=False))
+        _live_streams.release()
+
+    def test_stream_rejects_unsupported_languages(self):
+        link = f"/documents/summaries/{self.session.id}/audio/stream-url/"
+        self.assertEqual(self.client_for_thread().get(link, {"language": "xx"}).status_code, 400)
+        # a signed link is only bound to the session, so the stream checks the language again
+        url = self.stream_url().replace("language=en", "language=" + "x" * 20)
+        self.assertEqual(APIClient().get(url).status_code, 400)
+        self.assertFalse(SessionAudio.objects.exists())
+
+    def test_live_streams_are_bounded(self):
+        url = self.stream_url()
+        with mock.patch("documents.views._live_streams") as streams:
+            streams.acquire.return_value = False
+            response = APIClient().get(url)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+
+class _SlowFirstBackend(TTSBackend):
+    """Earlier segments take longer, so completion order is the reverse of narration order."""
+    name = "test-slow-first"
+    max_workers = 4
+
+    def __init__(self):
+        self.started = []
+
+    def synthesize(self, text, lang):
+        self.started.append(text)
+        time.sleep(0.02 * (9 - int(text.strip(".").split()[1])))
+        return text.encode()
+
+    def supports(self, lang):
+        return True
+
+
+@override_settings(TTS_SEGMENT_CHARS=10)
+class TTSTests(SimpleTestCase):
+    narration = "Segment 1. Segment 2. Segment 3. Segment 4. Segment 5. Segment 6. Segment 7. Segment 8."
+
+    def test_split_narration(self):
+        self.assertEqual(split_narration("One. Two three four five six."), ["One.", "Two three", "four five", "six."])
+
+    def test_segments_are_yielded_in_narration_order(self):
+        audio = list(iter_synthesize(self.narration, "en", backend=_SlowFirstBackend()))
+        self.assertEqual(audio, [f"Segment {i}.".encode() for i in range(1, 9)])
+
+    def test_closing_the_stream_cancels_queued_segments(self):
+        backend = _SlowFirstBackend()
+        stream = iter_synthesize(self.narration, "en", max_workers=2, backend=backend)
+        self.assertEqual(next(stream), b"Segment 1.")
+        stream.close()
+        time.sleep(0.5)
+        # segments 1-2 ran, segment 3 was queued on the first yield; nothing after that
+        self.assertLessEqual(len(backend.started), 3)
+
+    def test_command_backends(self):
+        with mock.patch("documents.tts.subprocess.run") as run:
+            run.side_effect = [mock.Mock(stdout=b"RIFF"), mock.Mock(stdout=b"mp3")]
+            with override_settings(TTS_ESPEAK_BINARY="espeak-ng", TTS_FFMPEG_BINARY="ffmpeg"):
+                self.assertEqual(EspeakBackend().synthesize("Hello", "en"), b"mp3")
+        espeak, ffmpeg = (c.args[0] for c in run.call_args_list)
+        self.assertEqual(espeak, ["espeak-ng", "-v", "en", "--stdout"])
+        self.assertEqual(ffmpeg[0], "ffmpeg")
+        self.assertEqual(run.call_args_list[1].kwargs["input"], b"RIFF")
+
+        with mock.patch("documents.tts.subprocess.run", side_effect=FileNotFoundError):
+            with self.assertRaisesMessage(RuntimeError, "TTS binary not found"):
+                EspeakBackend().synthesize("Hello", "en")
+        with override_settings(TTS_PIPER_MODELS={}), self.assertRaisesMessage(RuntimeError, "No piper voice"):
+            PiperBackend().synthesize("Hello", "de")
+
+    def test_backend_selection(self):
+        with override_settings(FAKE_BACKENDS=False, TTS_BACKEND="gtts", TTS_LANGUAGE_BACKENDS={"de": "espeak"}):
+            self.assertEqual(get_backend("en").name, "gtts")
+            self.assertEqual(get_backend("de").name, "espeak")
+            with self.assertRaisesMessage(RuntimeError, "Unknown TTS backend"):
+                get_backend("en", name="nope")
+        with override_settings(FAKE_BACKENDS=True):
+            self.assertEqual(get_backend("de").name, "fake")
+            self.assertEqual(get_backend("de", name="espeak").name, "espeak")
+            with self.assertRaisesMessage(RuntimeError, "Unknown TTS backend"):
+                get_backend("en", name="nope")
+        with self.assertRaises(TypeError):
+            type("Incomplete", (TTSBackend,), {})()
+
+    def test_supported_languages(self):
+        self.assertTrue(GTTSBackend().supports("zh-CN"))
+        self.assertFalse(GTTSBackend().supports("xx"))
+        with override_settings(TTS_PIPER_MODELS={"en": "/voices/en.onnx"}):
+            self.assertTrue(PiperBackend().supports("en"))
+            self.assertFalse(PiperBackend().supports("de"))
+        voices = b"Pty Language       Age/Gender VoiceName          File\n 5  en-gb  --/M  English_(Great_Britain)  gmw/en\n"
+        with mock.patch("documents.tts.subprocess.run", return_value=mock.Mock(stdout=voices)):
+            backend = EspeakBackend()
+            self.assertTrue(backend.supports("en-gb"))
+            self.assertFalse(backend.supports("Language"))
+        with override_settings(FAKE_BACKENDS=True):
+            self.assertFalse(supports_language(None))
+
+
+class CachePrimitiveTests(SimpleTestCase):
+    def test_ttl_cache_expiry_and_eviction(self):
+        ttl_cache = TTLCache(maxsize=2, ttl=10)
+        with mock.patch("documents.cache.time.monotonic", return_value=100):
+            ttl_cache.set("a", 1)
+            ttl_cache.set("b", 2, ttl=1)
+            self.assertEqual(ttl_cache.get("a"), 1)  # "a" is now the most recently used
+            ttl_cache.set("c", 3)
+        self.assertEqual(len(ttl_cache), 2)
+        with mock.patch("documents.cache.time.monotonic", return_value=105):
+            self.assertIsNone(ttl_cache.get("b"))  # evicted as least recently used
+            self.assertEqual(ttl_cache.get("a"), 1)
+        with mock.patch("documents.cache.time.monotonic", return_value=111):
+            self.assertEqual(ttl_cache.get("c", "expired"), "expired")
+        ttl_cache.set(("s", 1), 1)
+        ttl_cache.set(("s", 2), 2)
+        ttl_cache.delete_where(lambda key: key[1] == 1)
+        self.assertEqual((ttl_cache.get(("s", 1)), ttl_cache.get(("s", 2))), (None, 2))
+
+    def test_single_flight_shares_result_and_errors(self):
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "answer"
+
+        leader = threading.Thread(target=lambda: results.append(flights.do("key", compute)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(flights.do("key", compute)))
+        follower.start()
+        # the follower is waiting on the leader's call, not running its own
+        follower.join(0.2)
+        self.assertTrue(follower.is_alive())
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [("answer", False), ("answer", True)])
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaisesMessage(ValueError, "boom"):
+            flights.do("key", fail)
+        # a failed call isn't remembered
+        self.assertEqual(flights.do("key", lambda: "again"), ("again", False))
+
+
+class CompressedTextFieldTests(TestCase):
+    def test_round_trip_and_stored_size(self):
+        user = User.objects.create_user("writer@example.com", "secret123")
+        summary = "### 1. Overview\nThe agreement sets out the payment terms. " * 40
+        document = Document.objects.create(user=user, file="documents/contract.txt")
+        session = SummarizationSession.objects.create(
+            user=user, document=document, title="Summary", summary_text=summary
+        )
+        message = SummarizationMessage.objects.create(session=session, role="user", content="short")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT summary_text FROM {SummarizationSession._meta.db_table} WHERE id = %s", [session.id]
+            )
+            stored = bytes(cursor.fetchone()[0])
+        self.assertEqual(stored[0], CODEC_ZLIB)
+        self.assertLess(len(stored), len(summary) // 5)
+
+        self.assertEqual(SummarizationSession.objects.get(pk=session.pk).summary_text, summary)
+        self.assertEqual(SummarizationSession.objects.defer("summary_text").get(pk=session.pk).summary_text, summary)
+        self.assertEqual(SummarizationMessage.objects.get(pk=message.pk).content, "short")
+        self.assertEqual(
+            SummarizationMessage.objects.values_list("content", flat=True).get(pk=message.pk)[0], CODEC_RAW
+        )
+
+    def test_untouched_value_saved_unchanged(self):
+        user = User.objects.create_user("editor@example.com", "secret123")
+        document = Document.objects.create(user=user, file="documents/contract.txt")
+        session = SummarizationSession.objects.create(
+            user=user, document=document, title="Old", summary_text="x" * 500
+        )
+        session = SummarizationSession.objects.get(pk=session.pk)
+        session.title = "New"
+        # an unread summary is written back without a decompress/compress round trip
+        field = SummarizationSession._meta.get_field("summary_text")
+        self.assertIsInstance(field.pre_save(session, add=False), CompressedBytes)
+        session.save()
+        self.assertEqual(SummarizationSession.objects.get(pk=session.pk).summary_text, "x" * 500)
+
+
+class CompressionBenchmarkTests(TransactionTestCase):
+    # The database pass creates its twin tables, which SQLite can't do inside a transaction
+    def test_database_pass_reports_both_columns_and_cleans_up(self):
+        out = StringIO()
+        call_command("bench_compression", "--repeat", "1", "--db-rows", "3", stdout=out)
+
+        rows = [line.split() for line in out.getvalue().splitlines()]
+        self.assertIn(["summaries", "compressed", "3"], [row[:3] for row in rows])
+        self.assertIn(["summaries", "plain", "3"], [row[:3] for row in rows])
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(SummarizationSession.objects.exists())
+        self.assertFalse([table for table in connection.introspection.table_names() if table.startswith("bench_")])
+
+
+class JSONRendererParityTests(TestCase):
+    def test_orjson_output_matches_stock_renderer(self):
+        from decimal import Decimal
+        from io import BytesIO
+
+        from django.utils import timezone
+        from rest_framework.parsers import JSONParser
+        from rest_framework.renderers import JSONRenderer
+
+        from backend.renderers import ORJSONParser, ORJSONRenderer
+
+        payload = {
+            "when": timezone.now(),
+            "day": timezone.now().date(),
+            "price": Decimal("1.50"),
+            "text": "naïve – “quoted”   line   para 😀",
+            "nested": [{"a": None, "b": True, 3: 1.5}],
+            "raw": b"bytes",
+        }
+        rendered = JSONRenderer().render(payload)
+        self.assertEqual(ORJSONRenderer().render(payload), rendered)
+        self.assertEqual(ORJSONParser().parse(BytesIO(rendered)), JSONParser().parse(BytesIO(rendered)))
+        self.assertEqual(ORJSONParser().parse(BytesIO(b'{"big": 123456789012345678901234567890}'))["big"],
+                         123456789012345678901234567890)
+
+    def test_orjson_renderer_edge_values(self):
+        from rest_framework.renderers import JSONRenderer
+
+        from backend.renderers import ORJSONRenderer
+
+        # Beyond 64 bits orjson refuses; the stock renderer takes over
+        for big in (2 ** 64, -(2 ** 63) - 1, 123456789012345678901234567890):
+            payload = {"ids": [1, big]}
+            self.assertEqual(ORJSONRenderer().render(payload), JSONRenderer().render(payload))
+        # Exponent floats differ in spelling only
+        payload = {"large": 1e16, "small": 1e-7, "plain": 0.1}
+        rendered = ORJSONRenderer().render(payload)
+        self.assertEqual(rendered, b'{"large":1e16,"small":1e-7,"plain":0.1}')
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(payload)))
+        self.assertEqual(ORJSONRenderer().render({"x": float("nan")}), b'{"x":null}')
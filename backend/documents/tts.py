@@ -0,0 +1,319 @@
+import os
+import re
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from gtts import gTTS
+from gtts.lang import tts_langs
+
+from backend.timing import timed
+
+from .fakes import FakeTTS, fake_backends_enabled
+
+
+# ===========================================================
+# ✂️ NARRATION SEGMENTS
+# ===========================================================
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+
+def split_narration(text, max_chars=None):
+    """
+    Splits narration into sentence-aligned segments of at most `max_chars`
+    characters. Sentences longer than that are broken at whitespace.
+    """
+    max_chars = max_chars or getattr(settings, "TTS_SEGMENT_CHARS", 250)
+    segments, current = [], ""
+    for sentence in _SENTENCE_END.split(text):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        for piece in _wrap(sentence, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                segments.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        segments.append(current)
+    return segments
+
+
+def _wrap(sentence, max_chars):
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        yield sentence[:cut]
+        sentence = sentence[cut:].strip()
+    if sentence:
+        yield sentence
+
+
+# ===========================================================
+# 🔊 BACKENDS
+# ===========================================================
+class TTSBackend(ABC):
+    """Turns one segment of text into MP3 bytes."""
+    name = ""
+    max_workers = None  # falls back to settings.TTS_MAX_WORKERS
+
+    @abstractmethod
+    def synthesize(self, text, lang):
+        """MP3 bytes for `text` spoken in `lang`."""
+
+    @abstractmethod
+    def supports(self, lang):
+        """Whether `lang` is a language code this backend can speak."""
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS: one HTTPS request per ~100 characters."""
+    name = "gtts"
+
+    def supports(self, lang):
+        return lang in tts_langs()
+
+    def synthesize(self, text, lang):
+        buffer = BytesIO()
+        gTTS(text, lang=lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class FakeTTSBackend(GTTSBackend):
+    name = "fake"
+
+    def synthesize(self, text, lang):
+        buffer = BytesIO()
+        FakeTTS(text, lang=lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class CommandTTSBackend(TTSBackend):
+    """
+    Runs a local TTS binary that reads text on stdin and writes WAV on
+    stdout, then encodes the WAV to MP3 with ffmpeg. Each segment is its
+    own process, so the backend's shared thread pool bounds how many run
+    at once across all requests.
+    """
+    timeout = 120
+
+    def __init__(self):
+        self.max_workers = getattr(settings, "TTS_LOCAL_MAX_WORKERS", None) or os.cpu_count() or 2
+
+    @abstractmethod
+    def command(self, lang):
+        """argv of the binary that reads `lang` text on stdin and writes WAV on stdout."""
+
+    def synthesize(self, text, lang):
+        wav = self._run(self.command(lang), text.encode("utf-8"))
+        encoder = getattr(settings, "TTS_FFMPEG_BINARY", "ffmpeg")
+        return self._run(
+            [encoder, "-loglevel", "error", "-f", "wav", "-i", "pipe:0", "-f", "mp3", "-q:a", "4", "pipe:1"],
+            wav,
+        )
+
+    def _run(self, command, stdin):
+        try:
+            result = subprocess.run(command, input=stdin, capture_output=True, timeout=self.timeout, check=True)
+        except FileNotFoundError:
+            raise RuntimeError(f"TTS binary not found: {command[0]}")
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"{command[0]} failed: {e.stderr.decode('utf-8', errors='ignore')[:200]}")
+        return result.stdout
+
+
+class EspeakBackend(CommandTTSBackend):
+    name = "espeak"
+    _languages = None
+
+    def supports(self, lang):
+        if self._languages is None:
+            # Columns: Pty Language Age/Gender VoiceName File Other Languages
+            voices = self._run([getattr(settings, "TTS_ESPEAK_BINARY", "espeak-ng"), "--voices"], b"")
+            self._languages = {line.split()[1] for line in voices.decode("utf-8", errors="ignore").splitlines()[1:]
+                               if len(line.split()) > 1}
+        return lang in self._languages
+
+    def command(self, lang):
+        return [getattr(settings, "TTS_ESPEAK_BINARY", "espeak-ng"), "-v", lang, "--stdout"]
+
+
+class PiperBackend(CommandTTSBackend):
+    name = "piper"
+
+    def supports(self, lang):
+        return lang in getattr(settings, "TTS_PIPER_MODELS", {})
+
+    def command(self, lang):
+        models = getattr(settings, "TTS_PIPER_MODELS", {})
+        if lang not in models:
+            raise RuntimeError(f"No piper voice model configured for language '{lang}'")
+        return [getattr(settings, "TTS_PIPER_BINARY", "piper"), "--model", models[lang], "--output_file", "-"]
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "espeak": EspeakBackend,
+    "piper": PiperBackend,
+    "fake": FakeTTSBackend,
+}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(lang, name=None):
+    """
+    The backend for `lang`: an explicit `name`, else TTS_LANGUAGE_BACKENDS[lang],
+    else TTS_BACKEND. FAKE_BACKENDS replaces the configured choice (not an
+    explicit `name`) with the offline stand-in.
+    """
+    if name is None:
+        if fake_backends_enabled():
+            name = "fake"
+        else:
+            name = getattr(settings, "TTS_LANGUAGE_BACKENDS", {}).get(lang) or getattr(settings, "TTS_BACKEND", "gtts")
+    if name not in BACKENDS:
+        raise RuntimeError(f"Unknown TTS backend '{name}'")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
+
+
+def supports_language(lang):
+    """Whether the backend configured for `lang` can speak it; request input goes through here first."""
+    return isinstance(lang, str) and get_backend(lang).supports(lang)
+
+
+# ===========================================================
+# 🔊 SYNTHESIS
+# ===========================================================
+def synthesize_segment(text, lang, backend=None):
+    return (backend or get_backend(lang)).synthesize(text, lang)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def synthesis_pool(backend):
+    """
+    Process-wide pool per backend, sized by its max_workers (TTS_MAX_WORKERS
+    for gTTS, TTS_LOCAL_MAX_WORKERS/CPU count for local engines), so
+    concurrent narrations share one bound on requests or subprocesses.
+    """
+    with _pools_lock:
+        if backend.name not in _pools:
+            _pools[backend.name] = ThreadPoolExecutor(
+                max_workers=backend.max_workers or getattr(settings, "TTS_MAX_WORKERS", 6),
+                thread_name_prefix=f"tts-{backend.name}",
+            )
+    return _pools[backend.name]
+
+
+def iter_synthesize(narration, lang, max_workers=None, backend=None):
+    """
+    Synthesizes sentence-aligned segments on the backend's shared pool and
+    yields each segment's MP3 frames in narration order as soon as it and
+    every segment before it are ready. At most `max_workers` segments of
+    this narration are queued or running at a time; closing the generator
+    (client gone) cancels the ones not started yet.
+    """
+    backend = backend or get_backend(lang)
+    pool = synthesis_pool(backend)
+    window = max_workers or backend.max_workers or getattr(settings, "TTS_MAX_WORKERS", 6)
+    segments = iter(split_narration(narration))
+    pending = deque()
+
+    def submit_next():
+        segment = next(segments, None)
+        if segment is not None:
+            pending.append(pool.submit(synthesize_segment, segment, lang, backend))
+
+    try:
+        for _ in range(window):
+            submit_next()
+        while pending:
+            audio = pending.popleft().result()
+            submit_next()
+            yield strip_mp3_headers(audio)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+@timed("tts")
+def synthesize(narration, lang, max_workers=None, backend=None):
+    """Returns the complete narration as one MP3 byte string."""
+    return b"".join(iter_synthesize(narration, lang, max_workers, backend))
+
+
+# ===========================================================
+# 🎞️ MP3 FRAMES
+# ===========================================================
+# Layer III bitrates (kbps) by bitrate index, for MPEG-1 and MPEG-2/2.5
+_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {
+    0b11: [44100, 48000, 32000],  # MPEG-1
+    0b10: [22050, 24000, 16000],  # MPEG-2
+    0b00: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+def _frame_length(header):
+    """Byte length of the Layer III frame starting with `header`, or None."""
+    if header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0b11
+    layer = (header[1] >> 1) & 0b11
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0b11
+    padding = (header[2] >> 1) & 0b1
+    if version not in _SAMPLE_RATES or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _BITRATES[1 if version == 0b11 else 2][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    coefficient = 144 if version == 0b11 else 72
+    return coefficient * bitrate // sample_rate + padding
+
+
+def strip_mp3_headers(data):
+    """
+    Returns only the audio frames of an MP3: drops ID3v2/ID3v1 tags and the
+    Xing/Info frame, whose duration would be wrong once segments are joined.
+    Data that does not parse as MP3 is returned unchanged.
+    """
+    start, end = 0, len(data)
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        start = 10 + size
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    frames = []
+    position = start
+    first = True
+    while position + 4 <= end:
+        length = _frame_length(data[position:position + 4])
+        if not length or position + length > end:
+            # Lost sync: scan forward to the next frame header
+            position = data.find(b"\xff", position + 1, end)
+            if position == -1:
+                break
+            continue
+        frame = data[position:position + length]
+        if not (first and (b"Xing" in frame[:64] or b"Info" in frame[:64])):
+            frames.append(frame)
+        first = False
+        position += length
+
+    return b"".join(frames) if frames else data[start:end]
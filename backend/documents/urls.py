@@ -1,12 +1,20 @@
 # documents/urls.py
 
 from django.urls import path
-from documents.views import DocumentUploadView, SummarizeView, SummarizeListView, SummarizeChatView,AudioSummarizeView
+from documents.views import DocumentUploadView, BulkUploadView, SummarizeView, SummarizeEstimateView, SummarizeJobView, SummarizeJobEventsView, SummarizeListView, SummarizeDetailView, SummarizeChatView,AudioSummarizeView,AudioStreamView,AudioStreamLinkView,SearchView
 
 urlpatterns = [
     path("upload/", DocumentUploadView.as_view(), name="upload"),
+    path("upload/bulk/", BulkUploadView.as_view(), name="upload-bulk"),
     path("summarize/", SummarizeView.as_view(), name="summarize"),
+    path("summarize/estimate/", SummarizeEstimateView.as_view(), name="summarize-estimate"),
+    path("summarize/jobs/<int:job_id>/", SummarizeJobView.as_view(), name="summarize-job"),
+    path("summarize/jobs/<int:job_id>/events/", SummarizeJobEventsView.as_view(), name="summarize-job-events"),
     path("summaries/", SummarizeListView.as_view(), name="summaries"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("summaries/<int:session_id>/", SummarizeDetailView.as_view(), name="summary-detail"),
     path("summaries/<int:session_id>/chat/", SummarizeChatView.as_view(), name="summarization-chat"),
     path("summaries/<int:session_id>/audio/", AudioSummarizeView.as_view(), name="audio-summary"),
+    path("summaries/<int:session_id>/audio/stream/", AudioStreamView.as_view(), name="audio-stream"),
+    path("summaries/<int:session_id>/audio/stream-url/", AudioStreamLinkView.as_view(), name="audio-stream-url"),
 ]
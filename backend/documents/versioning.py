@@ -0,0 +1,70 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from backend.metrics import record_cache
+
+from .models import ContentVersion
+
+
+def bump_content_version(user_id):
+    rows = ContentVersion.objects.filter(user_id=user_id)
+    if rows.update(version=F("version") + 1, updated_at=timezone.now()):
+        return
+    _, created = ContentVersion.objects.get_or_create(user_id=user_id, defaults={"version": 1})
+    if not created:
+        # Another request created the row between our update and get_or_create; bump it
+        rows.update(version=F("version") + 1, updated_at=timezone.now())
+
+
+def get_content_version(user):
+    """Returns (version, last_modified) for the user's sessions and messages."""
+    row = ContentVersion.objects.filter(user=user).values_list("version", "updated_at").first()
+    return row or (0, None)
+
+
+class VersionedResponse:
+    """
+    Conditional-request helper for per-user GET endpoints:
+
+        versioned = VersionedResponse(request)
+        if versioned.not_modified: return versioned.not_modified
+        data = versioned.cached_data() or build_and_cache(...)
+        return versioned.finalize(Response(data))
+    """
+
+    def __init__(self, request):
+        self.request = request
+        version, self.last_modified = get_content_version(request.user)
+        path_digest = hashlib.md5(request.get_full_path().encode("utf-8")).hexdigest()[:12]
+        self.cache_key = f"content:{request.user.id}:{version}:{path_digest}"
+        self.etag = quote_etag(f"{request.user.id}-{version}-{path_digest}")
+        self.not_modified = get_conditional_response(
+            request,
+            etag=self.etag,
+            last_modified=int(self.last_modified.timestamp()) if self.last_modified else None,
+        )
+        if self.not_modified is not None:
+            self.finalize(self.not_modified)
+
+    def cached_data(self):
+        data = cache.get(self.cache_key)
+        record_cache("content-response", data is not None)
+        return data
+
+    def store(self, data):
+        cache.set(self.cache_key, data, getattr(settings, "CONTENT_CACHE_TTL", 300))
+        return data
+
+    def finalize(self, response):
+        response["ETag"] = self.etag
+        if self.last_modified:
+            response["Last-Modified"] = http_date(self.last_modified.timestamp())
+        response["Cache-Control"] = "private, no-cache"
+        response["Vary"] = "Authorization, Cookie"
+        return response
@@ -1,5 +1,7 @@
 import os
 import json
+import logging
+import hashlib
 import csv
 import tempfile
 import docx
@@ -8,14 +10,23 @@ import requests
 import time
 import mimetypes
 import pickle
-from io import BytesIO, StringIO
+import threading
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO, TextIOWrapper
+from urllib.parse import urlencode
 from bs4 import BeautifulSoup
 from PIL import Image
-from gtts import gTTS
 from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from rest_framework.views import APIView 
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
 
 # ---- Google OAuth Drive ----
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -24,26 +35,45 @@ from googleapiclient.http import MediaFileUpload,MediaIoBaseDownload,MediaInMemo
 from google.auth.transport.requests import Request
 
 # ---- Gemini ----
-from google import genai
 from google.genai import types
 from google.api_core import exceptions
 
 # ---- Models & Serializers ----
-from .models import Document, SummarizationSession, SummarizationMessage
-from .serializers import DocumentSerializer, SummarizationSessionSerializer, SummarizationMessageSerializer
-
-
-
+from .models import Document, SearchEntry, SessionAudio, SummarizationSession, SummarizationMessage, SummarizeJob
+from .serializers import (
+    DocumentSerializer, SummarizationMessageSerializer,
+    SummarizationSessionListSerializer, SummarizationSessionDetailSerializer,
+)
+from .cache import answer_cache, answer_cache_key, answer_flights
+
+logger = logging.getLogger(__name__)
+from .versioning import VersionedResponse, bump_content_version
+from .telemetry import generate_text, get_gemini_client
+from .fakes import FakeDriveService, fake_backends_enabled
+from .tts import iter_synthesize, supports_language, synthesize
+from users.authentication import SignedURLAuthentication, sign_media_link
+from .coalesce import FlightTimeout, coalesce_summary, single_flight, summary_flight_key
+from .search import document_entry, message_entry, save_entries, search
+from .jobs import enqueue_job, job_events, job_payload
+from .stats import apply_document_stats, summarize_estimate
+from backend.metrics import DRIVE_BYTES, EXTRACTION_SECONDS
+from backend.timing import span, timed
+
+
+
+@timed("drive-upload")
 def upload_file_to_drive(file_path_or_buffer, filename, mimetype='application/octet-stream'):
     """
     Uploads a file (from a local path or an in-memory buffer) to Google Drive.
     """
     service = get_drive_service()
     parent_folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
-    if not parent_folder_id:
+    if not parent_folder_id and not fake_backends_enabled():
         raise Exception("GOOGLE_DRIVE_FOLDER_ID is not set in .env")
 
-    metadata = {"name": filename, "parents": [parent_folder_id]}
+    metadata = {"name": filename}
+    if parent_folder_id:
+        metadata["parents"] = [parent_folder_id]
     
     if isinstance(file_path_or_buffer, str): # It's a file path
         media = MediaFileUpload(file_path_or_buffer, mimetype=mimetype, resumable=True)
@@ -53,7 +83,18 @@ def upload_file_to_drive(file_path_or_buffer, filename, mimetype='application/oc
     file = service.files().create(
         body=metadata, media_body=media, fields="id, webViewLink, webContentLink"
     ).execute()
+    DRIVE_BYTES.inc(media.size(), direction="upload")
     return file
+def file_sha256(field_file):
+    """SHA-256 hex digest of a stored file, read in chunks."""
+    digest = hashlib.sha256()
+    field_file.open("rb")
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()
 # ===========================================================
 # 🧠 TEXT EXTRACTION
 # ===========================================================
@@ -104,7 +145,7 @@ def extract_text_from_file(file_content_stream, file_name):
             return f" Unsupported file type: {ext}"
 
         char_count = len(text.strip())
-        print(f"--- DEBUG: Extracted {char_count} characters from {file_name} ---")
+        logger.debug("Extracted %s characters from %s", char_count, file_name)
         if char_count == 0:
             return " Could not extract any readable text."
 
@@ -119,6 +160,9 @@ def get_drive_service():
     Authenticate using OAuth (client_secret.json + token.pickle)
     Returns Drive service object.
     """
+    if fake_backends_enabled():
+        return FakeDriveService()
+
     creds = None
     client_secret = os.getenv("GOOGLE_CLIENT_SECRET_FILE")
     token_path = os.path.join(settings.BASE_DIR, "token.pickle")
@@ -141,60 +185,169 @@ def get_drive_service():
 
     return build("drive", "v3", credentials=creds)
 
-def extract_text(file_content_stream, file_name):
+TEXT_EXTENSIONS = [".csv", ".json", ".html", ".htm", ".xml", ".txt"]
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"]
+EXTRACTABLE_EXTENSIONS = [".pdf", ".docx"] + TEXT_EXTENSIONS + IMAGE_EXTENSIONS
+
+
+def iter_extract_text(file_content_stream, file_name):
     """
-    Extracts text directly from an in-memory binary stream (BytesIO)
-    for all supported file types.
+    Yields a file's text piece by piece: a page (PDF), paragraph (DOCX) or
+    row (CSV) at a time, the whole text for the other formats. Lets callers
+    start on the first characters, or stop early, without the full text.
     """
     ext = os.path.splitext(file_name)[-1].lower()
-    text = ""
-    try:
-        if ext == ".pdf":
-            # pdfplumber can read directly from a file-like object
-            with pdfplumber.open(file_content_stream) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-        elif ext == ".docx":
-            # python-docx can read directly from a file-like object
-            doc = docx.Document(file_content_stream)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        
-        # For text-based formats, first decode the binary stream into a string
-        elif ext in [".csv", ".json", ".html", ".htm", ".xml", ".txt"]:
-            decoded_content = file_content_stream.read().decode('utf-8', errors='ignore')
-
+    if ext == ".pdf":
+        # pdfplumber can read directly from a file-like object
+        with pdfplumber.open(file_content_stream) as pdf:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+                # Drop the page's parsed layout objects before the next one
+                page.close()
+    elif ext == ".docx":
+        # python-docx can read directly from a file-like object
+        doc = docx.Document(file_content_stream)
+        for para in doc.paragraphs:
+            yield para.text + "\n"
+
+    elif ext in [".txt", ".csv"]:
+        # Decoded as it is read, so a caller that stops early never holds the whole file
+        reader = TextIOWrapper(file_content_stream, encoding="utf-8", errors="ignore", newline="")
+        try:
             if ext == ".csv":
-                # Use StringIO to treat the string as a file for the csv reader
-                csv_file = StringIO(decoded_content)
-                reader = csv.reader(csv_file)
-                for row in reader:
-                    text += ", ".join(row) + "\n"
-            elif ext == ".json":
-                # Parse the JSON string
-                data = json.loads(decoded_content)
-                text = json.dumps(data, indent=2)
-            elif ext in [".html", ".htm", ".xml"]:
-                # Parse the HTML/XML string
-                soup = BeautifulSoup(decoded_content, "html.parser")
-                text = soup.get_text(separator="\n")
-            else: # .txt
-                text = decoded_content
-        
-        elif ext in [".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"]:
-            text = " OCR not implemented yet for images."
-
-        else:
-            return f" Unsupported file type: {ext}"
+                for row in csv.reader(reader):
+                    yield ", ".join(row) + "\n"
+            else:
+                while chunk := reader.read(64 * 1024):
+                    yield chunk
+        finally:
+            # Leave the caller's stream open
+            reader.detach()
+
+    # For the other text-based formats, first decode the binary stream into a string
+    elif ext in TEXT_EXTENSIONS:
+        decoded_content = file_content_stream.read().decode('utf-8', errors='ignore')
+
+        if ext == ".json":
+            # Parse the JSON string
+            yield json.dumps(json.loads(decoded_content), indent=2)
+        elif ext in [".html", ".htm", ".xml"]:
+            # Parse the HTML/XML string
+            soup = BeautifulSoup(decoded_content, "html.parser")
+            yield soup.get_text(separator="\n")
+
+    elif ext in IMAGE_EXTENSIONS:
+        yield " OCR not implemented yet for images."
+
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+
+@timed("extract")
+def extract_text(file_content_stream, file_name, max_chars=None):
+    """
+    Extracts text directly from a binary stream (BytesIO, an open file,
+    a spooled download) for all supported file types. With `max_chars`,
+    stops reading once that much text has been extracted.
+    """
+    ext = os.path.splitext(file_name)[-1].lower()
+    if ext not in EXTRACTABLE_EXTENSIONS:
+        return f" Unsupported file type: {ext}"
+    started = time.perf_counter()
+    pieces = iter_extract_text(file_content_stream, file_name)
+    try:
+        # join() instead of += per page/row keeps large files linear
+        parts, length = [], 0
+        for piece in pieces:
+            parts.append(piece)
+            length += len(piece)
+            if max_chars is not None and length >= max_chars:
+                break
+        text = "".join(parts)[:max_chars]
 
         char_count = len(text.strip())
-        print(f"--- DEBUG: Extracted {char_count} characters from {file_name} ---")
+        logger.debug("Extracted %s characters from %s", char_count, file_name)
         if char_count == 0:
             return " Could not extract any readable text."
 
         return text.strip()
     except Exception as e:
         return f" ERROR processing file in memory: {e}"
+    finally:
+        pieces.close()
+        EXTRACTION_SECONDS.observe(time.perf_counter() - started, ext=ext)
+
+
+def extract_document_text(document):
+    """Text of a freshly uploaded document, or "" when nothing readable was found."""
+    with document.file.open("rb") as f:
+        text = extract_text(f, document.file.name)
+    # extract_text reports problems as messages starting with a space
+    return "" if text.startswith(" ") else text
+
+
+@timed("drive-upload")
+def push_to_drive(service, local_path, filename):
+    """Uploads a stored file to Drive and returns its id/webViewLink/webContentLink."""
+    media = MediaFileUpload(local_path, resumable=True)
+    metadata = {"name": filename}
+    folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
+    if folder_id:
+        metadata["parents"] = [folder_id]
+    drive_file = service.files().create(body=metadata, media_body=media, fields="id, webViewLink, webContentLink").execute()
+    DRIVE_BYTES.inc(media.size(), direction="upload")
+    return drive_file
+
+
+# ===========================================================
+# 📦 BULK UPLOAD
+# ===========================================================
+_bulk_local = threading.local()
+_bulk_pool = None
+_bulk_pool_lock = threading.Lock()
+
+
+def bulk_upload_pool():
+    """Process-wide pool, so concurrent bulk uploads share one bound on Drive connections."""
+    global _bulk_pool
+    with _bulk_pool_lock:
+        if _bulk_pool is None:
+            _bulk_pool = ThreadPoolExecutor(
+                max_workers=settings.BULK_UPLOAD_MAX_WORKERS, thread_name_prefix="bulk-upload"
+            )
+    return _bulk_pool
+
+
+def thread_drive_service():
+    # Drive clients (httplib2) aren't thread-safe: each pool thread keeps its own
+    fake = fake_backends_enabled()
+    if getattr(_bulk_local, "fake", None) is not fake:
+        _bulk_local.service = get_drive_service()
+        _bulk_local.fake = fake
+    return _bulk_local.service
+
+
+def store_bulk_file(document, upload):
+    """
+    Saves one upload to storage, hashes and extracts it, then pushes it to
+    Drive. Runs in a pool thread and never touches the database.
+    """
+    document.file.save(upload.name, upload, save=False)
+    document.content_hash = file_sha256(document.file)
+    document.extracted_text = extract_document_text(document)
+    apply_document_stats(document)
+    local_path = document.file.path
+    filename = f"user_{document.user_id}_{os.path.basename(local_path)}"
+    try:
+        drive_file = push_to_drive(thread_drive_service(), local_path, filename)
+        document.drive_file_id = drive_file.get("id")
+        document.file_url = drive_file.get("webViewLink")
+        document.web_content_link = drive_file.get("webContentLink")
+        os.remove(local_path)
+    except Exception:
+        # Same fallback as single uploads: the file stays local
+        logger.exception("Drive upload failed for '%s'; keeping the local file", document.file.name)
+    return document
 
 
 # --- API VIEWS ---
@@ -249,12 +402,12 @@ class DocumentUploadView(APIView):
             # --- 5. Delete local file after successful upload ---
             try:
                 os.remove(local_path)
-                print(f"✅ DRIVE INFO: Uploaded '{filename}' and removed local copy.")
+                logger.info("Uploaded '%s' to Drive and removed the local copy", filename)
             except Exception as del_err:
-                print(f"⚠️ Warning: Uploaded but could not delete local file: {del_err}")
+                logger.warning("Uploaded '%s' but could not delete the local file: %s", filename, del_err)
 
-        except Exception as e:
-            print(f"❌ DRIVE UPLOAD FAILED: {e}")
+        except Exception:
+            logger.exception("Drive upload failed for '%s'; keeping the local file", document.file.name)
             # File stays locally if upload fails (safe fallback)
 
         # ✅ Return document data (even if Drive upload failed)
@@ -265,75 +418,154 @@ class DocumentUploadView(APIView):
         serializer = DocumentSerializer(data=request.data, context={"request": request})
         if not serializer.is_valid(): return Response(serializer.errors, status=400)
         document = serializer.save(user=request.user)
+        document.content_hash = file_sha256(document.file)
+        document.extracted_text = extract_document_text(document)
+        apply_document_stats(document)
+        document.save(update_fields=[
+            "content_hash", "extracted_text", "page_count", "char_count", "language", "estimated_tokens",
+        ])
         try:
             local_path = document.file.path
             filename = f"user_{request.user.id}_{os.path.basename(local_path)}"
-            
-            service = get_drive_service()
-            folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
-            media = MediaFileUpload(local_path, resumable=True)
-            metadata = {"name": filename, "parents": [folder_id]}
-            drive_file = service.files().create(body=metadata, media_body=media, fields="id, webViewLink, webContentLink").execute()
-            
+            drive_file = push_to_drive(get_drive_service(), local_path, filename)
+
             document.drive_file_id = drive_file.get("id")
             document.file_url = drive_file.get("webViewLink")
             document.web_content_link = drive_file.get("webContentLink")
-            document.save()
+            document.save(update_fields=["drive_file_id", "file_url", "web_content_link"])
 
             os.remove(local_path)
-            print(f"DRIVE INFO: Successfully uploaded '{filename}' and removed local copy.")
+            logger.info("Uploaded '%s' to Drive and removed the local copy", filename)
 
-        except Exception as e:
-            print(f"DRIVE UPLOAD FAILED: {e}")
-            pass
+        except Exception:
+            logger.exception("Drive upload failed for '%s'; keeping the local file", document.file.name)
         return Response(DocumentSerializer(document).data, status=201)
 
 
-class SummarizeView(APIView):
+class BulkUploadView(APIView):
+    """
+    Many files in one multipart request (`files` repeated). All files are
+    validated before anything is stored; valid ones are then stored and
+    pushed to Drive concurrently and inserted with a single bulk_create.
+    Responds 201 when every file was stored, 207 with per-file status otherwise.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
-    def post(self, request):
-        file_ids = request.data.get("files", [])
-        if not isinstance(file_ids, list):
-            return Response({"error": "files must be a list of IDs"}, status=400)
+    def post(self, request, *args, **kwargs):
+        uploads = request.FILES.getlist("files")
+        if not uploads:
+            return Response({"error": "No files provided."}, status=400)
+        if len(uploads) > settings.BULK_UPLOAD_MAX_FILES:
+            return Response({"error": f"At most {settings.BULK_UPLOAD_MAX_FILES} files per request."}, status=400)
+
+        results, pending = [], []
+        for upload in uploads:
+            serializer = DocumentSerializer(data={"file": upload})
+            if serializer.is_valid():
+                results.append({"name": upload.name, "status": "stored"})
+                pending.append((len(results) - 1, upload))
+            else:
+                results.append({"name": upload.name, "status": "invalid", "errors": serializer.errors["file"]})
+        if not pending:
+            return Response({"results": results}, status=400)
+
+        # Each task runs in a copy of the request's context so its spans reach the request trace
+        futures = [
+            (index, bulk_upload_pool().submit(copy_context().run, store_bulk_file, Document(user=request.user), upload))
+            for index, upload in pending
+        ]
+        documents = []
+        for index, future in futures:
+            try:
+                documents.append((index, future.result()))
+            except Exception as e:
+                logger.exception("Bulk upload failed for '%s'", results[index]["name"])
+                results[index].update(status="failed", error=str(e))
 
-        docs = Document.objects.filter(id__in=file_ids, user=request.user)
-        if not docs.exists():
-            return Response({"error": "No documents found for this user."}, status=404)
+        created = Document.objects.bulk_create([document for _, document in documents])
+        # bulk_create skips post_save, so index the new documents here
+        save_entries([document_entry(document) for document in created if document.extracted_text], replace=False)
+        for (index, _), document in zip(documents, created):
+            results[index]["document"] = DocumentSerializer(document).data
 
-        drive_service = get_drive_service()
-        combined_text = ""
+        all_stored = all(result["status"] == "stored" for result in results)
+        return Response({"results": results}, status=201 if all_stored else status.HTTP_207_MULTI_STATUS)
 
-        for doc in docs:
-            text = ""
-            try:
-                if doc.drive_file_id and drive_service:
-                    print(f"Summarizer: Processing Google Drive file: {doc.file.name}")
-                    gdrive_request = drive_service.files().get_media(fileId=doc.drive_file_id)
-                    file_content_stream = BytesIO()
-                    downloader = MediaIoBaseDownload(file_content_stream, gdrive_request)
-                    done = False
-                    while not done:
-                        _, done = downloader.next_chunk()
-                    file_content_stream.seek(0)
-                    text = extract_text(file_content_stream, doc.file.name)
-                else:
-                    # fallback: local file
-                    print(f"Summarizer: Processing local file: {doc.file.path}")
-                    with open(doc.file.path, 'rb') as f:
-                        file_content_stream = BytesIO(f.read())
-                    text = extract_text(file_content_stream, doc.file.name)
-            except Exception as e:
-                text = f"⚠️ ERROR extracting text from {doc.file.name}: {e}"
-            combined_text += text + "\n\n"
 
-        if not combined_text.strip():
-            return Response({"error": "No readable text could be extracted from the document(s)."}, status=400)
+class SummarizeError(Exception):
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
 
-        # --- Gemini Summarization ---
+
+def download_drive_file(drive_service, file_id):
+    """
+    Downloads a Drive file into a SpooledTemporaryFile: kept in memory up to
+    DOCUMENT_SPOOL_BYTES, spilled to disk beyond that. Returned rewound;
+    the caller closes it.
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=settings.DOCUMENT_SPOOL_BYTES)
+    try:
+        # The default chunk is 100MB, i.e. the whole file in one response body
+        downloader = MediaIoBaseDownload(buffer, drive_service.files().get_media(fileId=file_id), chunksize=1024 * 1024)
+        done = False
+        with span("drive-download"):
+            while not done:
+                _, done = downloader.next_chunk()
+        DRIVE_BYTES.inc(buffer.tell(), direction="download")
+        buffer.seek(0)
+        return buffer
+    except Exception:
+        buffer.close()
+        raise
+
+
+def summarize_documents(user, docs, progress=None):
+    """
+    Runs the full summarize pipeline (download, extract, Gemini) for `docs`
+    and returns the new SummarizationSession. Raises SummarizeError for
+    failures that should be reported to the client as-is. `progress`, if
+    given, is called with (stage, percent) as the pipeline advances.
+    Only the first SUMMARIZE_MAX_TEXT_CHARS characters go into the prompt,
+    so extraction stops there and later documents aren't read at all.
+    """
+    drive_service = get_drive_service()
+    budget = settings.SUMMARIZE_MAX_TEXT_CHARS
+    parts, used = [], 0
+
+    for index, doc in enumerate(docs):
+        if used >= budget:
+            break
+        if progress:
+            progress("extracting", 5 + 55 * index // len(docs))
+        text = ""
         try:
-            client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
-            prompt = f"""
+            if doc.extracted_text:
+                # Extracted at upload time; no need to download the file again
+                text = doc.extracted_text[:budget - used]
+            elif doc.drive_file_id and drive_service:
+                logger.info("Summarizer: reading Drive file %s", doc.file.name)
+                with download_drive_file(drive_service, doc.drive_file_id) as file_content_stream:
+                    text = extract_text(file_content_stream, doc.file.name, max_chars=budget - used)
+            else:
+                # fallback: local file, read straight from disk
+                logger.info("Summarizer: reading local file %s", doc.file.path)
+                with open(doc.file.path, 'rb') as f:
+                    text = extract_text(f, doc.file.name, max_chars=budget - used)
+        except Exception as e:
+            text = f"⚠️ ERROR extracting text from {doc.file.name}: {e}"
+        parts.append(text + "\n\n")
+        used += len(text) + 2
+    combined_text = "".join(parts)
+
+    if not combined_text.strip():
+        raise SummarizeError("No readable text could be extracted from the document(s).", status=400)
+
+    # --- Gemini Summarization ---
+    if progress:
+        progress("summarizing", 60)
+    client = get_gemini_client()
+    prompt = f"""
 You are a professional document analyst. 
 Summarize the following document(s) into a **highly detailed, well-structured Markdown report**.
 
@@ -372,44 +604,287 @@ Your output MUST strictly follow this structure:
 
 ---
 📄 Document Content:
-{combined_text[:12000]}
+{combined_text[:budget]}
 """
 
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[{"role": "user", "parts": [{"text": prompt}]}]
-            )
-            summary_text = getattr(response, "text", None)
-            if not summary_text:
-                return Response({"error": "Gemini returned no summary."}, status=500)
+    summary_text = generate_text(
+        contents=[{"role": "user", "parts": [{"text": prompt}]}],
+        endpoint="summarize",
+        user=user,
+        prompt_chars=len(prompt),
+        client=client,
+    )
+    if not summary_text:
+        raise SummarizeError("Gemini returned no summary.")
+
+    if progress:
+        progress("saving", 95)
+    return SummarizationSession.objects.create(
+        user=user,
+        document=docs[0],
+        title=f'Summary of "{os.path.basename(docs[0].file.name)}"',
+        summary_text=summary_text,
+    )
+
+
+def summarize_for_user(user, docs, progress=None, wait=None):
+    """
+    summarize_documents, coalesced: identical concurrent requests (double-
+    fired POSTs, two tabs, a job and a direct request) wait on one
+    computation instead of each downloading and calling Gemini.
+    Returns (session, shared).
+    """
+    session, shared = coalesce_summary(
+        summary_flight_key(user, docs),
+        user,
+        lambda: summarize_documents(user, docs, progress),
+        wait=wait,
+    )
+    if session.user_id != user.id:
+        # Shared across users by content hash: give this user their own session
+        session = SummarizationSession.objects.create(
+            user=user,
+            document=docs[0],
+            title=f'Summary of "{os.path.basename(docs[0].file.name)}"',
+            summary_text=session.summary_text,
+        )
+    return session, shared
 
-            session = SummarizationSession.objects.create(
-                user=request.user,
-                document=docs.first(),
-                title=f'Summary of "{os.path.basename(docs.first().file.name)}"',
-                summary_text=summary_text,
-            )
 
-            return Response({
-                "session_id": session.id,
-                "title": session.title,
-                "summary": summary_text,
-                "created_at": session.created_at.isoformat(),
-            }, status=200)
+def summarize_failure(error):
+    """(message, status) reported to the client for a failed summarize."""
+    if isinstance(error, SummarizeError):
+        return str(error), error.status
+    if isinstance(error, FlightTimeout):
+        return str(error), 503
+    if isinstance(error, exceptions.GoogleAPICallError):
+        return f"Gemini API Error: {error.message}", 500
+    return f"Unexpected error: {str(error)}", 500
+
 
-        except exceptions.GoogleAPICallError as e:
-            return Response({"error": f"Gemini API Error: {e.message}"}, status=500)
+class SummarizeView(APIView):
+    """
+    Summarizes synchronously by default. With `"async": true` in the body
+    (or `Prefer: respond-async`) the work is queued for summarize_worker
+    and the response is 202 with the job's status and event-stream URLs.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        file_ids = request.data.get("files", [])
+        if not isinstance(file_ids, list):
+            return Response({"error": "files must be a list of IDs"}, status=400)
+
+        docs = list(Document.objects.filter(id__in=file_ids, user=request.user).order_by("id"))
+        if not docs:
+            return Response({"error": "No documents found for this user."}, status=404)
+
+        if request.data.get("async") is True or "respond-async" in request.headers.get("Prefer", ""):
+            job = enqueue_job(request.user, docs)
+            status_url = reverse("summarize-job", args=[job.id])
+            response = Response({
+                **job_payload(job),
+                "status_url": request.build_absolute_uri(status_url),
+                "events_url": job_events_url(request, job),
+            }, status=202)
+            response["Location"] = status_url
+            return response
+
+        try:
+            session, shared = summarize_for_user(request.user, docs)
         except Exception as e:
-            return Response({"error": f"Unexpected error: {str(e)}"}, status=500)
+            message, error_status = summarize_failure(e)
+            return Response({"error": message}, status=error_status)
+
+        return Response({
+            "session_id": session.id,
+            "title": session.title,
+            "summary": session.summary_text,
+            "created_at": session.created_at.isoformat(),
+            "coalesced": shared,
+        }, status=200)
+
+
+# ===========================================================
+# 🧮 SUMMARIZE ESTIMATE
+# ===========================================================
+class SummarizeEstimateView(APIView):
+    """
+    Pre-flight for POST /documents/summarize/ with the same body: the
+    stored statistics of each file plus estimated tokens, cost, latency
+    and strategy. Reads rows only; no file is downloaded or parsed.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        file_ids = request.data.get("files", [])
+        if not isinstance(file_ids, list):
+            return Response({"error": "files must be a list of IDs"}, status=400)
+
+        docs = list(
+            Document.objects.filter(id__in=file_ids, user=request.user).defer("extracted_text").order_by("id")
+        )
+        if not docs:
+            return Response({"error": "No documents found for this user."}, status=404)
+        return Response(summarize_estimate(docs))
+
+
+# ===========================================================
+# ⏳ SUMMARIZE JOBS
+# ===========================================================
+def job_events_url(request, job):
+    """Signed, short-lived event-stream link (EventSource can't send the Authorization header)."""
+    url = request.build_absolute_uri(reverse("summarize-job-events", args=[job.id]))
+    return f"{url}?{urlencode({'sig': sign_media_link(job.user_id, 'job', job.id)})}"
+
+
+class SummarizeJobView(APIView):
+    """
+    Status, progress and (once done) the result of a queued summarize job,
+    plus a fresh `events_url` for clients whose previous link expired.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = SummarizeJob.objects.select_related("session").filter(id=job_id, user=request.user).first()
+        if job is None:
+            return Response({"error": "Job not found"}, status=404)
+        data = job_payload(job)
+        if job.status in SummarizeJob.ACTIVE_STATUSES:
+            data["events_url"] = job_events_url(request, job)
+        response = Response(data)
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class SummarizeJobEventsView(APIView):
+    """
+    The same status document as server-sent events, until the job finishes.
+    Authenticated only by the signed `events_url` from the job responses.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SignedURLAuthentication]
+    signed_url_scope, signed_url_kwarg = "job", "job_id"
+
+    def get(self, request, job_id):
+        if not SummarizeJob.objects.filter(id=job_id, user=request.user).exists():
+            return Response({"error": "Job not found"}, status=404)
+        response = StreamingHttpResponse(job_events(job_id, request.user.id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-store"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
 # ===========================================================
 # 🧾 LIST SUMMARIES
 # ===========================================================
+class SessionCursorPagination(CursorPagination):
+    ordering = "-created_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class MessageCursorPagination(CursorPagination):
+    ordering = "created_at"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
 class SummarizeListView(APIView):
+    """
+    Cursor-paginated list of the user's sessions. Rows are slim: the summary
+    text and messages are served by SummarizeDetailView.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        sessions = SummarizationSession.objects.filter(user=request.user).order_by("-created_at")
-        return Response(SummarizationSessionSerializer(sessions, many=True).data, status=200)
+        # Unchanged polls get 304 (or the cached payload) without touching sessions
+        versioned = VersionedResponse(request)
+        if versioned.not_modified:
+            return versioned.not_modified
+        data = versioned.cached_data()
+        if data is None:
+            sessions = (
+                SummarizationSession.objects.filter(user=request.user)
+                .select_related("document")
+                .defer("summary_text")
+                .annotate(message_count=Count("messages"))
+            )
+            paginator = SessionCursorPagination()
+            page = paginator.paginate_queryset(sessions, request, view=self)
+            data = versioned.store(
+                paginator.get_paginated_response(SummarizationSessionListSerializer(page, many=True).data).data
+            )
+        return versioned.finalize(Response(data, status=200))
+
+
+class SummarizeDetailView(APIView):
+    """
+    One session with its summary text and a cursor-paginated page of its
+    chat messages (oldest first; follow `messages.next` for more).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, session_id):
+        versioned = VersionedResponse(request)
+        if versioned.not_modified:
+            return versioned.not_modified
+        data = versioned.cached_data()
+        if data is None:
+            try:
+                session = (
+                    SummarizationSession.objects.select_related("document")
+                    .annotate(message_count=Count("messages"))
+                    .get(id=session_id, user=request.user)
+                )
+            except SummarizationSession.DoesNotExist:
+                return Response({"error": "Session not found"}, status=404)
+
+            paginator = MessageCursorPagination()
+            page = paginator.paginate_queryset(session.messages.all(), request, view=self)
+            data = SummarizationSessionDetailSerializer(session).data
+            data["messages"] = paginator.get_paginated_response(
+                SummarizationMessageSerializer(page, many=True).data
+            ).data
+            versioned.store(data)
+        return versioned.finalize(Response(data, status=200))
+
+# ===========================================================
+# 🔎 SEARCH
+# ===========================================================
+class SearchView(APIView):
+    """
+    Ranked full-text search over the user's documents, summaries and chat
+    messages: `?q=...&kind=summary,message&page=2`. Snippets are HTML-escaped
+    with matches wrapped in <mark>.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required"}, status=400)
+        kinds = [k for k in request.query_params.get("kind", "").split(",") if k]
+        valid_kinds = {choice for choice, _ in SearchEntry._meta.get_field("kind").choices}
+        if not set(kinds) <= valid_kinds:
+            return Response({"error": f"kind must be one of {', '.join(sorted(valid_kinds))}"}, status=400)
+        try:
+            page = max(1, int(request.query_params.get("page", 1)))
+            page_size = min(100, max(1, int(request.query_params.get("page_size", settings.SEARCH_PAGE_SIZE))))
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=400)
+
+        total, rows = search(request.user, query, kinds, limit=page_size, offset=(page - 1) * page_size)
+        url = request.build_absolute_uri()
+        return Response({
+            "count": total,
+            "next": replace_query_param(url, "page", page + 1) if page * page_size < total else None,
+            "previous": replace_query_param(url, "page", page - 1) if page > 1 else None,
+            "results": rows,
+        }, status=200)
+
 
 # ===========================================================
 # 💬 CHAT WITH SUMMARY
@@ -427,23 +902,43 @@ class SummarizeChatView(APIView):
         except SummarizationSession.DoesNotExist:
             return Response({"error": "Session not found"}, status=404)
 
-        prompt = f"""
+        # Repeated questions (double-submits, refreshes) are served from the
+        # answer cache; concurrent duplicates wait on the in-flight call.
+        cache_key = answer_cache_key(session, query)
+        answer = answer_cache.get(cache_key)
+        if answer is not None:
+            return Response({"reply": answer, "cached": True}, status=200)
+
+        def ask_gemini():
+            prompt = f"""
 Context:
 {session.summary_text}
 
 User Question:
 {query}
 """
-        client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[types.Content(role="user", parts=[types.Part(text=prompt)])]
-        )
-        answer = getattr(response, "text", None) or "⚠️ No response."
+            answer = generate_text(
+                contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
+                endpoint="chat",
+                user=request.user,
+                prompt_chars=len(prompt),
+            )
 
-        SummarizationMessage.objects.create(session=session, role="user", content=query)
-        SummarizationMessage.objects.create(session=session, role="assistant", content=answer)
-        return Response({"reply": answer}, status=200)
+            messages = SummarizationMessage.objects.bulk_create([
+                SummarizationMessage(session=session, role="user", content=query),
+                SummarizationMessage(session=session, role="assistant", content=answer or "⚠️ No response."),
+            ])
+            # bulk_create skips post_save: one version bump and one index write for the pair
+            bump_content_version(session.user_id)
+            save_entries([message_entry(message, session) for message in messages], replace=False)
+            if not answer:
+                # Not cached: asking again should reach Gemini again
+                return "⚠️ No response."
+            answer_cache.set(cache_key, answer)
+            return answer
+
+        answer, shared = answer_flights.do(cache_key, ask_gemini)
+        return Response({"reply": answer, "cached": shared}, status=200)
 
 # ===========================================================
 # 🔊 AUDIO SUMMARY
@@ -454,6 +949,8 @@ class AudioSummarizeView(APIView):
     def post(self, request, session_id):
         lang = request.data.get("language", "en")
         try:
+            if not supports_language(lang):
+                return Response({"error": f"Unsupported language '{lang}'."}, status=400)
             session = SummarizationSession.objects.get(id=session_id, user=request.user)
             
             # 1. Prepare narration text (clean up markdown)
@@ -461,31 +958,192 @@ class AudioSummarizeView(APIView):
             if not narration:
                 return Response({"error": "Summary text is empty, cannot generate audio."}, status=400)
 
-            # 2. Generate the TTS audio directly into an in-memory buffer
-            print(f"--- AUDIO: Generating TTS for session {session_id} in '{lang}' ---")
-            audio_buffer = BytesIO()
-            tts = gTTS(narration, lang=lang)
-            tts.write_to_fp(audio_buffer)
-            audio_buffer.seek(0)
-            print("--- AUDIO: TTS generated in memory. ---")
-
-            # 3. Upload the in-memory audio file to Google Drive
-            drive_filename = f"audio_summary_user_{request.user.id}_session_{session_id}_{lang}.mp3"
-            print(f"--- AUDIO: Uploading '{drive_filename}' to Google Drive... ---")
-            
-            drive_file = upload_file_to_drive(audio_buffer, drive_filename, mimetype='audio/mpeg')
-            drive_link = drive_file.get("webViewLink") # Use the view link for browser playback
-            
-            print(f"--- AUDIO: Upload successful. Link: {drive_link} ---")
+            # 2. Synthesize and upload once per (session, language, narration);
+            #    repeats and concurrent duplicates reuse the stored Drive link
+            def generate_audio():
+                logger.info("Generating TTS for session %s in '%s'", session_id, lang)
+                audio_buffer = BytesIO(synthesize(narration, lang))
+
+                # 3. Upload the in-memory audio file to Google Drive
+                drive_filename = f"audio_summary_user_{request.user.id}_session_{session_id}_{lang}.mp3"
+                drive_file = upload_file_to_drive(audio_buffer, drive_filename, mimetype='audio/mpeg')
+                logger.info("Uploaded narration '%s' to Drive: %s", drive_filename, drive_file.get("webViewLink"))
+                return {
+                    "drive_file_id": drive_file.get("id") or "",
+                    "audio_url": drive_file.get("webViewLink") or "",  # view link for browser playback
+                }
+
+            audio, cached = single_flight(
+                SessionAudio,
+                lookup={
+                    "session": session,
+                    "language": lang,
+                    "narration_hash": hashlib.sha256(narration.encode("utf-8")).hexdigest(),
+                },
+                compute=generate_audio,
+                lease=settings.AUDIO_FLIGHT_LEASE,
+                wait=settings.AUDIO_FLIGHT_WAIT,
+                poll_interval=settings.AUDIO_FLIGHT_POLL_INTERVAL,
+            )
 
             # 4. Return the public Google Drive URL
             return Response({
-                "audio_url": drive_link,
-                "narration": narration # Still useful to send back for the UI
+                "audio_url": audio.audio_url,
+                "narration": narration, # Still useful to send back for the UI
+                "cached": cached,
             }, status=200)
 
         except SummarizationSession.DoesNotExist:
             return Response({"error": "Session not found"}, status=404)
+        except FlightTimeout as e:
+            return Response({"error": str(e)}, status=503, headers={"Retry-After": str(settings.AUDIO_FLIGHT_WAIT)})
         except Exception as e:
             return Response({"error": f"Failed to generate audio summary: {str(e)}"}, status=500)
 
+
+
+# ===========================================================
+# 📻 STREAMING AUDIO SUMMARY
+# ===========================================================
+# A live synthesis holds a server thread until the last segment is sent
+_live_streams = threading.BoundedSemaphore(settings.AUDIO_STREAM_MAX_CONCURRENT)
+
+
+class AudioStreamView(APIView):
+    """
+    Streams the narration MP3 as each segment is synthesized, so playback
+    starts after the first sentence instead of after synthesis + Drive
+    upload + download. The finished file is persisted to Drive in the
+    background and later requests stream the stored copy. At most
+    AUDIO_STREAM_MAX_CONCURRENT live syntheses run per process; beyond that
+    the client gets a 503 and can retry or use the non-streaming endpoint.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    # Only the signed link from AudioStreamLinkView: <audio src> can't send the Authorization header
+    authentication_classes = [SignedURLAuthentication]
+    signed_url_scope, signed_url_kwarg = "audio", "session_id"
+
+    def get(self, request, session_id):
+        lang = request.query_params.get("language", "en")
+        if not supports_language(lang):
+            return Response({"error": f"Unsupported language '{lang}'."}, status=400)
+        try:
+            session = SummarizationSession.objects.get(id=session_id, user=request.user)
+        except SummarizationSession.DoesNotExist:
+            return Response({"error": "Session not found"}, status=404)
+
+        narration = session.summary_text.replace("**", "").replace("#", "").strip()
+        if not narration:
+            return Response({"error": "Summary text is empty, cannot generate audio."}, status=400)
+
+        lookup = {
+            "session": session,
+            "language": lang,
+            "narration_hash": hashlib.sha256(narration.encode("utf-8")).hexdigest(),
+        }
+        stored = SessionAudio.objects.filter(status=SessionAudio.STATUS_DONE, **lookup).exclude(drive_file_id="").first()
+        if stored:
+            chunks = stream_drive_file(stored.drive_file_id)
+        else:
+            if not _live_streams.acquire(blocking=False):
+                return Response({"error": "Too many narrations are being generated; try again shortly."},
+                                status=503, headers={"Retry-After": "5"})
+            drive_filename = f"audio_summary_user_{request.user.id}_session_{session_id}_{lang}.mp3"
+            chunks = StreamSlot(_live_streams, synthesize_and_persist(narration, lang, lookup, drive_filename))
+
+        response = StreamingHttpResponse(chunks, content_type="audio/mpeg")
+        response["Cache-Control"] = "no-store"
+        response["X-Accel-Buffering"] = "no"  # keep proxies from buffering the whole file
+        return response
+
+
+class AudioStreamLinkView(APIView):
+    """A short-lived signed URL for AudioStreamView, to put in <audio src>."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, session_id):
+        lang = request.query_params.get("language", "en")
+        if not supports_language(lang):
+            return Response({"error": f"Unsupported language '{lang}'."}, status=400)
+        if not SummarizationSession.objects.filter(id=session_id, user=request.user).exists():
+            return Response({"error": "Session not found"}, status=404)
+        query = urlencode({
+            "language": lang,
+            "sig": sign_media_link(request.user.id, "audio", session_id),
+        })
+        url = request.build_absolute_uri(reverse("audio-stream", args=[session_id]))
+        response = Response({"stream_url": f"{url}?{query}", "expires_in": settings.SIGNED_URL_MAX_AGE})
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class StreamSlot:
+    """
+    Streaming body that holds one slot of an already-acquired `semaphore`.
+    The slot is freed in close(), which the WSGI server calls once the
+    response is done with, even if no chunk was ever pulled; a generator's
+    own finally would not run in that case and the slot would leak.
+    """
+
+    def __init__(self, semaphore, chunks):
+        self.semaphore = semaphore
+        self.chunks = chunks
+        self._released = False
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        try:
+            if hasattr(self.chunks, "close"):
+                self.chunks.close()
+        finally:
+            with self._lock:
+                if not self._released:
+                    self._released = True
+                    self.semaphore.release()
+
+
+def stream_drive_file(file_id, chunk_size=256 * 1024):
+    """Yields a Drive file's bytes chunk by chunk as they are downloaded."""
+    drive_service = get_drive_service()
+    buffer = BytesIO()
+    downloader = MediaIoBaseDownload(buffer, drive_service.files().get_media(fileId=file_id), chunksize=chunk_size)
+    done = False
+    while not done:
+        _, done = downloader.next_chunk()
+        DRIVE_BYTES.inc(buffer.tell(), direction="download")
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def synthesize_and_persist(narration, lang, lookup, drive_filename):
+    """
+    Yields MP3 segments in order as they are synthesized. Once the whole
+    narration has been sent, uploads it to Drive on a background thread and
+    records it as SessionAudio for later cache hits.
+    """
+    parts = []
+    for audio in iter_synthesize(narration, lang):
+        parts.append(audio)
+        yield audio
+
+    def persist():
+        try:
+            def upload():
+                drive_file = upload_file_to_drive(BytesIO(b"".join(parts)), drive_filename, mimetype='audio/mpeg')
+                return {
+                    "drive_file_id": drive_file.get("id") or "",
+                    "audio_url": drive_file.get("webViewLink") or "",
+                }
+            # Another request already uploading the same narration wins; this copy is dropped
+            single_flight(SessionAudio, lookup=lookup, compute=upload, lease=settings.AUDIO_FLIGHT_LEASE, wait=0)
+            logger.info("Persisted streamed narration '%s'", drive_filename)
+        except Exception:
+            logger.exception("Could not persist streamed narration '%s'", drive_filename)
+        finally:
+            connection.close()
+
+    threading.Thread(target=persist, daemon=True).start()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, OneTimePassword
+from .models import User, OneTimePassword, OutboxEmail
 
 
 class UserAdmin(BaseUserAdmin):
@@ -27,4 +27,12 @@ class OTPAdmin(admin.ModelAdmin):
     list_display = ("user", "code", "purpose", "is_used", "created_at", "expires_at")
     list_filter = ("purpose", "is_used", "created_at")
     search_fields = ("user__email", "code")
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "to", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
 admin.site.register(User, UserAdmin)
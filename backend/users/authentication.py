@@ -0,0 +1,122 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from backend.timing import timed
+from documents.cache import TTLCache
+
+
+# token hash -> (user_id, is_active); see CachedTokenAuthentication
+token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL, name="auth-token")
+
+
+def token_cache_key(key):
+    # Never put raw tokens into a shared cache
+    return "authtoken:" + hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def invalidate_tokens(keys):
+    cache_keys = [token_cache_key(key) for key in keys]
+    for cache_key in cache_keys:
+        token_cache.delete(cache_key)
+    if settings.AUTH_TOKEN_SHARED_CACHE_TTL:
+        cache.delete_many(cache_keys)
+
+
+def invalidate_user_tokens(user_ids):
+    """
+    Drops the cached entries of every token of `user_ids`. The post_save
+    signal calls this on deactivation; code that deactivates users with
+    QuerySet.update() (no signals) must call it itself.
+    """
+    invalidate_tokens(Token.objects.filter(user_id__in=user_ids).values_list("key", flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers token -> user in an in-process LRU
+    (AUTH_TOKEN_CACHE_TTL) and, when AUTH_TOKEN_SHARED_CACHE_TTL is set, in
+    the shared Django cache, so most requests skip the token/user join.
+    Deleting a token (logout) or deactivating a user invalidates it here and
+    in the shared cache; other processes' LRUs catch up within their TTL.
+
+    Only (user_id, is_active) is cached, never the user row, so no password
+    hash reaches the shared cache and profile or password edits cannot go
+    stale. request.user is a deferred User with only id and is_active loaded;
+    the first read of any other field loads the rest of the row in one query
+    (User.refresh_from_db), which the document views never need. Deactivations through QuerySet.update() skip the signal; follow
+    them with invalidate_user_tokens() or they take effect after the TTLs.
+    """
+
+    @timed("auth")
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        entry = token_cache.get(cache_key)
+        if entry is None and settings.AUTH_TOKEN_SHARED_CACHE_TTL:
+            entry = cache.get(cache_key)
+            if entry is not None:
+                token_cache.set(cache_key, entry)
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            entry = (user.pk, user.is_active)
+            token_cache.set(cache_key, entry)
+            if settings.AUTH_TOKEN_SHARED_CACHE_TTL:
+                cache.set(cache_key, entry, settings.AUTH_TOKEN_SHARED_CACHE_TTL)
+            return user, token
+
+        user_id, is_active = entry
+        if not is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        # Fresh, mostly deferred instances per request: views that only filter by user cost no query
+        user = get_user_model().from_db(None, ["id", "is_active"], [user_id, is_active])
+        return user, Token.from_db(None, ["key", "user_id"], [key, user_id])
+
+
+# ===========================================================
+# 🔗 SIGNED MEDIA LINKS
+# ===========================================================
+_media_signer = TimestampSigner(salt="users.media-link")
+
+
+def sign_media_link(user_id, scope, resource_id):
+    """
+    A `sig` query value that lets its holder fetch one resource (e.g.
+    scope "audio", the session id) as `user_id` for SIGNED_URL_MAX_AGE
+    seconds. For endpoints consumed by <audio src> and EventSource, which
+    cannot send an Authorization header; the API token never goes in a URL.
+    """
+    return _media_signer.sign(f"{user_id}:{scope}:{resource_id}")
+
+
+class SignedURLAuthentication(BaseAuthentication):
+    """
+    Accepts a `?sig=` from sign_media_link for the view's own resource: the
+    view names it with `signed_url_scope` and the URL kwarg `signed_url_kwarg`.
+    """
+
+    def authenticate(self, request):
+        signature = request.query_params.get("sig")
+        if not signature:
+            return None
+        context = request.parser_context or {}
+        view = context.get("view")
+        expected = f"{view.signed_url_scope}:{context.get('kwargs', {}).get(view.signed_url_kwarg)}"
+        try:
+            value = _media_signer.unsign(signature, max_age=settings.SIGNED_URL_MAX_AGE)
+        except SignatureExpired:
+            raise exceptions.AuthenticationFailed("This link has expired.")
+        except BadSignature:
+            raise exceptions.AuthenticationFailed("Invalid link signature.")
+        user_id, _, resource = value.partition(":")
+        if resource != expected:
+            raise exceptions.AuthenticationFailed("This link is for a different resource.")
+        user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        return user, None
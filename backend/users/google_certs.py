@@ -0,0 +1,189 @@
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from google.auth import jwt
+from google.auth.transport import requests as google_requests
+
+from documents.fakes import fake_backends_enabled
+
+logger = logging.getLogger(__name__)
+
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def cache_lifetime(headers, default):
+    """Seconds the response may be cached for, from Cache-Control max-age minus Age."""
+    lowered = {k.lower(): v for k, v in headers.items()}
+    match = MAX_AGE.search(lowered.get("cache-control", ""))
+    if not match:
+        return default
+    try:
+        age = int(lowered.get("age", 0))
+    except ValueError:
+        age = 0
+    return max(0, int(match.group(1)) - age)
+
+
+class GoogleCertCache:
+    """
+    Google's ID-token signing certs ({key id: x509 PEM}), cached in-process
+    for as long as the response's Cache-Control allows. Close to expiry a
+    background thread refreshes them while the current set keeps serving;
+    only the very first fetch, or a token signed with a key id we have not
+    seen yet (key rotation), blocks a login on the network.
+    """
+
+    def __init__(self, url=GOOGLE_CERTS_URL, fetch=None):
+        self.url = url
+        self._fetch = fetch or self.fetch_from_google
+        self._certs = None
+        self._expires_at = 0
+        self._last_forced = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._request = None
+
+    def fetch_from_google(self):
+        if self._request is None:
+            # One session, so refreshes reuse the keep-alive connection
+            self._request = google_requests.Request()
+        response = self._request(self.url, method="GET")
+        if response.status != 200:
+            raise ValueError(f"Could not fetch Google certs ({response.status})")
+        lifetime = cache_lifetime(response.headers, settings.GOOGLE_CERTS_DEFAULT_TTL)
+        return json.loads(response.data.decode("utf-8")), lifetime
+
+    def get(self, kid=None):
+        now = time.monotonic()
+        certs = self._certs
+        if certs is None or now >= self._expires_at:
+            return self.refresh()
+        if kid and kid not in certs and now - self._last_forced > settings.GOOGLE_CERTS_MIN_REFRESH:
+            self._last_forced = now
+            return self.refresh()
+        if now >= self._expires_at - settings.GOOGLE_CERTS_REFRESH_AHEAD and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+        return certs
+
+    def refresh(self):
+        with self._lock:
+            try:
+                certs, lifetime = self._fetch()
+            except Exception as e:
+                if self._certs is None:
+                    raise
+                # Keep serving the last good set; try again shortly
+                logger.warning("Google certs refresh failed, serving cached certs: %s", e)
+                self._expires_at = time.monotonic() + settings.GOOGLE_CERTS_MIN_REFRESH
+                return self._certs
+            self._certs = certs
+            self._expires_at = time.monotonic() + lifetime
+            return certs
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def clear(self):
+        with self._lock:
+            self._certs = None
+            self._expires_at = 0
+
+
+class LocalGoogleCerts:
+    """
+    Offline stand-in for Google's signer: a throwaway RSA key with a
+    self-signed cert, served in the same {kid: PEM} shape, that can mint
+    ID tokens for tests and benchmarks.
+    """
+
+    def __init__(self):
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+        from google.auth import crypt
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "local-google-stand-in")])
+        now = datetime.now(timezone.utc)
+        cert = (
+            x509.CertificateBuilder().subject_name(name).issuer_name(name)
+            .public_key(key.public_key()).serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=30))
+            .sign(key, hashes.SHA256())
+        )
+        self.kid = uuid.uuid4().hex
+        self.certs = {self.kid: cert.public_bytes(serialization.Encoding.PEM).decode()}
+        private_pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        self._signer = crypt.RSASigner.from_string(private_pem, key_id=self.kid)
+
+    def fetch(self):
+        return dict(self.certs), settings.GOOGLE_CERTS_DEFAULT_TTL
+
+    def issue(self, email, audience, name="", email_verified=True, lifetime=3600):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": audience,
+            "sub": uuid.uuid5(uuid.NAMESPACE_URL, email).hex,
+            "email": email,
+            "email_verified": email_verified,
+            "name": name,
+            "iat": now,
+            "exp": now + lifetime,
+        }
+        return jwt.encode(self._signer, payload).decode()
+
+
+_local_certs = None
+_local_lock = threading.Lock()
+
+
+def local_google_certs():
+    global _local_certs
+    with _local_lock:
+        if _local_certs is None:
+            _local_certs = LocalGoogleCerts()
+    return _local_certs
+
+
+google_certs = GoogleCertCache()
+_local_cert_cache = None
+
+
+def get_cert_cache():
+    """The stand-in's certs when FAKE_BACKENDS is on, Google's otherwise."""
+    global _local_cert_cache
+    if fake_backends_enabled():
+        if _local_cert_cache is None:
+            _local_cert_cache = GoogleCertCache(url="local", fetch=local_google_certs().fetch)
+        return _local_cert_cache
+    return google_certs
+
+
+def verify_google_id_token(token, audience):
+    """
+    Offline equivalent of google.oauth2.id_token.verify_oauth2_token using
+    cached certs. Raises ValueError for any invalid token.
+    """
+    kid = jwt.decode_header(token).get("kid")
+    certs = get_cert_cache().get(kid)
+    idinfo = jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=settings.GOOGLE_CLOCK_SKEW)
+    if idinfo.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {idinfo.get('iss')}")
+    return idinfo
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.authentication import CachedTokenAuthentication, token_cache
+from users.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request authentication overhead (time and queries) of DRF's "
+        "TokenAuthentication versus CachedTokenAuthentication, cold and warm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user("bench-auth@example.com", "!", is_active=True)
+                token = Token.objects.create(user=user)
+                self.bench(token.key, options["requests"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def bench(self, key, count):
+        factory = APIRequestFactory()
+        make_request = lambda: Request(factory.get("/", HTTP_AUTHORIZATION=f"Token {key}"))  # noqa: E731
+
+        self.stdout.write(f"{'authenticator':<28}{'requests':>9}{'us/request':>12}{'queries/request':>17}")
+        token_cache.clear()
+        cases = [
+            ("TokenAuthentication", TokenAuthentication(), None),
+            ("Cached (cold every time)", CachedTokenAuthentication(), token_cache.clear),
+            ("Cached (warm)", CachedTokenAuthentication(), None),
+        ]
+        for label, authenticator, before_each in cases:
+            requests = [make_request() for _ in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for request in requests:
+                    if before_each:
+                        before_each()
+                    authenticator.authenticate(request)
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label:<28}{count:>9}{elapsed / count * 1e6:>12.1f}{len(queries) / count:>17.2f}"
+            )
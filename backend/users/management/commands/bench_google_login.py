@@ -0,0 +1,77 @@
+import os
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from google.auth import jwt
+from rest_framework.test import APIRequestFactory
+
+from users.google_certs import GoogleCertCache, get_cert_cache, local_google_certs
+from users.views import google_login
+
+
+AUDIENCE = "bench-client.apps.googleusercontent.com"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure Google ID-token verification with a cert fetch per login (the old path) "
+        "versus the cached verifier, and a full google_login request, against the local "
+        "cert stand-in. No network is used; --fetch-latency simulates the certs round trip."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=500)
+        parser.add_argument("--fetch-latency", type=float, default=0.08, help="Seconds per simulated cert fetch.")
+
+    def handle(self, *args, **options):
+        count, latency = options["logins"], options["fetch_latency"]
+        stand_in = local_google_certs()
+        tokens = [stand_in.issue(f"bench-google-{i}@example.com", AUDIENCE, name="Bench") for i in range(count)]
+        fetches = 0
+
+        def remote_fetch():
+            nonlocal fetches
+            fetches += 1
+            time.sleep(latency)
+            return stand_in.fetch()
+
+        self.stdout.write(f"{'path':<30}{'logins':>8}{'ms/login':>10}{'cert fetches':>14}")
+
+        # Old behaviour: every login downloads the certs again
+        fetches = 0
+        started = time.perf_counter()
+        for token in tokens:
+            jwt.decode(token, certs=remote_fetch()[0], audience=AUDIENCE)
+        self.report("fetch per login", count, time.perf_counter() - started, fetches)
+
+        cache = GoogleCertCache(url="local", fetch=remote_fetch)
+        fetches = 0
+        started = time.perf_counter()
+        for token in tokens:
+            jwt.decode(token, certs=cache.get(jwt.decode_header(token).get("kid")), audience=AUDIENCE)
+        self.report("cached certs", count, time.perf_counter() - started, fetches)
+
+        factory = APIRequestFactory()
+        with override_settings(FAKE_BACKENDS=True), mock.patch.dict(os.environ, GOOGLE_CLIENT_ID=AUDIENCE):
+            get_cert_cache().get()  # warm, as it is after the first login
+            try:
+                with transaction.atomic():
+                    started = time.perf_counter()
+                    for token in tokens:
+                        response = google_login(factory.post("/auth/google-login/", {"credential": token}, format="json"))
+                        if response.status_code != 200:
+                            raise RuntimeError(f"google_login failed: {response.data}")
+                    self.report("google_login request (cached)", count, time.perf_counter() - started, 0)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def report(self, label, count, elapsed, fetches):
+        self.stdout.write(f"{label:<30}{count:>8}{elapsed / count * 1e3:>10.2f}{fetches:>14}")
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import OneTimePassword
+
+
+class Command(BaseCommand):
+    help = "Delete one-time passwords (used or not) that expired more than OTP_RETENTION_HOURS ago, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.OTP_RETENTION_HOURS,
+                            help="Keep rows that expired within this many hours.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        # Every OTP, used or not, expires minutes after it is created, so this
+        # covers used rows too while staying on the expires_at index.
+        stale = OneTimePassword.objects.filter(expires_at__lt=cutoff)
+        if options["dry_run"]:
+            self.stdout.write(f"Would delete {stale.count()} OTPs.")
+            return
+
+        deleted = 0
+        while True:
+            # Short deletes keep locks brief on a busy table
+            ids = list(stale.values_list("id", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            deleted += OneTimePassword.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} OTPs."))
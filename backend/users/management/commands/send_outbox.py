@@ -0,0 +1,114 @@
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def claim_batch(batch_size, lease):
+    """
+    Takes up to `batch_size` due messages and pushes their next attempt past
+    the lease, so other workers skip them and a crashed worker's batch is
+    retried once the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if batch:
+            OutboxEmail.objects.filter(id__in=[email.id for email in batch]).update(
+                next_attempt_at=now + timedelta(seconds=lease)
+            )
+    return batch
+
+
+def retry_delay(attempts):
+    delay = min(settings.OUTBOX_MAX_BACKOFF, settings.OUTBOX_BASE_BACKOFF * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued OutboxEmail rows over one reused SMTP connection, "
+        "retrying failures with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send everything due, then exit.")
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument("--interval", type=float, default=settings.OUTBOX_POLL_INTERVAL,
+                            help="Seconds to sleep when nothing is due.")
+
+    def handle(self, *args, **options):
+        self.connection = None
+        idle_since = time.monotonic()
+        try:
+            while True:
+                batch = claim_batch(options["batch_size"], settings.OUTBOX_LEASE)
+                if batch:
+                    self.deliver(batch)
+                    idle_since = time.monotonic()
+                    continue
+                if options["once"]:
+                    break
+                # Don't hold an idle SMTP session open until the server drops it
+                if self.connection and time.monotonic() - idle_since > settings.OUTBOX_IDLE_CLOSE:
+                    self.close()
+                time.sleep(options["interval"])
+        finally:
+            self.close()
+
+    def deliver(self, batch):
+        sent, failed = [], 0
+        for email in batch:
+            try:
+                if self.connection is None:
+                    self.connection = get_connection()
+                    self.connection.open()
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email or None, email.to, connection=self.connection
+                )
+                self.connection.send_messages([message])
+                sent.append(email.id)
+            except Exception as e:
+                # The session may be unusable now; reconnect for the next message
+                self.close()
+                self.record_failure(email, e)
+                failed += 1
+
+        if sent:
+            OutboxEmail.objects.filter(id__in=sent).update(
+                status=OutboxEmail.STATUS_SENT, sent_at=timezone.now(), attempts=F("attempts") + 1
+            )
+        self.stdout.write(f"Outbox: sent {len(sent)}, failed {failed}")
+
+    def record_failure(self, email, error):
+        email.attempts += 1
+        email.last_error = f"{type(error).__name__}: {error}"[:1000]
+        if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            email.status = OutboxEmail.STATUS_FAILED
+            logger.error("Outbox: giving up on email %s to %s: %s", email.id, email.to, email.last_error)
+        else:
+            email.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+        email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
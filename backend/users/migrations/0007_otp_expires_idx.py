@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='onetimepassword',
+            index=models.Index(fields=['expires_at'], name='otp_expires_idx'),
+        ),
+    ]
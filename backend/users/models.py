@@ -37,6 +37,14 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # CachedTokenAuthentication's request.user holds only id/is_active: the
+        # first deferred field read loads the rest of the row, not one query each
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
 
 class OneTimePassword(models.Model):
     PURPOSE_SIGNUP = "signup"
@@ -48,19 +56,30 @@ class OneTimePassword(models.Model):
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # verify_otp: latest OTP for a user + code
+            models.Index(fields=["user", "code", "-created_at"], name="otp_user_code_created_idx"),
+            # create_for_user: invalidate the user's unused OTPs
+            models.Index(fields=["user", "purpose", "is_used"], name="otp_user_purpose_used_idx"),
+            # purge_otps: expired rows
+            models.Index(fields=["expires_at"], name="otp_expires_idx"),
+        ]
+
     @staticmethod
     def generate_code():
         return f"{random.randint(100000, 999999)}"
 
     @classmethod
     def create_for_user(cls, user, purpose=PURPOSE_SIGNUP, ttl_minutes=10):
-        # Invalidate old OTPs
-        cls.objects.filter(user=user, purpose=purpose, is_used=False).update(is_used=True)
+        # Invalidate old OTPs that could still be used (expired ones already can't)
+        now = timezone.now()
+        cls.objects.filter(user=user, purpose=purpose, is_used=False, expires_at__gt=now).update(is_used=True)
         return cls.objects.create(
             user=user,
             code=cls.generate_code(),
             purpose=purpose,
-            expires_at=timezone.now() + timedelta(minutes=ttl_minutes),
+            expires_at=now + timedelta(minutes=ttl_minutes),
         )
 
     def is_valid(self):
@@ -68,3 +87,41 @@ class OneTimePassword(models.Model):
 
     def __str__(self):
         return f"OTP({self.user.email}, {self.code}, used={self.is_used})"
+
+
+class OutboxEmail(models.Model):
+    """
+    Email queued inside the request's transaction and delivered by the
+    `send_outbox` worker, so requests never wait on (or fail with) SMTP.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField()
+    status = models.CharField(
+        max_length=10,
+        choices=[(STATUS_PENDING, "Pending"), (STATUS_SENT, "Sent"), (STATUS_FAILED, "Failed")],
+        default=STATUS_PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # send_outbox: due pending messages
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_status_due_idx"),
+        ]
+
+    @classmethod
+    def enqueue(cls, subject, body, to, from_email=""):
+        return cls.objects.create(subject=subject, body=body, to=list(to), from_email=from_email)
+
+    def __str__(self):
+        return f"OutboxEmail({', '.join(self.to)}, {self.status})"
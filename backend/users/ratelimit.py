@@ -0,0 +1,49 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+
+class SlidingWindowLimiter:
+    """
+    In-process sliding-window rate limiter: at most `limit` hits per key in
+    any `window` seconds. Tracks up to `maxkeys` keys, dropping the least
+    recently used. Limits are per worker process.
+    """
+
+    def __init__(self, limit, window, maxkeys=100_000):
+        self.limit = limit
+        self.window = window
+        self.maxkeys = maxkeys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Records an attempt; returns 0 if allowed, else seconds until the next one is."""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque()
+                while len(self._hits) > self.maxkeys:
+                    self._hits.popitem(last=False)
+            self._hits.move_to_end(key)
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+            if len(hits) >= self.limit:
+                return hits[0] + self.window - now
+            hits.append(now)
+            return 0
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._hits.clear()
+
+
+otp_email_limiter = SlidingWindowLimiter(settings.OTP_VERIFY_EMAIL_LIMIT, settings.OTP_VERIFY_WINDOW)
+otp_ip_limiter = SlidingWindowLimiter(settings.OTP_VERIFY_IP_LIMIT, settings.OTP_VERIFY_WINDOW)
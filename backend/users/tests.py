@@ -1,3 +1,216 @@
-from django.test import TestCase
+from datetime import timedelta
+import os
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .authentication import CachedTokenAuthentication, invalidate_user_tokens, token_cache, token_cache_key
+from .google_certs import GoogleCertCache, cache_lifetime, get_cert_cache, local_google_certs
+from .models import OneTimePassword, OutboxEmail, User
+from .ratelimit import otp_email_limiter, otp_ip_limiter
+
+
+class AuthQueryCountTests(TestCase):
+    """Pins the number of SQL queries for the signup / OTP endpoints."""
+
+    def setUp(self):
+        otp_email_limiter.clear()
+        otp_ip_limiter.clear()
+        self.client = APIClient()
+
+    def test_signup(self):
+        payload = {
+            "full_name": "New Person",
+            "email": "new@example.com",
+            "password": "secret123",
+            "confirm_password": "secret123",
+        }
+        # email uniqueness, savepoint, user insert, OTP invalidate + insert, outbox insert, release
+        with self.assertNumQueries(7):
+            response = self.client.post("/auth/signup/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        # nothing is sent inside the request
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboxEmail.objects.get()
+        self.assertIn(OneTimePassword.objects.get(is_used=False).code, queued.body)
+
+        call_command("send_outbox", "--once", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["new@example.com"])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (OutboxEmail.STATUS_SENT, 1))
+
+    def test_verify_otp(self):
+        user = User.objects.create_user("pending@example.com", "secret123", is_active=False)
+        otp = OneTimePassword.create_for_user(user)
+        # user, latest OTP, mark used, activate user, token get_or_create (select + insert in savepoint)
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                "/auth/verify-otp/", {"email": user.email, "code": otp.code}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+        self.user = User.objects.create_user("member@example.com", "secret123", is_active=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_is_cached(self):
+        self.client.get("/documents/summaries/")
+        # content version only (payload comes from the response cache); no token/user join
+        with self.assertNumQueries(1):
+            response = self.client.get("/documents/summaries/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout_invalidates(self):
+        self.assertEqual(self.client.get("/documents/summaries/").status_code, 200)
+        self.assertEqual(self.client.post("/auth/logout/").status_code, 200)
+        self.assertEqual(self.client.get("/documents/summaries/").status_code, 401)
+
+    def test_deactivation_invalidates(self):
+        self.assertEqual(self.client.get("/documents/summaries/").status_code, 200)
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.client.get("/documents/summaries/").status_code, 401)
+
+    @override_settings(AUTH_TOKEN_SHARED_CACHE_TTL=60)
+    def test_shared_cache_holds_no_user_row(self):
+        self.assertEqual(self.client.get("/documents/summaries/").status_code, 200)
+        self.assertEqual(cache.get(token_cache_key(self.token.key)), (self.user.pk, True))
+
+        token_cache.clear()
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        with self.assertNumQueries(0):
+            user, token = CachedTokenAuthentication().authenticate(request)
+        self.assertEqual((user.pk, token.key), (self.user.pk, self.token.key))
+        # other fields are deferred and load together on first access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "member@example.com")
+            self.assertEqual(user.full_name, "")
+            self.assertTrue(user.check_password("secret123"))
+
+    def test_bulk_deactivation_needs_explicit_invalidation(self):
+        self.assertEqual(self.client.get("/documents/summaries/").status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        invalidate_user_tokens([self.user.pk])
+        self.assertEqual(self.client.get("/documents/summaries/").status_code, 401)
+
+
+@override_settings(FAKE_BACKENDS=True)
+@mock.patch.dict(os.environ, GOOGLE_CLIENT_ID="test-client")
+class GoogleLoginTests(TestCase):
+    def test_login_with_stand_in_token(self):
+        stand_in = local_google_certs()
+        get_cert_cache().clear()
+        with mock.patch.object(get_cert_cache(), "_fetch", wraps=stand_in.fetch) as fetch:
+            for _ in range(3):
+                token = stand_in.issue("g@example.com", "test-client", name="G Person")
+                response = APIClient().post("/auth/google-login/", {"credential": token}, format="json")
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(User.objects.get(email="g@example.com").full_name, "G Person")
+
+        wrong_audience = stand_in.issue("g@example.com", "someone-else")
+        response = APIClient().post("/auth/google-login/", {"credential": wrong_audience}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_cache_lifetime_and_refresh(self):
+        self.assertEqual(cache_lifetime({"Cache-Control": "public, max-age=20000", "Age": "500"}, 60), 19500)
+        self.assertEqual(cache_lifetime({}, 60), 60)
+
+        responses = [({"a": "pem-a"}, 3600), ({"b": "pem-b"}, 3600), RuntimeError("down")]
+
+        def fetch():
+            result = responses.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        certs = GoogleCertCache(url="test", fetch=fetch)
+        self.assertEqual(certs.get("a"), {"a": "pem-a"})
+        self.assertEqual(certs.get("a"), {"a": "pem-a"})
+        # a key id we have not seen means Google rotated keys: refetch once
+        self.assertEqual(certs.get("b"), {"b": "pem-b"})
+        # a failed refresh keeps serving the last good set
+        certs._expires_at = 0
+        self.assertEqual(certs.get("b"), {"b": "pem-b"})
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPException("421 try again later")
+
+
+class OutboxTests(TestCase):
+    @override_settings(EMAIL_BACKEND="users.tests.FailingEmailBackend", OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_give_up(self):
+        email = OutboxEmail.enqueue("Hi", "Body", ["someone@example.com"])
+        call_command("send_outbox", "--once", stdout=StringIO())
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_PENDING, 1))
+        self.assertIn("421", email.last_error)
+        self.assertGreater(email.next_attempt_at, email.created_at)
+
+        # not due yet: the next run leaves it alone
+        call_command("send_outbox", "--once", stdout=StringIO())
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+
+        OutboxEmail.objects.update(next_attempt_at=email.created_at)
+        call_command("send_outbox", "--once", stdout=StringIO())
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_FAILED, 2))
+
+
+class OTPLimitsTests(TestCase):
+    def setUp(self):
+        otp_email_limiter.clear()
+        otp_ip_limiter.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user("guess@example.com", "secret123", is_active=False)
+        self.otp = OneTimePassword.create_for_user(self.user)
+
+    def test_guessing_is_throttled_before_the_database(self):
+        wrong = "000000" if self.otp.code != "000000" else "111111"
+        for _ in range(5):
+            response = self.client.post("/auth/verify-otp/", {"email": self.user.email, "code": wrong}, format="json")
+            self.assertEqual(response.status_code, 400)
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                "/auth/verify-otp/", {"email": self.user.email.upper(), "code": self.otp.code}, format="json"
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_spoofed_forwarded_for_does_not_reset_the_ip_limit(self):
+        def attempt(i):
+            # The client makes up the left entries; the proxy appends the address it saw
+            return self.client.post(
+                "/auth/verify-otp/", {"email": f"guess{i}@example.com", "code": "000000"}, format="json",
+                HTTP_X_FORWARDED_FOR=f"10.0.0.{i}, 203.0.113.7",
+            )
+
+        for i in range(settings.OTP_VERIFY_IP_LIMIT):
+            self.assertEqual(attempt(i).status_code, 400)
+        self.assertEqual(attempt(999).status_code, 429)
+
+    def test_purge_removes_long_expired_rows(self):
+        old = OneTimePassword.create_for_user(self.user)
+        OneTimePassword.objects.filter(pk=old.pk).update(expires_at=timezone.now() - timedelta(days=2))
+        call_command("purge_otps", stdout=StringIO())
+        self.assertEqual(list(OneTimePassword.objects.values_list("pk", flat=True)), [self.otp.pk])
@@ -1,12 +1,15 @@
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
 from rest_framework.authtoken.models import Token
 
-from .models import OneTimePassword, User
+from .models import OneTimePassword, OutboxEmail, User
+from .ratelimit import otp_email_limiter, otp_ip_limiter
 from .serializers import SignupSerializer, VerifyOtpSerializer, LoginSerializer, UserSerializer
 
 
@@ -15,15 +18,15 @@ from .serializers import SignupSerializer, VerifyOtpSerializer, LoginSerializer,
 def signup(request):
     serializer = SignupSerializer(data=request.data)
     if serializer.is_valid():
-        user = serializer.save(is_active=False)
-        otp = OneTimePassword.create_for_user(user)
-        send_mail(
-            "Verify your email",
-            f"Your OTP is {otp.code}. It expires in 10 minutes.",
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-        )
+        # User, OTP and email commit together; the send_outbox worker delivers it
+        with transaction.atomic():
+            user = serializer.save(is_active=False)
+            OutboxEmail.enqueue(
+                "Verify your email",
+                f"Your OTP is {serializer.context['otp']}. It expires in 10 minutes.",
+                [user.email],
+                from_email=settings.DEFAULT_FROM_EMAIL or "",
+            )
         return Response({"message": "OTP sent to your email"}, status=201)
     return Response(serializer.errors, status=400)
 
@@ -31,8 +34,18 @@ def signup(request):
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def verify_otp(request):
+    # Guessing is cut off here, before any query runs
+    email = str(request.data.get("email", "")).strip().lower()
+    wait = max(
+        otp_ip_limiter.hit(BaseThrottle().get_ident(request)),
+        otp_email_limiter.hit(email) if email else 0,
+    )
+    if wait:
+        raise Throttled(wait=wait)
+
     serializer = VerifyOtpSerializer(data=request.data)
     if serializer.is_valid():
+        otp_email_limiter.reset(email)
         user = serializer.validated_data["user"]
         otp_obj = serializer.validated_data["otp_obj"]
 
@@ -91,22 +104,21 @@ def resend_otp(request):
     if user.is_active:
         return Response({"detail": "User already verified."}, status=400)
 
-    otp = OneTimePassword.create_for_user(user)
-    send_mail(
-        "Resend OTP - Verify your account",
-        f"Your new OTP is {otp.code}. It expires in 10 minutes.",
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=False,
-    )
+    with transaction.atomic():
+        otp = OneTimePassword.create_for_user(user)
+        OutboxEmail.enqueue(
+            "Resend OTP - Verify your account",
+            f"Your new OTP is {otp.code}. It expires in 10 minutes.",
+            [user.email],
+            from_email=settings.DEFAULT_FROM_EMAIL or "",
+        )
     return Response({"detail": "New OTP sent to email."}, status=200)
 
 
 
 
 
-from google.oauth2 import id_token as google_id_token
-from google.auth.transport import requests as google_requests
+from .google_certs import verify_google_id_token
 import os
 
 @api_view(["POST"])
@@ -121,12 +133,8 @@ def google_login(request):
         return Response({"detail": "Missing credential (ID token)."}, status=400)
 
     try:
-        # Verify the token against your Google client ID (audience)
-        idinfo = google_id_token.verify_oauth2_token(
-            id_token_from_client,
-            google_requests.Request(),
-            os.getenv("GOOGLE_CLIENT_ID")
-        )
+        # Verify the token against your Google client ID (audience), offline with cached certs
+        idinfo = verify_google_id_token(id_token_from_client, os.getenv("GOOGLE_CLIENT_ID"))
 
         # Token is valid. Extract user info.
         email = idinfo.get("email")
@@ -3,7 +3,7 @@ import { useState } from "react"
 import { Card, CardHeader, CardTitle, CardDescription, CardContent, Button } from "./UIComponents"
 import { motion, AnimatePresence } from "framer-motion"
 
-const FileUpload = ({ uploadedFiles, setUploadedFiles, handleFileUpload }) => {
+const FileUpload = ({ uploadedFiles, setUploadedFiles, handleFileUpload, handleBulkUpload }) => {
   const [isDragOver, setIsDragOver] = useState(false)
   const [popup, setPopup] = useState({ show: false, message: "", type: "" })
 
@@ -13,6 +13,24 @@ const FileUpload = ({ uploadedFiles, setUploadedFiles, handleFileUpload }) => {
   }
 
   const processFiles = async (files) => {
+    if (files.length > 1 && handleBulkUpload) {
+      try {
+        const results = await handleBulkUpload(Array.from(files))
+        const failed = results.filter((r) => r.status !== "stored")
+        if (failed.length) {
+          triggerPopup(`❌ ${failed.map((r) => r.name).join(", ")} failed to upload.`, "error")
+        } else if (results.length) {
+          triggerPopup(`✅ ${results.length} files uploaded successfully!`, "success")
+        }
+      } catch (err) {
+        console.error("Upload failed:", err)
+        if (!(err.message && err.message.toLowerCase().includes("unauthorized"))) {
+          triggerPopup("❌ Files failed to upload.", "error")
+        }
+      }
+      return
+    }
+
     for (let file of files) {
       try {
         await handleFileUpload(file) // ✅ parent handles auth + upload
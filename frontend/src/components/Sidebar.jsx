@@ -12,6 +12,8 @@ export default function Sidebar({
 }) {
   const [sessions, setSessions] = useState([])
   const [activeId, setActiveId] = useState(null)
+  const [nextUrl, setNextUrl] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   
   const BASE_URL = import.meta.env.VITE_BASIC_URL || ""
   const token = typeof window !== "undefined" ? localStorage.getItem("token") : null
@@ -31,29 +33,50 @@ export default function Sidebar({
     }
   }, [])
 
+  // One page of sessions (newest first) plus the cursor URL of the next page, if any
+  async function fetchPage(url) {
+    const res = await fetch(url, { headers: { Authorization: `Token ${token}` } })
+    if (!res.ok) throw new Error(`status ${res.status}`)
+    const data = await res.json()
+    const list = Array.isArray(data)
+      ? data
+      : Array.isArray(data.results)
+      ? data.results
+      : data.summaries || []
+    return { list, next: Array.isArray(data) ? null : data.next || null }
+  }
+
   async function fetchSessions() {
     if (!token) {
       setSessions([])
+      setNextUrl(null)
       return
     }
     try {
-      const url = `${BASE_URL.replace(/\/?$/, "/")}documents/summaries/`
-      const res = await fetch(url, { headers: { Authorization: `Token ${token}` } })
-      if (!res.ok) {
-        console.warn("Could not fetch summaries, status:", res.status)
-        setSessions([])
-        return
-      }
-      const data = await res.json()
-      const list = Array.isArray(data)
-        ? data
-        : Array.isArray(data.results)
-        ? data.results
-        : data.summaries || []
-      setSessions(list.slice().reverse())
+      const { list, next } = await fetchPage(`${BASE_URL.replace(/\/?$/, "/")}documents/summaries/`)
+      setSessions(list)
+      setNextUrl(next)
     } catch (err) {
       console.error("Failed to load sessions:", err)
       setSessions([])
+      setNextUrl(null)
+    }
+  }
+
+  async function loadMore() {
+    if (!nextUrl || loadingMore) return
+    setLoadingMore(true)
+    try {
+      const { list, next } = await fetchPage(nextUrl)
+      setSessions((prev) => {
+        const seen = new Set(prev.map((p) => String(p.id)))
+        return [...prev, ...list.filter((s) => !seen.has(String(s.id)))]
+      })
+      setNextUrl(next)
+    } catch (err) {
+      console.error("Failed to load more sessions:", err)
+    } finally {
+      setLoadingMore(false)
     }
   }
 
@@ -214,6 +237,15 @@ export default function Sidebar({
               </div>
             ))
           )}
+          {nextUrl && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full mt-1 mb-3 py-2 rounded-lg bg-slate-800/50 hover:bg-slate-800 text-slate-300 text-xs font-medium transition disabled:opacity-50"
+            >
+              {loadingMore ? "Loading…" : "Load more"}
+            </button>
+          )}
         </div>
       </aside>
     </>
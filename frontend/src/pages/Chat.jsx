@@ -14,6 +14,22 @@ import { Button, Tabs, TabsList, TabsTrigger, TabsContent } from "../components/
 import Header from "../components/Header"
 import { motion, AnimatePresence } from "framer-motion"
 
+const SUMMARIZE_JOB_POLL_MS = 1500
+
+// Polls a queued summarize job until it finishes. Each check is a short
+// request, so waiting holds no server worker; the job's events_url (SSE) is
+// there for clients that want pushes instead.
+const waitForSummarizeJob = async (statusUrl, token) => {
+  for (;;) {
+    await new Promise((res) => setTimeout(res, SUMMARIZE_JOB_POLL_MS))
+    const res = await fetch(statusUrl, { headers: { Authorization: `Token ${token}` } })
+    const job = await res.json()
+    if (!res.ok) throw new Error(job.error || `Job status ${res.status}`)
+    if (job.status === "done") return job.result
+    if (job.status === "failed") throw new Error(job.error || "Summarization failed")
+  }
+}
+
 export default function Chat() {
   const [isSummarizing, setIsSummarizing] = useState(false)
   const [theme, setTheme] = useState("dark")
@@ -129,6 +145,44 @@ export default function Chat() {
     }
   }
 
+  // Several files at once go through the bulk endpoint in a single request
+  const handleBulkUpload = async (files) => {
+    if (!localStorage.getItem("token")) {
+      setShowAuthPopup(true)
+      return []
+    }
+
+    const formData = new FormData()
+    for (const file of files) formData.append("files", file)
+
+    const BASE_URL = import.meta.env.VITE_BASIC_URL
+    const res = await fetch(`${BASE_URL}documents/upload/bulk/`, {
+      method: "POST",
+      headers: {
+        Authorization: `Token ${localStorage.getItem("token")}`,
+      },
+      body: formData,
+    })
+
+    const data = await res.json()
+    if (!data.results) throw new Error(data.error || data.detail || "Upload failed")
+
+    const stored = data.results
+      .map((result, i) => ({ result, file: files[i] }))
+      .filter(({ result }) => result.status === "stored")
+    setUploadedFiles((prev) => [
+      ...prev,
+      ...stored.map(({ result, file }) => ({
+        backendId: result.document.id,
+        name: file.name,
+        size: file.size,
+        type: file.type,
+        url: result.document.file_url,
+      })),
+    ])
+    return data.results
+  }
+
   const handleSummarize = async () => {
     if (!uploadedFiles.length) return alert("Upload at least one file first!")
 
@@ -147,11 +201,15 @@ export default function Chat() {
           "Content-Type": "application/json",
           Authorization: `Token ${token}`,
         },
-        body: JSON.stringify({ files: fileIds }),
+        body: JSON.stringify({ files: fileIds, async: true }),
       })
 
-      const data = await res.json()
+      let data = await res.json()
       console.log("Summarize response:", data)
+      if (res.status === 202) {
+        // Queued: poll the job until the summary is ready
+        data = await waitForSummarizeJob(data.status_url, token)
+      }
 
       if (res.ok && data.summary) {
         const newResult = {
@@ -200,7 +258,24 @@ export default function Chat() {
     }
   }
 
-  const handleSelectSession = (session) => {
+  const handleSelectSession = async (session) => {
+    // The session list is slim; load the summary text on demand
+    if (!session.summary_text && !session.is_local) {
+      try {
+        const token = localStorage.getItem("token")
+        const BASE_URL = import.meta.env.VITE_BASIC_URL
+        const res = await fetch(`${BASE_URL}documents/summaries/${session.id}/`, {
+          headers: { Authorization: `Token ${token}` },
+        })
+        if (res.ok) {
+          const detail = await res.json()
+          session = { ...session, summary_text: detail.summary_text }
+        }
+      } catch (err) {
+        console.error("Failed to load session:", err)
+      }
+    }
+
     setActiveSession(session)
     setResults((prev) => ({
       ...prev,
@@ -278,6 +353,7 @@ export default function Chat() {
                   uploadedFiles={uploadedFiles}
                   setUploadedFiles={setUploadedFiles}
                   handleFileUpload={handleFileUpload}
+                  handleBulkUpload={handleBulkUpload}
                 />
                 <ActionButtons uploadedFiles={uploadedFiles} handleSummarize={handleSummarize} isSummarizing={isSummarizing} />
               </TabsContent>